@@ -0,0 +1,4 @@
+"""Performance benchmarks for deep_collections.
+
+Each module is runnable on its own, e.g. `python -m benchmarks.bench_threadsafe`.
+"""
@@ -0,0 +1,79 @@
+"""Event loop latency benchmark for deep_collections.aio.
+
+A ticker task asks to wake every millisecond and records how late it actually
+wakes, while a search runs on the same loop. The p50/p99/max lateness is reported
+for the synchronous search, the cooperative async search, and the async search
+offloaded to a thread.
+
+    python -m benchmarks.bench_asyncio --width 20000
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from deep_collections import paths_to_key
+from deep_collections.aio import apaths_to_key
+
+
+def make_document(width):
+    return {f"k{i}": {"id": i, "tags": [{"name": f"t{j}", "id": j} for j in range(5)]} for i in range(width)}
+
+
+async def measure(search):
+    lateness = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lateness.append(time.perf_counter() - start - 0.001)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0.005)
+    start = time.perf_counter()
+    hits = await search()
+    elapsed = time.perf_counter() - start
+    done.set()
+    await task
+
+    lateness.sort()
+    return {
+        "seconds": elapsed,
+        "hits": hits,
+        "p50_ms": statistics.median(lateness) * 1000,
+        "p99_ms": lateness[int(len(lateness) * 0.99)] * 1000,
+        "max_ms": lateness[-1] * 1000,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--width", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    obj = make_document(args.width)
+
+    async def sync_search():
+        return len(list(paths_to_key(obj, "id")))
+
+    async def async_search():
+        return len([p async for p in apaths_to_key(obj, "id")])
+
+    async def offloaded_search():
+        with ThreadPoolExecutor(1) as executor:
+            return len([p async for p in apaths_to_key(obj, "id", executor=executor)])
+
+    results = {
+        "sync": asyncio.run(measure(sync_search)),
+        "async": asyncio.run(measure(async_search)),
+        "async_thread": asyncio.run(measure(offloaded_search)),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Time flatten and unflatten against building the same maps from the query functions.
+
+flatten is compared with paths_to_key(obj, "*"), which matches every key, and a
+getitem_by_path_strict for each path, keeping those to leaves. unflatten is compared
+with a set_by_path per path.
+
+    python -m benchmarks.bench_flatten --records 100000
+"""
+import argparse
+import json
+import time
+
+from deep_collections import flatten
+from deep_collections import getitem_by_path_strict
+from deep_collections import paths_to_key
+from deep_collections import set_by_path
+from deep_collections import unflatten
+from deep_collections.traversal import strategy_for
+
+
+def make_document(records):
+    # 10 leaves per record.
+    return {
+        "records": [
+            {
+                "id": i,
+                "name": f"n{i}",
+                "score": i * 0.5,
+                "tags": ["a", "b", "c"],
+                "meta": {"owner": f"o{i % 97}", "team": {"id": i % 13, "name": "t"}, "ok": True},
+            }
+            for i in range(records)
+        ]
+    }
+
+
+def timed(func):
+    start = time.perf_counter()
+    rv = func()
+    return time.perf_counter() - start, rv
+
+
+def by_paths_to_key(obj):
+    return {
+        tuple(path): value
+        for path in paths_to_key(obj, "*")
+        if strategy_for(type(value := getitem_by_path_strict(obj, path))) is None
+    }
+
+
+def by_set_by_path(flat):
+    obj = {}
+    for path, value in flat.items():
+        set_by_path(obj, path, value)
+    return obj
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=100000, help="Each has 10 leaves.")
+    parser.add_argument("--skip-baselines", action="store_true")
+    args = parser.parse_args(argv)
+
+    obj = make_document(args.records)
+    flatten_seconds, flat = timed(lambda: flatten(obj))
+    unflatten_seconds, rebuilt = timed(lambda: unflatten(flat))
+    assert rebuilt == obj
+
+    results = {
+        "leaves": len(flat),
+        "flatten": flatten_seconds,
+        "unflatten": unflatten_seconds,
+    }
+    if not args.skip_baselines:
+        seconds, expected = timed(lambda: by_paths_to_key(obj))
+        assert expected == flat
+        results["paths_to_key"] = seconds
+        # set_by_path makes dicts, not lists, so only time it.
+        results["set_by_path"] = timed(lambda: by_set_by_path(flat))[0]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
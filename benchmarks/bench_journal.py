@@ -0,0 +1,67 @@
+"""Time keeping a replica in sync with a journal against sending the whole document.
+
+Each batch makes a few writes to a DeepCollection. The replica is then brought up to
+date either by pickling the whole document and loading it, or by pickling the
+drained journal and replaying it.
+
+    python -m benchmarks.bench_journal --records 100000 --writes 10
+"""
+import argparse
+import json
+import pickle
+import random
+import time
+from copy import deepcopy
+
+from deep_collections import DeepCollection
+
+
+def make_document(records):
+    return {"items": {f"k{i}": {"id": i, "meta": {"owner": f"o{i % 97}", "tags": ["a", "b"]}} for i in range(records)}}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--writes", type=int, default=10)
+    parser.add_argument("--batches", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    obj = make_document(args.records)
+    dc = DeepCollection(obj)
+    replica = DeepCollection(deepcopy(obj))
+    journal = dc.journal()
+
+    whole = journaled = 0.0
+    sent_whole = sent_journal = 0
+    for _ in range(args.batches):
+        for _ in range(args.writes):
+            dc["items", f"k{rng.randrange(args.records)}", "meta", "owner"] = rng.random()
+
+        start = time.perf_counter()
+        data = pickle.dumps(dc._obj)
+        pickle.loads(data)
+        whole += time.perf_counter() - start
+        sent_whole += len(data)
+
+        start = time.perf_counter()
+        data = pickle.dumps(journal.drain())
+        replica.replay(pickle.loads(data))
+        journaled += time.perf_counter() - start
+        sent_journal += len(data)
+
+    assert replica._obj == dc._obj
+    results = {
+        "records": args.records,
+        "writes": args.writes,
+        "whole_document": whole / args.batches,
+        "journal": journaled / args.batches,
+        "whole_document_bytes": sent_whole // args.batches,
+        "journal_bytes": sent_journal // args.batches,
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""deep_collections next to dpath, jmespath and dotty_dict on the same documents.
+
+Each scenario is run against synthetic documents of a few shapes: wide (many keys
+in one dict), deep (a long chain of nested dicts), records (a long list of similar
+dicts) and mixed (lists of dicts of lists). Documents are generated from a fixed
+seed, so every run sees the same data. Scenarios a library has no equivalent for
+are recorded as null.
+
+Times are the best mean seconds per call over --repeat rounds of --number calls.
+With --baseline, each time is compared to the same one in an earlier run's output,
+and those slower by more than --tolerance are listed as regressions, which also
+makes the exit status 1.
+
+    python -m benchmarks.bench_libraries --save-baseline baseline.json
+    python -m benchmarks.bench_libraries --baseline baseline.json
+"""
+import argparse
+import json
+import random
+import time
+from collections.abc import Mapping
+from copy import deepcopy
+
+from deep_collections import DeepCollection
+from deep_collections import del_by_path
+from deep_collections import getitem_by_path
+from deep_collections import getitem_by_path_strict
+from deep_collections import paths_to_key
+from deep_collections import paths_to_value
+from deep_collections import set_by_path
+
+try:
+    import dpath
+except ModuleNotFoundError:
+    dpath = None
+try:
+    import jmespath
+except ModuleNotFoundError:
+    jmespath = None
+try:
+    from dotty_dict import dotty
+except ModuleNotFoundError:
+    dotty = None
+
+SEED = 0
+
+SCENARIOS = ("get", "glob", "double_splat", "paths_to_key", "paths_to_value", "set", "delete", "construct")
+
+
+def make_wide(size, rng):
+    doc = {f"k{i}": {"id": i, "value": rng.random(), "name": f"name{i}"} for i in range(size)}
+    last = f"k{size - 1}"
+    spec = dict(get=[last, "value"], glob=["*", "value"], key="name", value=f"name{size // 2}", delete=[last, "name"])
+    return doc, spec
+
+
+def make_deep(depth, rng):
+    doc = node = {}
+    for i in range(depth):
+        node["level"] = {}
+        node["value"] = rng.randrange(1000)
+        node["items"] = [i, i + 1]
+        node = node["level"]
+    node["value"] = "bottom"
+    spec = dict(
+        get=["level"] * depth + ["value"],
+        glob=["*"] * depth + ["value"],
+        key="value",
+        value="bottom",
+        delete=["level"] * (depth - 1) + ["items"],
+    )
+    return doc, spec
+
+
+def make_records(size, rng):
+    doc = {
+        "meta": {"count": size},
+        "records": [
+            {
+                "id": i,
+                "name": f"n{i}",
+                "score": rng.random(),
+                "tags": rng.sample(["a", "b", "c", "d"], 2),
+                "owner": {"id": rng.randrange(97)},
+            }
+            for i in range(size)
+        ],
+    }
+    last = size - 1
+    spec = dict(
+        get=["records", last, "owner", "id"],
+        glob=["records", "*", "owner", "id"],
+        key="owner",
+        value=f"n{size // 2}",
+        delete=["records", last, "tags"],
+    )
+    return doc, spec
+
+
+def make_mixed(size, rng):
+    groups = max(size // 10, 1)
+    doc = {
+        "groups": [
+            {
+                "name": f"g{i}",
+                "members": [
+                    {"user": {"id": j, "roles": ["r", j % 3]}, "active": rng.random() < 0.5} for j in range(10)
+                ],
+            }
+            for i in range(groups)
+        ],
+        "settings": {"flags": [True, False], "limits": {"max": size}},
+    }
+    last = groups - 1
+    spec = dict(
+        get=["groups", last, "members", 9, "user", "id"],
+        glob=["groups", "*", "members", "*", "user", "id"],
+        key="roles",
+        value=f"g{groups // 2}",
+        delete=["groups", last, "members", 9, "active"],
+    )
+    return doc, spec
+
+
+def make_documents(size, depth):
+    rng = random.Random(SEED)
+    return {
+        "wide": make_wide(size, rng),
+        "deep": make_deep(depth, rng),
+        "records": make_records(size, rng),
+        "mixed": make_mixed(size, rng),
+    }
+
+
+def jmespath_expression(doc, path):
+    """Return the JMESPath expression for path, where "*" may be a list or dict."""
+    expr, node = "", doc
+    for step in path:
+        if isinstance(node, Mapping):
+            expr += ".*" if step == "*" else f'."{step}"'
+            node = next(iter(node.values())) if step == "*" else node[step]
+        else:
+            expr += "[*]" if step == "*" else f"[{step}]"
+            node = node[0] if step == "*" else node[step]
+    return expr.lstrip(".")
+
+
+def deep_collections_scenarios(doc, spec):
+    return {
+        "get": lambda: getitem_by_path(doc, spec["get"]),
+        "glob": lambda: getitem_by_path(doc, spec["glob"]),
+        "double_splat": lambda: getitem_by_path(doc, ["**", spec["key"]]),
+        "paths_to_key": lambda: list(paths_to_key(doc, spec["key"])),
+        "paths_to_value": lambda: list(paths_to_value(doc, spec["value"])),
+        "set": lambda: set_by_path(doc, spec["get"], 0),
+        "delete": lambda: del_by_path(doc, spec["delete"]),
+        "construct": lambda: DeepCollection(doc),
+    }
+
+
+def dpath_scenarios(doc, spec):
+    if dpath is None:
+        return {}
+
+    def glob(path):
+        return "/".join(map(str, path))
+
+    key, value = spec["key"], spec["value"]
+    return {
+        "get": lambda: dpath.get(doc, glob(spec["get"])),
+        "glob": lambda: dpath.values(doc, glob(spec["glob"])),
+        "double_splat": lambda: dpath.values(doc, f"**/{key}"),
+        "paths_to_key": lambda: [p for p, _ in dpath.search(doc, f"**/{key}", yielded=True)],
+        "paths_to_value": lambda: [p for p, _ in dpath.search(doc, "**", yielded=True, afilter=lambda v: v == value)],
+        "set": lambda: dpath.set(doc, glob(spec["get"]), 0),
+        "delete": lambda: dpath.delete(doc, glob(spec["delete"])),
+    }
+
+
+def jmespath_scenarios(doc, spec):
+    if jmespath is None:
+        return {}
+    get, glob = jmespath_expression(doc, spec["get"]), jmespath_expression(doc, spec["glob"])
+    return {
+        "get": lambda: jmespath.search(get, doc),
+        "glob": lambda: jmespath.search(glob, doc),
+    }
+
+
+def dotty_dict_scenarios(doc, spec):
+    if dotty is None:
+        return {}
+    dotted = dotty(doc)
+    get, delete = ".".join(map(str, spec["get"])), ".".join(map(str, spec["delete"]))
+
+    def set_():
+        dotted[get] = 0
+
+    def delete_():
+        del dotted[delete]
+
+    return {
+        "get": lambda: dotted[get],
+        "set": set_,
+        "delete": delete_,
+        "construct": lambda: dotty(doc),
+    }
+
+
+LIBRARIES = {
+    "deep_collections": deep_collections_scenarios,
+    "dpath": dpath_scenarios,
+    "jmespath": jmespath_scenarios,
+    "dotty_dict": dotty_dict_scenarios,
+}
+
+
+def timed(func, number, repeat, setup=None):
+    """Return the best mean seconds per call of func. setup runs before each call,
+    untimed.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        total = 0.0
+        for _ in range(number):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            func()
+            total += time.perf_counter() - start
+        best = min(best, total / number)
+    return best
+
+
+def run(documents, number, repeat, libraries=LIBRARIES):
+    results = {}
+    for scenario in SCENARIOS:
+        for doc_name, (doc, spec) in documents.items():
+            for lib_name, scenarios_for in libraries.items():
+                # Each gets its own copy, since some scenarios change it.
+                copy = deepcopy(doc)
+                func = scenarios_for(copy, spec).get(scenario)
+                setup = None
+                if func is not None and scenario == "delete":
+                    parent, key = getitem_by_path_strict(copy, spec["delete"][:-1]), spec["delete"][-1]
+                    original = parent[key]
+
+                    def restore(parent=parent, key=key, original=original):
+                        parent[key] = original
+
+                    setup = restore
+
+                seconds = None if func is None else timed(func, number, repeat, setup)
+                results.setdefault(scenario, {}).setdefault(doc_name, {})[lib_name] = seconds
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Return each time that's slower than its baseline by more than tolerance, as a
+    fraction, e.g. 0.25 for 25%.
+    """
+    regressions = []
+    for scenario, docs in results.items():
+        for doc_name, libs in docs.items():
+            for lib_name, seconds in libs.items():
+                before = baseline.get(scenario, {}).get(doc_name, {}).get(lib_name)
+                if seconds is None or not before:
+                    continue
+                ratio = seconds / before
+                if ratio > 1 + tolerance:
+                    regressions.append(
+                        dict(
+                            scenario=scenario,
+                            document=doc_name,
+                            library=lib_name,
+                            baseline=before,
+                            current=seconds,
+                            ratio=round(ratio, 3),
+                        )
+                    )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=1000, help="items in the wide, records and mixed documents")
+    parser.add_argument("--depth", type=int, default=50, help="nesting of the deep document")
+    parser.add_argument("--number", type=int, default=10, help="calls per round")
+    parser.add_argument("--repeat", type=int, default=3, help="rounds, of which the best is kept")
+    parser.add_argument("--library", action="append", choices=list(LIBRARIES), help="only these libraries")
+    parser.add_argument("--baseline", help="JSON output of an earlier run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="slowdown allowed before it's a regression")
+    parser.add_argument("--save-baseline", help="also write the output here")
+    args = parser.parse_args(argv)
+
+    libraries = {name: LIBRARIES[name] for name in args.library} if args.library else LIBRARIES
+    documents = make_documents(args.size, args.depth)
+    output = {
+        "config": dict(size=args.size, depth=args.depth, number=args.number, repeat=args.repeat, seed=SEED),
+        "results": run(documents, args.number, args.repeat, libraries),
+    }
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("config") != output["config"]:
+            parser.error("The baseline was run with a different config")
+        output["regressions"] = compare(output["results"], baseline["results"], args.tolerance)
+
+    print(json.dumps(output, indent=2))
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(output, f, indent=2)
+
+    return 1 if output.get("regressions") else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
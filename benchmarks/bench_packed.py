@@ -0,0 +1,69 @@
+"""Memory and query speed of deep_collections.packed next to plain dicts and lists.
+
+Memory is what tracemalloc sees allocated to build the document, against the size
+of its packed buffer. Queries are run through a DeepCollection of each.
+
+    python -m benchmarks.bench_packed --records 20000
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+from deep_collections import DeepCollection
+from deep_collections.packed import pack
+from deep_collections.packed import PackedDeepCollection
+
+
+def make_document(records):
+    return {
+        "meta": {"count": records, "source": "bench"},
+        "records": [
+            {"id": i, "name": f"n{i}", "score": i * 0.5, "tags": ["a", "b", i % 5], "owner": {"id": i % 97}}
+            for i in range(records)
+        ],
+    }
+
+
+def allocated(func):
+    tracemalloc.start()
+    rv = func()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return rv, size
+
+
+def timed(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    text = json.dumps(make_document(args.records))
+    obj, obj_bytes = allocated(lambda: json.loads(text))
+    buf = pack(obj)
+    results = {"memory": {"json_text": len(text), "objects": obj_bytes, "packed": len(buf)}}
+
+    dcs = {"dict": DeepCollection(obj), "packed": PackedDeepCollection(buf)}
+    last = args.records - 1
+    queries = {
+        "getitem": lambda dc: dc["records", last, "owner", "id"],
+        "glob": lambda dc: dc["records", "*", "owner", "id"],
+        "double_splat": lambda dc: dc["**", "owner"],
+        "paths_to_key": lambda dc: list(dc.paths_to_key("id")),
+    }
+    for name, query in queries.items():
+        results[name] = {kind: timed(lambda query=query, dc=dc: query(dc), args.repeat) for kind, dc in dcs.items()}
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Scaling benchmark for deep_collections.parallel.
+
+Times paths_to_key and paths_to_value over a generated document with 1, 2, 4 and
+8 workers, next to the serial functions.
+
+    python -m benchmarks.bench_parallel --width 2000 --depth 4
+"""
+import argparse
+import json
+import time
+
+import deep_collections
+from deep_collections import parallel
+
+
+def make_document(width, depth):
+    """A dict of `width` subtrees, each a chain of dicts and lists `depth` deep."""
+
+    def branch(i, level):
+        if level == 0:
+            return {"id": i, "value": i % 7, "name": f"n{i}"}
+        return {"level": level, "items": [branch(i, level - 1) for _ in range(3)], "name": f"l{level}"}
+
+    return {f"k{i}": branch(i, depth) for i in range(width)}
+
+
+def timed(func):
+    start = time.perf_counter()
+    rv = list(func())
+    return time.perf_counter() - start, len(rv)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--width", type=int, default=500)
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--workers", type=int, nargs="*", default=[1, 2, 4, 8])
+    args = parser.parse_args(argv)
+
+    obj = make_document(args.width, args.depth)
+    results = {}
+    for name, query in (("paths_to_key", "id"), ("paths_to_value", 3)):
+        serial = getattr(deep_collections, name)
+        para = getattr(parallel, name)
+        seconds, hits = timed(lambda serial=serial, query=query: serial(obj, query))
+        results[name] = {"serial": seconds, "hits": hits}
+        for workers in args.workers:
+            seconds, _ = timed(lambda para=para, query=query, workers=workers: para(obj, query, workers=workers))
+            results[name][f"workers_{workers}"] = seconds
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Time repeated lookups by dotted path strings against the same paths as lists.
+
+    python -m benchmarks.bench_parsing --lookups 10000
+"""
+import argparse
+import json
+import time
+
+from deep_collections import DeepCollection
+from deep_collections import parse_path
+
+
+def make_document(records):
+    return {"spec": {"containers": [{"image": f"i{i}", "env": {"name": f"n{i}"}} for i in range(records)]}}
+
+
+def timed(func, paths, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for path in paths:
+            func(path)
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=100)
+    parser.add_argument("--lookups", type=int, default=10000)
+    args = parser.parse_args(argv)
+
+    obj = make_document(args.records)
+    strs = [f"spec.containers[{i}].env.name" for i in range(args.records)]
+    lists = [list(parse_path(path)) for path in strs]
+    repeat = max(1, args.lookups // args.records)
+
+    dc = DeepCollection(obj, path_sep=".")
+    parse_path.cache_clear()
+    results = {
+        "lookups": repeat * args.records,
+        "lists": timed(dc.__getitem__, lists, repeat),
+        "strs": timed(dc.__getitem__, strs, repeat),
+        "parse_uncached": timed(parse_path.__wrapped__, strs, repeat),
+        "parse_cached": timed(parse_path, strs, repeat),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Contention benchmark for `DeepCollection(..., threadsafe=True)`.
+
+N reader threads resolve glob paths while M writer threads set values. The same
+workload is run against a plain DeepCollection guarded by one external global lock,
+and the throughput of both is reported.
+
+    python -m benchmarks.bench_threadsafe --readers 8 --writers 2 --seconds 2
+"""
+import argparse
+import json
+import threading
+import time
+
+from deep_collections import DeepCollection
+
+
+def make_document(width=50):
+    return {f"k{i}": {"name": f"n{i}", "tags": {"x": i, "y": [i, i + 1]}} for i in range(width)}
+
+
+def run(dc, readers, writers, seconds, read_lock, write_lock):
+    stop = threading.Event()
+    counts = {"reads": 0, "writes": 0}
+    count_lock = threading.Lock()
+
+    def reader():
+        n = 0
+        while not stop.is_set():
+            with read_lock():
+                dc["*", "tags", "x"]
+            n += 1
+        with count_lock:
+            counts["reads"] += n
+
+    def writer(idx):
+        n = 0
+        while not stop.is_set():
+            with write_lock():
+                dc[f"k{n % 50}", "tags", "x"] = idx
+            n += 1
+        with count_lock:
+            counts["writes"] += n
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    return {k: v / seconds for k, v in counts.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=1)
+    parser.add_argument("--seconds", type=float, default=1.0)
+    args = parser.parse_args(argv)
+
+    dc = DeepCollection(make_document(), threadsafe=True)
+    rw = run(dc, args.readers, args.writers, args.seconds, lambda: dc.batch(read_only=True), dc.batch)
+
+    global_lock = threading.Lock()
+    dc = DeepCollection(make_document())
+    glob = run(dc, args.readers, args.writers, args.seconds, lambda: global_lock, lambda: global_lock)
+
+    print(
+        json.dumps(
+            {
+                "readers": args.readers,
+                "writers": args.writers,
+                "rwlock_ops_per_sec": rw,
+                "global_lock_ops_per_sec": glob,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Time a burst of writes to a DeepCollection, with and without a transaction.
+
+The collection has a cache, and optionally a watched query, which each write
+outside of a transaction updates as it's made.
+
+    python -m benchmarks.bench_transaction --writes 10000 --watch
+"""
+import argparse
+import json
+import time
+
+from deep_collections import DeepCollection
+
+
+def make_collection(records, watch):
+    dc = DeepCollection({"items": {f"k{i}": {"v": i, "meta": {"n": i}} for i in range(records)}}, cache=True)
+    if watch:
+        dc.watch(["**", "v"])
+    return dc
+
+
+def burst(dc, writes, records):
+    for i in range(writes):
+        dc["items", f"k{i % records}", "v"] = -i
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=1000)
+    parser.add_argument("--writes", type=int, default=1000)
+    parser.add_argument("--watch", action="store_true")
+    args = parser.parse_args(argv)
+
+    dc = make_collection(args.records, args.watch)
+    start = time.perf_counter()
+    burst(dc, args.writes, args.records)
+    plain = time.perf_counter() - start
+
+    dc = make_collection(args.records, args.watch)
+    start = time.perf_counter()
+    with dc.transaction():
+        burst(dc, args.writes, args.records)
+    transaction = time.perf_counter() - start
+
+    dc = make_collection(args.records, args.watch)
+    start = time.perf_counter()
+    try:
+        with dc.transaction():
+            burst(dc, args.writes, args.records)
+            raise RuntimeError
+    except RuntimeError:
+        pass
+    rollback = time.perf_counter() - start
+
+    results = {
+        "records": args.records,
+        "writes": args.writes,
+        "watch": args.watch,
+        "writes_seconds": plain,
+        "transaction_seconds": transaction,
+        "rolled_back_seconds": rollback,
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
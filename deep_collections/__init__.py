@@ -1,8 +1,32 @@
 import operator
+import warnings
+from contextlib import contextmanager
+from contextlib import nullcontext
 from functools import reduce
 from functools import wraps
 
+from .caching import _copy
+from .caching import MISSING
+from .caching import query_key
+from .caching import QueryCache
+from .columnar import ColumnarRecords
+from .filters import Where  # noqa: F401
+from .flattening import flatten  # noqa: F401
+from .flattening import unflatten  # noqa: F401
+from .limits import _Visits
+from .limits import Limits  # noqa: F401
+from .locking import RWLock
+from .mapped import open_mapped
+from .matching import GlobMatch
+from .matching import GlobOrRegexMatch
 from .matching import match_style
+from .parsing import parse_path  # noqa: F401
+from .profiling import _active_stats
+from .profiling import profile  # noqa: F401
+from .traversal import lookup_by_path
+from .traversal import SEQUENCE
+from .traversal import strategy_for
+from .traversal import strategy_of
 from .utils import pathlike
 
 
@@ -15,7 +39,96 @@ def del_by_path(obj, path, **kwargs):
     >>> obj
     {'a': [{'c': 'd'}]}
     """
-    del getitem_by_path(obj, path[:-1], **kwargs)[path[-1]]
+    transaction = _transaction_of(obj)
+    if len(path) > 1 or transaction is not None:
+        root = _unwrapped(obj)
+        parent = _branch(root, path[:-1], **kwargs)
+    else:
+        parent = obj
+
+    if transaction is not None:
+        transaction.delete(parent, path[-1], obj if parent is root else None)
+    else:
+        del parent[path[-1]]
+    # A DeepCollection updates itself when deleted from directly.
+    if parent is not obj:
+        # Deleting from a sequence moves the items after it, so all of it changed.
+        strategy = strategy_for(type(parent))
+        _changed(obj, path if strategy is not None and strategy.mapping else path[:-1])
+
+
+def _invalidate_cache(obj):
+    """Drop the cached query results of obj, if it's a DeepCollection with a cache."""
+    cache = getattr(obj, "_cache", None)
+    if cache is not None:
+        cache.invalidate()
+
+
+def _unwrapped(obj):
+    """Return the object a DeepCollection wraps, so what's in it can be changed without
+    spawning a DeepCollection for each step.
+    """
+    return obj._obj if isinstance(obj, DeepCollection) else obj
+
+
+def _branch(obj, path, *args, **kwargs):
+    """Return getitem_by_path(obj, path), to change what's in it. A path without
+    patterns can only match its own keys, so it's looked up directly.
+    """
+    if _patterned(path, *args, **kwargs):
+        return getitem_by_path(obj, path, *args, **kwargs)
+    return getitem_by_path_strict(obj, path)
+
+
+def _transaction_of(obj):
+    """Return the open Transaction obj is in, if it's a DeepCollection in one. See
+    deep_collections.transactions.
+    """
+    transaction = getattr(obj, "_transaction", None)
+    return transaction if transaction is not None and transaction.open else None
+
+
+def _changed(obj, path):
+    """Update what depends on obj, if it's a DeepCollection, after a change at path in
+    it: its cache, its journal, and the queries it's watching. See
+    deep_collections.journal and deep_collections.live. In a transaction, that's left
+    until it's committed.
+    """
+    transaction = _transaction_of(obj)
+    if transaction is not None:
+        transaction.changed.append((obj, list(path)))
+        return
+    _invalidate_cache(obj)
+    journal = getattr(obj, "_journal", None)
+    if journal is not None:
+        journal._record(obj, path)
+    watches = getattr(obj, "_watches", None)
+    if watches is not None:
+        # A DeepCollection spawned from the watched one doesn't know where it is.
+        watches.changed(list(path) if obj is watches.dc else None)
+
+
+def _changed_paths(old, new):
+    """Return the paths of the items of container new that aren't those of old, or
+    [[]] if that can't be told item by item.
+    """
+    strategy = strategy_for(type(new))
+    if strategy is None:
+        return [[]]
+    if strategy.mapping:
+        return [[k] for k in old if k not in new or new[k] is not old[k]] + [[k] for k in new if k not in old]
+    if len(old) != len(new):
+        return [[]]
+    return [[i] for i, (a, b) in enumerate(zip(old, new)) if a is not b]
+
+
+def _patterned(path, *args, match_with="glob", recursive_match_all=True, **kwargs):
+    """Return True if any part of path is a pattern, so it may match many items."""
+    steps = path if pathlike(path) else [path]
+    style = match_style(match_with)
+    return any(
+        isinstance(p, Where) or style.patterned(p, *args, **kwargs) or recursive_match_all and p == "**" for p in steps
+    )
 
 
 def getitem_by_path_strict(obj, path):
@@ -29,7 +142,16 @@ def getitem_by_path_strict(obj, path):
     >>> getitem_by_path(obj, ["a", 1, "c"])
     'd'
     """
-    return reduce(operator.getitem, path, obj)
+    stats = _active_stats.get()
+    try:
+        if stats is not None:
+            stats.paths_materialized += 1
+            return stats.timed("strict_lookup", reduce, operator.getitem, path, obj)
+        return reduce(operator.getitem, path, obj)
+    except TypeError:
+        # Maybe a step is a type registered with deep_collections.traversal that
+        # isn't subscriptable. Otherwise, this raises the same error again.
+        return lookup_by_path(obj, path)
 
 
 def get_by_path_strict(obj, path, default=None):
@@ -56,6 +178,20 @@ def get_by_path_strict(obj, path, default=None):
         return default
 
 
+def _profiled(stage, paths):
+    """Return paths, recorded as stage if profiling. See deep_collections.profiling."""
+    stats = _active_stats.get()
+    if stats is None:
+        return paths
+    return stats.timed_paths(stage, paths)
+
+
+def _lookup_for(obj):
+    """Return the function to look up the children of obj by key with."""
+    strategy = strategy_for(type(obj))
+    return operator.getitem if strategy is None else strategy.lookup
+
+
 def _simplify_double_splats(path):
     """Return an equivalent path, removing any unnecessary double splats."""
     # remove ending "**"
@@ -76,63 +212,58 @@ def _simplify_double_splats(path):
     return path
 
 
-def _resolve_double_splat(obj, path, *args, **kwargs):
+def _resolve_double_splat(obj, path, *args, limits=None, **kwargs):
     # '**' can match any a path fragment of any length, including 0.
     double_splat_idx = path.index("**") + 1
 
     path_start = path[: double_splat_idx - 1]
     path_end = path[double_splat_idx:]
 
+    # Objects shared by the searches from each start are searched once, with cycles.
+    visits = _Visits(limits) if limits is not None and limits.cycles else None
+
+    # Yield as paths are found, rather than listing them first, so that callers that
+    # only need the first few, like first_by_path, can stop the search early.
     if path_start:
-        paths = list(
-            resolve_path(
-                obj,
-                path_start,
-                *args,
-                **kwargs,
-            )
-        )
-        for p in paths:
-            path_ends = list(
-                # Use strict because the `paths` were just resolved
-                paths_to_key(
-                    getitem_by_path_strict(obj, p),
-                    path_end,
-                    *args,
-                    **kwargs,
-                )
+        for p in resolve_path(obj, path_start, *args, **kwargs):
+            # Use strict because p was just resolved. Searching from p keeps depths,
+            # as for limits, counted from obj.
+            yield from paths_to_key(
+                getitem_by_path_strict(obj, p), path_end, *args, limits=limits, _current=p, _visits=visits, **kwargs
             )
-            for end in path_ends:
-                yield p + end
     else:  # path started with "**"
-        path_ends = list(
-            paths_to_key(
-                obj,
-                path_end,
-                *args,
-                **kwargs,
-            )
-        )
-        yield from path_ends
+        yield from paths_to_key(obj, path_end, *args, limits=limits, _visits=visits, **kwargs)
+
+
+def resolve_path(obj, path, *args, match_with="glob", recursive_match_all=True, limits=None, **kwargs):
+    """Yield all paths that match the given globbed path. limits, a
+    deep_collections.limits.Limits, bounds the search for any "**".
+    """
+    paths = _resolve_path(
+        obj, path, *args, match_with=match_with, recursive_match_all=recursive_match_all, limits=limits, **kwargs
+    )
+    return _profiled("resolve", paths)
 
 
-def resolve_path(obj, path, *args, match_with="glob", recursive_match_all=True, **kwargs):
-    """Yield all paths that match the given globbed path."""
+def _resolve_path(obj, path, *args, match_with="glob", recursive_match_all=True, limits=None, **kwargs):
     if recursive_match_all and "**" in path:
         path = _simplify_double_splats(path)
 
     if recursive_match_all and "**" in path:
-        yield from _resolve_double_splat(obj, path, *args, match_with=match_with, **kwargs)
+        yield from _profiled(
+            "double_splat", _resolve_double_splat(obj, path, *args, match_with=match_with, limits=limits, **kwargs)
+        )
     elif path:
         first_step = path[0]
         path_remainder = path[1:]
 
         keys = matched_keys(obj, first_step, *args, match_with=match_with, **kwargs)
 
-        if path_remainder:
+        if path_remainder and keys:
+            lookup = _lookup_for(obj)
             for key in keys:
-                sub_obj = obj[key]
-                sub_keys = matched_keys(sub_obj, path_remainder[0], match_with, **kwargs)
+                sub_obj = lookup(obj, key)
+                sub_keys = matched_keys(sub_obj, path_remainder[0], *args, match_with=match_with, **kwargs)
                 if sub_keys:
                     yield_values = (
                         [key] + sub_key
@@ -142,6 +273,7 @@ def resolve_path(obj, path, *args, match_with="glob", recursive_match_all=True,
                             *args,
                             match_with=match_with,
                             recursive_match_all=recursive_match_all,
+                            limits=limits,
                             **kwargs,
                         )
                     )
@@ -150,6 +282,62 @@ def resolve_path(obj, path, *args, match_with="glob", recursive_match_all=True,
             yield from ([key] for key in keys)
 
 
+def _resolve_items(
+    obj, path, *args, match_with="glob", recursive_match_all=True, limits=None, paths=True, values=True, **kwargs
+):
+    """Yield (path, value) for each path that matches the given globbed path, as
+    resolve_path does, but taking values along the way rather than looking each up
+    again from obj. With paths or values False, None is yielded in their place, to
+    save building paths or looking up values that aren't needed.
+
+    >>> list(_resolve_items({"a": {"x": 1, "y": 2}}, ["a", "*"]))
+    [(['a', 'x'], 1), (['a', 'y'], 2)]
+    >>> list(_resolve_items({"a": {"x": 1, "y": 2}}, ["a", "*"], paths=False))
+    [(None, 1), (None, 2)]
+    """
+    if recursive_match_all and "**" in path:
+        path = _simplify_double_splats(path)
+
+    if recursive_match_all and "**" in path:
+        paths_found = _resolve_double_splat(obj, path, *args, match_with=match_with, limits=limits, **kwargs)
+        for p in _profiled("double_splat", paths_found):
+            yield p, (getitem_by_path_strict(obj, p) if values else None)
+        return
+    elif not path:
+        return
+
+    keys = matched_keys(obj, path[0], *args, match_with=match_with, **kwargs)
+    if not keys:
+        return
+    lookup = _lookup_for(obj)
+    path_remainder = path[1:]
+    if not path_remainder:
+        for key in keys:
+            yield ([key] if paths else None), (lookup(obj, key) if values else None)
+        return
+
+    flags = dict(
+        match_with=match_with, recursive_match_all=recursive_match_all, limits=limits, paths=paths, values=values
+    )
+    if isinstance(obj, ColumnarRecords) and not isinstance(path_remainder[0], Where):
+        # Every record has the same keys, so match them once, and read by column.
+        fields = matched_keys(dict.fromkeys(obj.schema), path_remainder[0], *args, match_with=match_with, **kwargs)
+        columns = [(field, obj.columns[field]) for field in fields]
+        path_remainder = path_remainder[1:]
+        for key in keys:
+            for field, column in columns:
+                if path_remainder:
+                    for sub_path, value in _resolve_items(column[key], path_remainder, *args, **flags, **kwargs):
+                        yield ([key, field] + sub_path if paths else None), value
+                else:
+                    yield ([key, field] if paths else None), (column[key] if values else None)
+        return
+
+    for key in keys:
+        for sub_path, value in _resolve_items(lookup(obj, key), path_remainder, *args, **flags, **kwargs):
+            yield ([key] + sub_path if paths else None), value
+
+
 def matched_keys(obj, pattern, *args, match_with="glob", **kwargs):
     """
     >>> matched_keys(1, '0')
@@ -169,50 +357,230 @@ def matched_keys(obj, pattern, *args, match_with="glob", **kwargs):
     """
     rv = []
     match_func = match_style(match_with).match
+    stats = _active_stats.get()
+    if stats is not None:
+        if not stats.timing("matched_keys"):
+            return stats.timed("matched_keys", matched_keys, obj, pattern, *args, match_with=match_with, **kwargs)
+        match_func = stats.counted(match_with)
+
+    strategy = strategy_of(obj)
+    if strategy is None:
+        # Leaves aren't searched, but an explicit path may still index into one,
+        # like a str, if it's iterable.
+        try:
+            iter(obj)
+        except TypeError:
+            return rv
+        strategy = SEQUENCE
+    keys = strategy.keys(obj)
+
+    if stats is not None:
+        stats.nodes_visited += 1
+        stats.keys_tested += len(keys)
+
+    if isinstance(pattern, Where):
+        # A filter, which matches keys by testing their children.
+        if stats is not None:
+            stats.matcher_calls["Where"] += len(keys)
+        return pattern.select(obj, keys, strategy.lookup)
+
+    if pattern == "*" and match_style(match_with) in (GlobMatch, GlobOrRegexMatch):
+        # Everything matches, so there's no need to match each key.
+        return list(keys)
+
+    for key in keys:
+        if match_func(key, pattern, *args, **kwargs):
+            rv.append(key)
+    return rv
 
-    try:
-        iter(obj)
-    except TypeError:
-        return rv
 
-    try:
-        for key in obj.keys():
-            if match_func(key, pattern, *args, **kwargs):
-                rv.append(key)
-    except AttributeError:
-        for idx in range(len(obj)):
-            if match_func(idx, pattern, *args, **kwargs):
-                rv.append(idx)
-    return rv
+def getitem_by_path(obj, path, *args, match_with="glob", strict=False, as_array=False, limits=None, **kwargs):
+    if as_array:  # See deep_collections.arrays. NumPy is optional, so import it lazily.
+        from .arrays import get_array
 
+        return get_array(obj, path, *args, match_with=match_with, strict=strict, limits=limits, **kwargs)
 
-def getitem_by_path(obj, path, *args, match_with="glob", strict=False, **kwargs):
     if strict:
+        if not pathlike(path):  # e.g. str or int, which must not be iterated as a path
+            return obj[path]
         return getitem_by_path_strict(obj, path)
 
     if not pathlike(path):  # e.g. str or int
-        if not match_style(match_with).patterned(path, *args, **kwargs):
+        if not isinstance(path, Where) and not match_style(match_with).patterned(path, *args, **kwargs):
             return obj[path]
         path = [path]
 
-    paths = list(resolve_path(obj, path, *args, match_with=match_with, **kwargs))
+    items = list(_profiled("resolve", _resolve_items(obj, path, *args, match_with=match_with, limits=limits, **kwargs)))
+    return _getitem_from_items(obj, path, items, *args, match_with=match_with, **kwargs)
+
 
-    if len(paths) > 1:
-        return [getitem_by_path_strict(obj, p) for p in paths]
-    elif len(paths) == 1:
-        return getitem_by_path_strict(obj, paths[0])
+def _getitem_from_resolved(obj, path, paths, *args, match_with="glob", **kwargs):
+    """Return the result of getitem_by_path(obj, path), given the paths it resolved to."""
+    items = [(p, getitem_by_path_strict(obj, p)) for p in paths]
+    return _getitem_from_items(obj, path, items, *args, match_with=match_with, **kwargs)
+
+
+def _getitem_from_items(obj, path, items, *args, match_with="glob", **kwargs):
+    """Return the result of getitem_by_path(obj, path), given the (path, value) pairs
+    it resolved to.
+    """
+    if len(items) > 1:
+        return [value for _, value in items]
+    elif len(items) == 1:
+        return items[0][1]
 
     # len(paths) == 0
     # Check if any part of the path appears to use a pattern. If so, return an empty
     # list, rather than a KeyError/IndexError because since a pattern was given, we
     # are expecting a list of search results, which can be empty, rather than a
     # strict retrieval.
-    if any(match_style(match_with).patterned(p, *args, **kwargs) for p in path):
+    if any(isinstance(p, Where) or match_style(match_with).patterned(p, *args, **kwargs) for p in path):
         return []
 
     return getitem_by_path_strict(obj, path)
 
 
+def _matches(obj, path, *args, strict=False, paths=True, values=True, **kwargs):
+    """Yield (path, value) lazily for each match of path, as _resolve_items does. A
+    strict path, which can only match once, is looked up directly.
+    """
+    if strict:
+        try:
+            value = getitem_by_path_strict(obj, path) if pathlike(path) else obj[path]
+        except (KeyError, IndexError, TypeError):
+            return
+        yield path, value
+        return
+
+    # _resolve_items may change path, so copy it. A str or int is a path of one step.
+    path = list(path) if pathlike(path) else [path]
+    yield from _profiled("resolve", _resolve_items(obj, path, *args, paths=paths, values=values, **kwargs))
+
+
+def first_by_path(obj, path, *args, default=None, match_with="glob", recursive_match_all=True, strict=False, **kwargs):
+    """Return the value at the first match of path, in the order getitem_by_path would
+    list them, or default if nothing matches. The search stops at the first match.
+
+    >>> first_by_path({"a": [{"b": 1}, {"b": 2}]}, ["a", "*", "b"])
+    1
+    >>> first_by_path({"a": [{"b": 1}]}, ["a", "*", "c"], default="missing")
+    'missing'
+    """
+    for _, value in _matches(
+        obj,
+        path,
+        *args,
+        match_with=match_with,
+        recursive_match_all=recursive_match_all,
+        strict=strict,
+        paths=False,
+        **kwargs,
+    ):
+        return value
+    return default
+
+
+def exists_by_path(obj, path, *args, match_with="glob", recursive_match_all=True, strict=False, **kwargs):
+    """Return True if anything matches path. The search stops at the first match.
+
+    >>> exists_by_path({"a": {"b": {"error": 1}}}, ["**", "error"])
+    True
+    >>> exists_by_path({"a": {"b": 1}}, ["a", "c"])
+    False
+    """
+    for _ in _matches(
+        obj,
+        path,
+        *args,
+        match_with=match_with,
+        recursive_match_all=recursive_match_all,
+        strict=strict,
+        paths=False,
+        values=False,
+        **kwargs,
+    ):
+        return True
+    return False
+
+
+def count_by_path(obj, path, *args, match_with="glob", recursive_match_all=True, strict=False, **kwargs):
+    """Return the number of matches of path, without building the list of them, or
+    looking up their values.
+
+    >>> count_by_path({"a": [{"b": 1}, {"b": 2}, {"c": 3}]}, ["a", "*", "b"])
+    2
+    """
+    return sum(
+        1
+        for _ in _matches(
+            obj,
+            path,
+            *args,
+            match_with=match_with,
+            recursive_match_all=recursive_match_all,
+            strict=strict,
+            paths=False,
+            values=False,
+            **kwargs,
+        )
+    )
+
+
+def _field_getter(path, default, *args, match_with="glob", recursive_match_all=True, **kwargs):
+    """Return a function that gets the value at path in an object, or default."""
+    settings = dict(match_with=match_with, recursive_match_all=recursive_match_all)
+    steps = list(path) if pathlike(path) else [path]
+    if _patterned(steps, *args, **settings, **kwargs):
+
+        def get(obj):
+            try:
+                items = list(_matches(obj, steps, *args, **settings, **kwargs))
+            except (KeyError, IndexError, TypeError):
+                return default
+            if not items:
+                return default
+            return _getitem_from_items(obj, steps, items, *args, **settings, **kwargs)
+
+    else:
+
+        def get(obj):
+            try:
+                return getitem_by_path_strict(obj, steps)
+            except (KeyError, IndexError, TypeError, AttributeError):
+                return default
+
+    return get
+
+
+def project(
+    obj, path, fields, *args, default=None, match_with="glob", recursive_match_all=True, strict=False, **kwargs
+):
+    """Return a row for each match of path, holding the values at each of fields in
+    it. path is resolved once, and the fields are read from each match as it's found.
+
+    fields is a dict of names to paths, for rows that are dicts, or a list of paths,
+    for rows that are tuples. A field that isn't in a match is default. Field paths
+    may have patterns, and then give what getitem_by_path would, or default if they
+    match nothing.
+
+    >>> obj = {"items": [{"id": 1, "meta": {"owner": "a"}}, {"id": 2, "meta": {}}]}
+    >>> project(obj, ["items", "*"], {"id": "id", "owner": ["meta", "owner"]})
+    [{'id': 1, 'owner': 'a'}, {'id': 2, 'owner': None}]
+    >>> project(obj, ["items", "*"], ["id", ["meta", "*"]])
+    [(1, 'a'), (2, None)]
+    """
+    settings = dict(match_with=match_with, recursive_match_all=recursive_match_all)
+    names = list(fields) if isinstance(fields, dict) else None
+    paths = [fields[name] for name in names] if names is not None else list(fields)
+    getters = [_field_getter(p, default, *args, **settings, **kwargs) for p in paths]
+
+    rows = []
+    for _, match in _matches(obj, path, *args, strict=strict, paths=False, **settings, **kwargs):
+        values = tuple(get(match) for get in getters)
+        rows.append(dict(zip(names, values)) if names is not None else values)
+    return rows
+
+
 def set_by_path(obj, path, value, *args, **kwargs):
     """Set a value in a nested object in obj by iterable path.
 
@@ -234,88 +602,135 @@ def set_by_path(obj, path, value, *args, **kwargs):
     # needed for later equality checks. In general paths don't need to be lists.
     path = list(path)
 
+    transaction = _transaction_of(obj)
+    root = _unwrapped(obj)
+    # In a transaction, change what obj wraps directly, so it can be undone.
+    branch = obj if transaction is None else root
+
+    def assign(value):
+        if transaction is None:
+            branch[part] = value
+        else:
+            transaction.set(branch, part, value, obj if branch is root else None)
+
     traversed = []
+    # The length of the path to the first dict made along the way, if any.
+    created = None
     for part in path:
-        branch = getitem_by_path(
-            obj,
-            traversed,
-            *args,
-            **kwargs,
-        )
+        if traversed:
+            branch = _branch(
+                root,
+                traversed,
+                *args,
+                **kwargs,
+            )
         traversed.append(part)
 
         try:
             branch[part]
         except (IndexError, KeyError):
-            branch[part] = {}
+            assign({})
+            if created is None:
+                created = len(traversed)
 
         if traversed == path:
-            branch[part] = value
-
-
-def _paths_to_pathlike_key(obj, key, *args, match_with, _current, **kwargs):
-    if len(key) > 1:
-        resolved_paths = list(resolve_path(obj, key, *args, match_with=match_with, **kwargs))
-        if resolved_paths:
-            for path in resolved_paths:
-                yield _current + path
-        else:
-            try:
-                for k, v in obj.items():
-                    if pathlike(v):
-                        yield from paths_to_key(
-                            v,
-                            key,
-                            *args,
-                            match_with=match_with,
-                            _current=_current + [k],
-                            **kwargs,
-                        )
-            except AttributeError:
-                for idx, i in enumerate(obj):
-                    if pathlike(i):
-                        yield from paths_to_key(
-                            i,
-                            key,
-                            *args,
-                            match_with=match_with,
-                            _current=_current + [idx],
-                            **kwargs,
-                        )
-    else:
-        yield from paths_to_key(
-            obj,
-            next(iter(key)),
-            *args,
-            match_with=match_with,
-            _current=_current,
-            **kwargs,
-        )
+            assign(value)
+
+    # A DeepCollection updates itself when set directly. Otherwise everything from
+    # the first dict made changed, not just what's at path.
+    if branch is not obj:
+        _changed(obj, path if created is None else path[:created])
+
+
+def _paths_to_pathlike_key(obj, key, *args, match_with, limits, _current, _visits, **kwargs):
+    resolved = False
+    for path in resolve_path(obj, key, *args, match_with=match_with, **kwargs):
+        path = _current + path
+        if limits is None or limits.reports(path):
+            resolved = True
+            yield path
+    if not resolved:
+        for k, v in strategy_for(type(obj)).items(obj):
+            if pathlike(v) and (limits is None or limits.descends(_current + [k], v)):
+                yield from paths_to_key(
+                    v,
+                    key,
+                    *args,
+                    match_with=match_with,
+                    limits=limits,
+                    _current=_current + [k],
+                    _visits=_visits,
+                    **kwargs,
+                )
 
 
-def _paths_to_simple_key(obj, key, *args, match_with, _current, **kwargs):
+def _paths_to_simple_key(obj, key, *args, match_with, limits, _current, _visits, **kwargs):
     match_func = match_style(match_with).match
-    try:
-        for k, v in obj.items():
-            if pathlike(v):
-                yield from paths_to_key(v, key, *args, match_with=match_with, _current=_current + [k], **kwargs)
-            if match_func(k, key):
+    stats = _active_stats.get()
+    if stats is not None:
+        match_func = stats.counted(match_with)
+    strategy = strategy_for(type(obj))
+    if strategy.mapping:
+        for k, v in strategy.items(obj):
+            if pathlike(v) and (limits is None or limits.descends(_current + [k], v)):
+                yield from paths_to_key(
+                    v,
+                    key,
+                    *args,
+                    match_with=match_with,
+                    limits=limits,
+                    _current=_current + [k],
+                    _visits=_visits,
+                    **kwargs,
+                )
+            if match_func(k, key) and (limits is None or limits.reports(_current + [k])):
                 yield _current + [k]
-    except AttributeError:  # no .items
-        for idx, v in enumerate(obj):
+    else:  # a sequence
+        for idx, v in strategy.items(obj):
             if pathlike(v):
-                yield from paths_to_key(v, key, *args, match_with=match_with, _current=_current + [idx], **kwargs)
-            elif match_func(idx, key):
+                if limits is None or limits.descends(_current + [idx], v):
+                    yield from paths_to_key(
+                        v,
+                        key,
+                        *args,
+                        match_with=match_with,
+                        limits=limits,
+                        _current=_current + [idx],
+                        _visits=_visits,
+                        **kwargs,
+                    )
+            elif match_func(idx, key) and (limits is None or limits.reports(_current + [idx])):
                 yield _current + [idx]
 
 
+def _paths_to_filtered_key(obj, key, *args, match_with, limits, _current, _visits, **kwargs):
+    # key is a Where, which tests children rather than keys, so any child may pass,
+    # even in a sequence.
+    for k, v in strategy_for(type(obj)).items(obj):
+        if pathlike(v) and (limits is None or limits.descends(_current + [k], v)):
+            yield from paths_to_key(
+                v,
+                key,
+                *args,
+                match_with=match_with,
+                limits=limits,
+                _current=_current + [k],
+                _visits=_visits,
+                **kwargs,
+            )
+        if key(v) and (limits is None or limits.reports(_current + [k])):
+            yield _current + [k]
+
+
 def paths_to_key(
     obj,
     key,
     *args,
     match_with="glob",
     recursive_match_all=True,
+    limits=None,
     _current=None,
+    _visits=None,
     **kwargs,
 ):
     """Return the path to a specified key in an object.
@@ -344,62 +759,156 @@ def paths_to_key(
     [['x', 'y']]
     >>> list(paths_to_key({"x": 0}, ["y"]))
     []
+
+    limits, a deep_collections.limits.Limits, bounds how deep the search goes, and
+    what it descends into.
     """
     if not pathlike(obj):
         raise TypeError(f"First argument must be able to be deep, not type '{type(obj)}'")
 
     if _current is None:
         _current = []
+    if limits is not None and limits.cycles and _visits is None:
+        _visits = _Visits(limits)
 
-    if pathlike(key):
-        yield from _paths_to_pathlike_key(
+    pathlike_key = pathlike(key)
+    if pathlike_key and len(key) == 1:
+        key = next(iter(key))
+        pathlike_key = pathlike(key)
+
+    if isinstance(key, Where):
+        paths = _paths_to_filtered_key(
+            obj,
+            key,
+            *args,
+            match_with=match_with,
+            limits=limits,
+            _current=_current,
+            _visits=_visits,
+            recursive_match_all=recursive_match_all,
+            **kwargs,
+        )
+    elif pathlike_key:
+        paths = _paths_to_pathlike_key(
             obj,
             key,
             *args,
             match_with=match_with,
+            limits=limits,
             _current=_current,
+            _visits=_visits,
             recursive_match_all=recursive_match_all,
             **kwargs,
         )
     else:  # key is simple; str, int, float, etc.
-        yield from _paths_to_simple_key(
+        paths = _paths_to_simple_key(
             obj,
             key,
             *args,
             match_with=match_with,
+            limits=limits,
             _current=_current,
+            _visits=_visits,
             recursive_match_all=recursive_match_all,
             **kwargs,
         )
 
+    if _visits is not None:
+        paths = _visits.search(obj, _current, paths)
+
+    stats = _active_stats.get()
+    if stats is not None:
+        stats.nodes_visited += 1
+        paths = stats.timed_paths("paths_to_key", paths)
+    yield from paths
 
-def _paths_to_pathlike_value(obj, value, *args, match_with, _current, **kwargs):
+
+def _paths_to_pathlike_value(obj, value, *args, match_with, limits, _current, _visits, **kwargs):
     # Don't test non-pathlike obj elements since they can't match a pathlike value.
     # Being pathlike is a proxy test for being deep. If something isn't pathlike, it can't be deep.
-    try:
-        for k, v in obj.items():
-            if pathlike(v):
-                yield from paths_to_value(v, value, *args, match_with=match_with, _current=_current + [k], **kwargs)
-    except AttributeError:
-        for idx, i in enumerate(obj):
-            if pathlike(i):
-                yield from paths_to_value(i, value, *args, match_with=match_with, _current=_current + [idx], **kwargs)
+    match_func = match_style(match_with).match
+    stats = _active_stats.get()
+    if stats is not None:
+        match_func = stats.counted(match_with)
+
+    # A child that limits keep the search out of may still be the value itself.
+    strategy = strategy_for(type(obj))
+    if strategy.mapping:
+        for k, v in strategy.items(obj):
+            if not pathlike(v):
+                continue
+            if limits is None or limits.descends(_current + [k], v):
+                yield from paths_to_value(
+                    v,
+                    value,
+                    *args,
+                    match_with=match_with,
+                    limits=limits,
+                    _current=_current + [k],
+                    _visits=_visits,
+                    **kwargs,
+                )
+            elif limits.reports(_current + [k]) and match_func(v, value, *args, **kwargs):
+                yield _current + [k]
+    else:  # a sequence
+        for idx, i in strategy.items(obj):
+            if not pathlike(i):
+                continue
+            if limits is None or limits.descends(_current + [idx], i):
+                yield from paths_to_value(
+                    i,
+                    value,
+                    *args,
+                    match_with=match_with,
+                    limits=limits,
+                    _current=_current + [idx],
+                    _visits=_visits,
+                    **kwargs,
+                )
+            elif limits.reports(_current + [idx]) and match_func(i, value, *args, **kwargs):
+                yield _current + [idx]
 
 
-def _paths_to_simple_value(obj, value, *args, match_with, _current, **kwargs):
+def _paths_to_simple_value(obj, value, *args, match_with, limits, _current, _visits, **kwargs):
     match_func = match_style(match_with).match
-
-    try:
-        for k, v in obj.items():
-            if pathlike(v):
-                yield from paths_to_value(v, value, *args, match_with=match_with, _current=_current + [k], **kwargs)
-            if match_func(v, value, *args, **kwargs):
+    stats = _active_stats.get()
+    if stats is not None:
+        match_func = stats.counted(match_with)
+
+    strategy = strategy_for(type(obj))
+    if strategy.mapping:
+        for k, v in strategy.items(obj):
+            if pathlike(v) and (limits is None or limits.descends(_current + [k], v)):
+                yield from paths_to_value(
+                    v,
+                    value,
+                    *args,
+                    match_with=match_with,
+                    limits=limits,
+                    _current=_current + [k],
+                    _visits=_visits,
+                    **kwargs,
+                )
+            if match_func(v, value, *args, **kwargs) and (limits is None or limits.reports(_current + [k])):
                 yield _current + [k]
-    except AttributeError:  # no .items
-        for idx, i in enumerate(obj):
+    else:  # a sequence
+        for idx, i in strategy.items(obj):
             if pathlike(i):
-                yield from paths_to_value(i, value, *args, match_with=match_with, _current=_current + [idx], **kwargs)
-            elif match_func(i, value, *args, **kwargs):
+                if limits is None or limits.descends(_current + [idx], i):
+                    yield from paths_to_value(
+                        i,
+                        value,
+                        *args,
+                        match_with=match_with,
+                        limits=limits,
+                        _current=_current + [idx],
+                        _visits=_visits,
+                        **kwargs,
+                    )
+                # As in _paths_to_pathlike_value, an unsearched child may be the value.
+                elif limits.reports(_current + [idx]) and match_func(i, value, *args, **kwargs):
+                    yield _current + [idx]
+            elif match_func(i, value, *args, **kwargs) and (limits is None or limits.reports(_current + [idx])):
                 yield _current + [idx]
 
 
@@ -409,7 +918,9 @@ def paths_to_value(
     *args,
     match_with="glob",
     recursive_match_all=True,
+    limits=None,
     _current=None,
+    _visits=None,
     **kwargs,
 ):
     """Return the path to a specified value in an object.
@@ -421,42 +932,64 @@ def paths_to_value(
     [['x']]
     >>> list(paths_to_value(["value"], "value"))
     [[0]]
+
+    limits, a deep_collections.limits.Limits, bounds how deep the search goes, and
+    what it descends into.
     """
     if not pathlike(obj):
         raise TypeError(f"First argument must be able to be deep, not type '{type(obj)}'")
 
     match_func = match_style(match_with).match
+    stats = _active_stats.get()
+    if stats is not None:
+        match_func = stats.counted(match_with)
 
     if _current is None:
         _current = []
+    if limits is not None and limits.cycles and _visits is None:
+        _visits = _Visits(limits)
 
-    if match_func(obj, value, *args, **kwargs):
-        yield _current
+    if match_func(obj, value, *args, **kwargs) and (limits is None or limits.reports(_current)):
+        paths = iter([_current])
     # if no match, recurse
     elif pathlike(value):  # e.g. list, dict. Can be another path
-        yield from _paths_to_pathlike_value(
+        paths = _paths_to_pathlike_value(
             obj,
             value,
             *args,
             match_with=match_with,
+            limits=limits,
             _current=_current,
+            _visits=_visits,
             recursive_match_all=recursive_match_all,
             **kwargs,
         )
     else:  # value is simple; str, int, float, etc.
-        yield from _paths_to_simple_value(
+        paths = _paths_to_simple_value(
             obj,
             value,
             *args,
             match_with=match_with,
+            limits=limits,
             _current=_current,
+            _visits=_visits,
             recursive_match_all=recursive_match_all,
             **kwargs,
         )
 
+    if _visits is not None:
+        paths = _visits.search(obj, _current, paths)
 
-def values_for_key(obj, key, *args, match_with="glob", recursive_match_all=True, **kwargs):
-    """Generate all values for a given key.
+    stats = _active_stats.get()
+    if stats is not None:
+        stats.nodes_visited += 1
+        paths = stats.timed_paths("paths_to_value", paths)
+    yield from paths
+
+
+def values_for_key(obj, key, *args, match_with="glob", recursive_match_all=True, limits=None, **kwargs):
+    """Generate all values for a given key. limits bounds the search, as for
+    paths_to_key.
 
     >>> list(values_for_key([{"x": {"y": "value", "z": {"y": "value"}}, "y": {1: 2}}], "y"))
     ['value', 'value', {1: 2}]
@@ -467,6 +1000,7 @@ def values_for_key(obj, key, *args, match_with="glob", recursive_match_all=True,
         *args,
         match_with=match_with,
         recursive_match_all=recursive_match_all,
+        limits=limits,
         **kwargs,
     ):
         yield getitem_by_path(
@@ -495,6 +1029,11 @@ def deduped_items(items):
         return [i for n, i in enumerate(items) if i not in items[n + 1 :]]  # noqa: E203
 
 
+def _rebuild_deep_collection(cls, obj, settings):
+    """Unpickle a DeepCollection. See DeepCollection.__reduce__."""
+    return cls(obj, **settings)
+
+
 class DynamicSubclasser(type):
     """Return an instance of the class that uses this as its metaclass.
     This metaclass allows for a class to be instantiated with an argument,
@@ -509,8 +1048,15 @@ class DynamicSubclasser(type):
     >>> foo = Foo()
     >>> foo == {}
     True
+    >>> type(Foo([6])) is type(foo)
+    False
+    >>> type(Foo([6])) is type(Foo([7]))
+    True
     """
 
+    # Generated classes, by (cls, dynamic parent class)
+    _subclasses = {}
+
     def __call__(cls, *args, **kwargs):
         if args:
             obj = args[0]
@@ -518,6 +1064,9 @@ class DynamicSubclasser(type):
         else:
             obj = {}
 
+        if hasattr(cls, "_coerce"):
+            obj = cls._coerce(obj)
+
         # If a DC is given, we must use the original type as the parent_cls. We don't
         # want or need to nest DC types, and we if we don't flattten the inheritence
         # we get a metaclass conflict can't produce a consistent method resolution.
@@ -526,6 +1075,28 @@ class DynamicSubclasser(type):
         else:
             dynamic_parent_cls = type(obj)
 
+        new_cls = cls._subclass_for(dynamic_parent_cls)
+
+        # Create the instance and initialize it with the given object.
+        # Sets obj in instance for immutables like tuple
+        # instance = new_cls.__new__(new_cls, obj, *args, **kwargs)
+        instance = new_cls.__new__(new_cls, obj, *args, **kwargs)
+        # Sets obj in instance for mutables like list
+        instance.__init__(obj, *args, **kwargs)
+
+        return instance
+
+    def _subclass_for(cls, dynamic_parent_cls):
+        """Return the class that inherits from both cls and dynamic_parent_cls,
+        making it the first time it's needed. Reusing the class keeps instantiation
+        cheap and gives instances a stable type.
+        """
+        key = (cls, dynamic_parent_cls)
+        try:
+            return DynamicSubclasser._subclasses[key]
+        except KeyError:
+            pass
+
         # Make a new_cls that inherits from the dynamic_parent_cls, and resolve any
         # potential metaclass conflicts, like when the object has its own metaclass
         # already, as when it's an ABC.
@@ -552,14 +1123,8 @@ class DynamicSubclasser(type):
                 {},
             )
 
-        # Create the instance and initialize it with the given object.
-        # Sets obj in instance for immutables like tuple
-        # instance = new_cls.__new__(new_cls, obj, *args, **kwargs)
-        instance = new_cls.__new__(new_cls, obj, *args, **kwargs)
-        # Sets obj in instance for mutables like list
-        instance.__init__(obj, *args, **kwargs)
-
-        return instance
+        DynamicSubclasser._subclasses[key] = new_cls
+        return new_cls
 
     def __instancecheck__(cls, inst):
         """If the dynamic parent subclasses an abc like UserList, the result
@@ -587,14 +1152,103 @@ class DynamicSubclasser(type):
         return any(c in candidates for c in sub.mro())
 
 
+# Inherited methods known not to mutate, which only need the read lock, and no sync
+# afterwards. Any other is assumed to mutate.
+_READ_ONLY_METHODS = frozenset(
+    (
+        "copy",
+        "count",
+        "difference",
+        "fromkeys",
+        "index",
+        "intersection",
+        "isdisjoint",
+        "issubset",
+        "issuperset",
+        "items",
+        "keys",
+        "symmetric_difference",
+        "union",
+        "values",
+    )
+)
+
+
+def _reads(method):
+    """Run a DeepCollection method under its read lock, if it has one."""
+
+    @wraps(method)
+    def wrapped(self, *args, **kwargs):
+        if self._lock is None:
+            return method(self, *args, **kwargs)
+        with self._lock.read():
+            return method(self, *args, **kwargs)
+
+    return wrapped
+
+
+def _writes(method):
+    """Run a DeepCollection method under its write lock, if it has one."""
+
+    @wraps(method)
+    def wrapped(self, *args, **kwargs):
+        if self._lock is None:
+            return method(self, *args, **kwargs)
+        with self._lock.write():
+            return method(self, *args, **kwargs)
+
+    return wrapped
+
+
 class DeepCollection(metaclass=DynamicSubclasser):
     """A class intended to allow easy access to items of deep collections.
 
     >>> dc = DeepCollection({"a": ["i", "j", "k"]})
     >>> dc["a", 1]
     'j'
+
+    With `threadsafe=True`, reads and writes are guarded by a readers-writer lock
+    that is shared with any DeepCollections returned from this one.
+
+    >>> dc = DeepCollection({"a": ["i", "j", "k"]}, threadsafe=True)
+    >>> with dc.batch():
+    ...     dc["a", 0] = "x"
+    ...     dc["b"] = "y"
+    >>> dc["a"]._lock is dc._lock
+    True
+
+    With `cache=True`, or a maximum number of entries, the results of patterned
+    reads are kept in an LRU cache until the next mutation. See
+    deep_collections.caching.
+
+    >>> dc = DeepCollection({"a": [{"b": 1}, {"b": 2}]}, cache=True)
+    >>> dc["a", "*", "b"], dc["a", "*", "b"]
+    (DeepCollection([1, 2]), DeepCollection([1, 2]))
+    >>> dc.cache_info().hits
+    1
+
+    `limits`, a deep_collections.limits.Limits, bounds the searches of the methods
+    like paths_to_key, and of any "**" in a path.
+
+    >>> dc = DeepCollection({"a": {"b": {"c": 1}}, "c": 2}, limits=Limits(max_depth=2))
+    >>> dc["**", "c"]
+    2
+
+    With a `path_sep`, like ".", strs are parsed as paths of keys separated by it. See
+    deep_collections.parsing.
+
+    >>> dc = DeepCollection({"a": [{"b": 1}]}, path_sep=".")
+    >>> dc["a[0].b"]
+    1
     """
 
+    # Class level defaults so these can be checked before __init__ sets them.
+    _lock = None
+    _cache = None
+    _watches = None
+    _journal = None
+    _transaction = None
+
     def __init__(
         self,
         obj,
@@ -605,6 +1259,10 @@ class DeepCollection(metaclass=DynamicSubclasser):
         recursive_match_all=True,
         return_deep=True,
         strict=False,
+        threadsafe=False,
+        cache=False,
+        limits=None,
+        path_sep=None,
         **kwargs,
     ):
         # Set instance vars first in case anything else (like super().__init__) accesses
@@ -626,6 +1284,8 @@ class DeepCollection(metaclass=DynamicSubclasser):
         self.recursive_match_all = recursive_match_all
         self.return_deep = return_deep
         self.strict = strict
+        self.limits = limits
+        self.path_sep = path_sep
 
         # This often sets the original value for `self` for mutable types.
         # I.e. it gives a new list its content.
@@ -654,7 +1314,29 @@ class DeepCollection(metaclass=DynamicSubclasser):
             else:  # We have Dotty available, but that's not obj.
                 raise e
 
+        # Set the lock last. Nothing else can see self until __init__ returns, and
+        # filling self above may go through its own methods, as UserDict does through
+        # update, which would need the write lock while a parent DC holds the read lock.
+        # `threadsafe` may also be an existing RWLock, to share it with a parent DC.
+        if isinstance(threadsafe, RWLock):
+            self._lock = threadsafe
+        elif threadsafe:
+            self._lock = RWLock()
+        self.threadsafe = self._lock is not None
+        # `cache` may likewise be an existing QueryCache, to share it with a parent DC.
+        if isinstance(cache, QueryCache):
+            self._cache = cache
+        elif cache:
+            self._cache = QueryCache() if cache is True else QueryCache(cache)
+
     # Unique private methods
+    @classmethod
+    def _coerce(cls, obj):
+        """Return the object a new instance should be made from, given obj. Subclasses
+        may override this to convert obj to a type they work on.
+        """
+        return obj
+
     def _ensure_post_call_sync(self, method):
         """Wrap any method to ensure that if if mutates self,
         self._obj is mutated to match. Inherited methods like list's `append` would act
@@ -664,20 +1346,92 @@ class DeepCollection(metaclass=DynamicSubclasser):
         cases without having to know ahead of time what these methods are. This gives
         us more generality, and also lets us not have to include such methods in this
         class. We also don't want an e.g. `append` here unless the parent has it.
+
+        Methods known not to mutate, like `keys`, only take the read lock, and aren't
+        synced afterwards. Any other takes the write lock.
         """
+        if getattr(method, "__name__", None) in _READ_ONLY_METHODS:
+            if self._lock is None:
+                return method
+
+            @wraps(method)
+            def read(*args, **kwargs):
+                with self._lock.read():
+                    return method(*args, **kwargs)
+
+            return read
 
         @wraps(method)
         def wrapped(*args, **kwargs):
-            rv = method(*args, **kwargs)  # may set self and not _obj
-
-            # sync
-            if self._obj != self:
-                self._obj = type(self._obj)(self)
+            # Like __setitem__, this raises RuntimeError if this thread only holds the
+            # read lock, which can't be upgraded to the write lock.
+            with self._lock.write() if self._lock is not None else nullcontext():
+                rv = method(*args, **kwargs)  # may set self and not _obj
+
+                # sync
+                if self._obj != self:
+                    old, self._obj = self._obj, type(self._obj)(self)
+                    transaction = _transaction_of(self)
+                    if transaction is not None:
+                        transaction.replaced(self, old)
+                    if self._watches is None and self._journal is None:
+                        changed = [[]]
+                    else:
+                        changed = _changed_paths(old, self._obj)
+                    for path in changed:
+                        _changed(self, path)
 
             return rv
 
         return wrapped
 
+    def _settings(self):
+        """Return the settings of self as keyword arguments for a new DeepCollection."""
+        return dict(
+            match_with=self.match_with,
+            recursive_match_all=self.recursive_match_all,
+            match_args=self.match_args,
+            match_kwargs=self.match_kwargs,
+            return_deep=self.return_deep,
+            strict=self.strict,
+            limits=self.limits,
+            threadsafe=self._lock or False,
+            cache=self._cache or False,
+            path_sep=self.path_sep,
+        )
+
+    def _parsed(self, path):
+        """Return path, parsed if it's a str and self has a path_sep."""
+        if self.path_sep is None or not isinstance(path, str):
+            return path
+        keys = parse_path(path, self.path_sep)
+        return keys[0] if len(keys) == 1 else keys
+
+    def _spawn(self, obj, cls=None, **overrides):
+        """Return a DeepCollection of obj that inherits the settings of self. It's of
+        the same class as self was instantiated from, unless another cls is given.
+        """
+        settings = self._settings()
+        del settings["return_deep"]
+        settings.update(overrides)
+        # The first base is the class this was instantiated from.
+        cls = cls or type(self).__bases__[0]
+        rv = cls(obj, **settings)
+        # Changes through rv may change what self is watching or journaling.
+        rv._watches = self._watches
+        rv._journal = self._journal
+        rv._transaction = _transaction_of(self)
+        return rv
+
+    def _snapshot(self, items):
+        """Exhaust a generator under the read lock so it can't observe a partial write.
+        Without a lock, return the generator as is to keep it lazy.
+        """
+        if self._lock is None:
+            return items
+        with self._lock.read():
+            return list(items)
+
     # Common private methods
     def __getattribute__(self, name):
         """Overridden to ensure self._obj stays in sync with self if self mutates
@@ -690,11 +1444,13 @@ class DeepCollection(metaclass=DynamicSubclasser):
         >>> dc._obj
         [1, 2]
         """
-        if not name.startswith("_") and name not in dir(DeepCollection) and name in dir(self):
+        # hasattr rather than `in dir()`, which lists every attribute on each access.
+        if not name.startswith("_") and not hasattr(DeepCollection, name):
             method = object.__getattribute__(self, name)
             if callable(method):
                 # wrapped
                 return self._ensure_post_call_sync(method)
+            return method
         return object.__getattribute__(self, name)
 
     def __getattr__(self, item):
@@ -706,32 +1462,57 @@ class DeepCollection(metaclass=DynamicSubclasser):
                 f"'DeepCollection' object, instance of '{type(self._obj)}', has no attribute '{item}'. "
             )
 
+    def _query(self, path, *args, match_with, recursive_match_all, strict, **kwargs):
+        """Return getitem_by_path of self._obj, through the cache if self has one.
+
+        Only patterned paths are cached. Others are direct lookups, which are already
+        fast, and return items of self that should stay shared with it. Results of
+        cached paths are always copies, whether or not they were already cached, so
+        each hit costs a copy of the result. See deep_collections.caching.
+        """
+        cache = self._cache
+        settings = dict(match_with=match_with, recursive_match_all=recursive_match_all, strict=strict)
+        # What's cached isn't invalidated until a transaction is committed.
+        if cache is None or strict or _transaction_of(self) is not None:
+            return getitem_by_path(self._obj, path, *args, **settings, **kwargs)
+
+        if pathlike(path) and not isinstance(path, (list, tuple)):
+            path = list(path)  # e.g. a generator, which checking it would exhaust
+        key = query_key(path, *args, **settings, **kwargs)
+        if key is None or not _patterned(path, *args, **settings, **kwargs):
+            return getitem_by_path(self._obj, path, *args, **settings, **kwargs)
+
+        rv = cache.get(self._obj, key)
+        if rv is MISSING:
+            version = cache.version
+            rv = getitem_by_path(self._obj, path, *args, **settings, **kwargs)
+            cache.put(self._obj, key, rv, version)
+            rv = _copy(rv)
+        return rv
+
+    @_reads
     def __getitem__(self, path):
         # Use self._obj instead of self to avoid unnecessary intermediate
         # DeepCollections. Just make a final conversion at the end.
+        path = self._parsed(path)
 
-        rv = getitem_by_path(
-            self._obj,
+        rv = self._query(
             path,
             *self.match_args,
             match_with=self.match_with,
             recursive_match_all=self.recursive_match_all,
             strict=self.strict,
+            limits=self.limits,
             **self.match_kwargs,
         )
 
         if pathlike(rv) and self.return_deep:
-            return DeepCollection(
-                rv,
-                match_with=self.match_with,
-                recursive_match_all=self.recursive_match_all,
-                match_args=self.match_args,
-                match_kwargs=self.match_kwargs,
-                strict=self.strict,
-            )
+            return self._spawn(rv)
         return rv
 
+    @_writes
     def __delitem__(self, path):
+        path = self._parsed(path)
         if pathlike(path):
             del_by_path(
                 self,
@@ -742,11 +1523,19 @@ class DeepCollection(metaclass=DynamicSubclasser):
                 strict=self.strict,
                 **self.match_kwargs,
             )
+            return
+        transaction = _transaction_of(self)
+        if transaction is not None:
+            transaction.delete(self._obj, path, self)
         else:
             super().__delitem__(path)
             del self._obj[path]
+        # Deleting from a sequence moves the items after it, so all of it changed.
+        _changed(self, [path] if strategy_for(type(self._obj)).mapping else [])
 
+    @_writes
     def __setitem__(self, path, value):
+        path = self._parsed(path)
         if pathlike(path):
             set_by_path(
                 self,
@@ -758,9 +1547,42 @@ class DeepCollection(metaclass=DynamicSubclasser):
                 strict=self.strict,
                 **self.match_kwargs,
             )
+            return
+        transaction = _transaction_of(self)
+        if transaction is not None:
+            transaction.set(self._obj, path, value, self)
         else:
             super().__setitem__(path, value)
             self._obj[path] = value
+        _changed(self, [path])
+
+    def __reduce__(self):
+        """Pickle only the original object and any non-default settings. The generated
+        class isn't importable, so unpickling rebuilds it through the class of self
+        that is, e.g. DeepCollection.
+
+        >>> import pickle
+        >>> dc = pickle.loads(pickle.dumps(DeepCollection({"a": [1]}, match_with="regex")))
+        >>> dc, dc.match_with
+        (DeepCollection({'a': [1]}), 'regex')
+        """
+        defaults = DeepCollection.__init__.__kwdefaults__
+        # Empty match_args and match_kwargs are the same as their None defaults.
+        settings = {k: v for k, v in self._settings().items() if v != defaults[k] and v not in ((), {})}
+        if settings.get("threadsafe"):
+            # Locks can't be pickled, and wouldn't be shared across processes anyway.
+            settings["threadsafe"] = True
+        if settings.get("cache"):
+            settings["cache"] = settings["cache"].maxsize
+
+        # The first base is the class this was instantiated from.
+        cls = type(self).__bases__[0]
+        if settings:
+            return (_rebuild_deep_collection, (cls, self._obj, settings))
+        return (cls, (self._obj,))
+
+    def __reduce_ex__(self, protocol):
+        return self.__reduce__()
 
     def __repr__(self):
         super_repr = super().__repr__()
@@ -770,6 +1592,7 @@ class DeepCollection(metaclass=DynamicSubclasser):
         return f"DeepCollection({super_repr})"
 
     # Common public methods
+    @_reads
     def get(
         self,
         path,
@@ -780,6 +1603,7 @@ class DeepCollection(metaclass=DynamicSubclasser):
         recursive_match_all=None,
         match_kwargs=None,
         strict=None,
+        limits=None,
     ):
         # These are one-offs and should not mutate self
         match_args = match_args or self.match_args
@@ -789,15 +1613,18 @@ class DeepCollection(metaclass=DynamicSubclasser):
             recursive_match_all = self.recursive_match_all
         if strict is None:
             strict = self.strict
+        if limits is None:
+            limits = self.limits
+        path = self._parsed(path)
 
         try:
-            rv = getitem_by_path(
-                self._obj,
+            rv = self._query(
                 path,
                 *match_args,
                 match_with=match_with,
                 recursive_match_all=recursive_match_all,
                 strict=strict,
+                limits=limits,
                 **match_kwargs,
             )
         except (KeyError, IndexError, TypeError):
@@ -805,22 +1632,393 @@ class DeepCollection(metaclass=DynamicSubclasser):
 
         if pathlike(rv) and self.return_deep:  # pathlike is a proxy test for an object being deepable
             # retain settings from self, not the one-off values
-            return DeepCollection(
-                rv,
-                match_with=self.match_with,
-                recursive_match_all=self.recursive_match_all,
-                match_args=self.match_args,
-                match_kwargs=self.match_kwargs,
-                strict=strict,
-            )
+            return self._spawn(rv, strict=strict)
         return rv
 
+    @_reads
+    def get_array(
+        self,
+        path,
+        *,
+        dtype=None,
+        match_args=None,
+        match_with=None,
+        recursive_match_all=None,
+        match_kwargs=None,
+        strict=None,
+        limits=None,
+    ):
+        """Return the value(s) at path as a NumPy array. See deep_collections.arrays.
+
+        >>> DeepCollection({"a": [{"b": 1}, {"b": 2}]}).get_array(["a", "*", "b"])
+        array([1, 2])
+        """
+        from .arrays import get_array
+
+        # These are one-offs and should not mutate self
+        match_args = match_args or self.match_args
+        match_with = match_with or self.match_with
+        match_kwargs = match_kwargs or self.match_kwargs
+        if recursive_match_all is None:
+            recursive_match_all = self.recursive_match_all
+        if strict is None:
+            strict = self.strict
+        if limits is None:
+            limits = self.limits
+
+        return get_array(
+            self._obj,
+            path,
+            *match_args,
+            dtype=dtype,
+            match_with=match_with,
+            recursive_match_all=recursive_match_all,
+            strict=strict,
+            limits=limits,
+            **match_kwargs,
+        )
+
+    @_reads
+    def explain(
+        self,
+        path,
+        *,
+        match_args=None,
+        match_with=None,
+        recursive_match_all=None,
+        match_kwargs=None,
+        strict=None,
+    ):
+        """Return how self[path] would be resolved, with estimates of its cost. See
+        deep_collections.explain.
+
+        >>> DeepCollection({"a": {"b": 1}}).explain(["a", "*"])["estimated_results"]
+        1
+        """
+        from .explain import explain
+
+        # These are one-offs and should not mutate self
+        match_args = match_args or self.match_args
+        match_with = match_with or self.match_with
+        match_kwargs = match_kwargs or self.match_kwargs
+        if recursive_match_all is None:
+            recursive_match_all = self.recursive_match_all
+        if strict is None:
+            strict = self.strict
+
+        return explain(
+            self._obj,
+            path,
+            *match_args,
+            match_with=match_with,
+            recursive_match_all=recursive_match_all,
+            strict=strict,
+            **match_kwargs,
+        )
+
+    @_reads
+    def first_by_path(
+        self,
+        path,
+        *,
+        default=None,
+        match_args=None,
+        match_with=None,
+        recursive_match_all=None,
+        match_kwargs=None,
+        strict=None,
+        limits=None,
+    ):
+        """Return the value at the first match of path, or default if nothing matches.
+        See first_by_path.
+
+        >>> DeepCollection({"a": [{"b": {"c": 1}}, {"b": 2}]}).first_by_path(["a", "*", "b"])
+        DeepCollection({'c': 1})
+        """
+        # These are one-offs and should not mutate self
+        match_args = match_args or self.match_args
+        match_with = match_with or self.match_with
+        match_kwargs = match_kwargs or self.match_kwargs
+        if recursive_match_all is None:
+            recursive_match_all = self.recursive_match_all
+        if strict is None:
+            strict = self.strict
+        if limits is None:
+            limits = self.limits
+
+        rv = first_by_path(
+            self._obj,
+            path,
+            *match_args,
+            default=default,
+            match_with=match_with,
+            recursive_match_all=recursive_match_all,
+            strict=strict,
+            limits=limits,
+            **match_kwargs,
+        )
+
+        if pathlike(rv) and self.return_deep:
+            return self._spawn(rv, strict=strict)
+        return rv
+
+    @_reads
+    def exists_by_path(
+        self,
+        path,
+        *,
+        match_args=None,
+        match_with=None,
+        recursive_match_all=None,
+        match_kwargs=None,
+        strict=None,
+        limits=None,
+    ):
+        """Return True if anything matches path. See exists_by_path.
+
+        >>> DeepCollection({"a": [{"error": 1}]}).exists_by_path(["**", "error"])
+        True
+        """
+        # These are one-offs and should not mutate self
+        match_args = match_args or self.match_args
+        match_with = match_with or self.match_with
+        match_kwargs = match_kwargs or self.match_kwargs
+        if recursive_match_all is None:
+            recursive_match_all = self.recursive_match_all
+        if strict is None:
+            strict = self.strict
+        if limits is None:
+            limits = self.limits
+
+        return exists_by_path(
+            self._obj,
+            path,
+            *match_args,
+            match_with=match_with,
+            recursive_match_all=recursive_match_all,
+            strict=strict,
+            limits=limits,
+            **match_kwargs,
+        )
+
+    @_reads
+    def count_by_path(
+        self,
+        path,
+        *,
+        match_args=None,
+        match_with=None,
+        recursive_match_all=None,
+        match_kwargs=None,
+        strict=None,
+        limits=None,
+    ):
+        """Return the number of matches of path. See count_by_path.
+
+        >>> DeepCollection({"a": [{"b": 1}, {"b": 2}]}).count_by_path(["a", "*", "b"])
+        2
+        """
+        # These are one-offs and should not mutate self
+        match_args = match_args or self.match_args
+        match_with = match_with or self.match_with
+        match_kwargs = match_kwargs or self.match_kwargs
+        if recursive_match_all is None:
+            recursive_match_all = self.recursive_match_all
+        if strict is None:
+            strict = self.strict
+        if limits is None:
+            limits = self.limits
+
+        return count_by_path(
+            self._obj,
+            path,
+            *match_args,
+            match_with=match_with,
+            recursive_match_all=recursive_match_all,
+            strict=strict,
+            limits=limits,
+            **match_kwargs,
+        )
+
+    @_reads
+    def flatten(self, leaves_only=True, path_type=tuple):
+        """Return {path: value} for every leaf in self. See deep_collections.flattening.
+
+        >>> DeepCollection({"a": [1, {"b": 2}]}).flatten()
+        {('a', 0): 1, ('a', 1, 'b'): 2}
+        """
+        return flatten(self._obj, leaves_only=leaves_only, path_type=path_type)
+
+    @_reads
+    def project(
+        self,
+        path,
+        fields,
+        *,
+        default=None,
+        match_args=None,
+        match_with=None,
+        recursive_match_all=None,
+        match_kwargs=None,
+        strict=None,
+        limits=None,
+    ):
+        """Return a row of the values at fields for each match of path. See project.
+        Rows are plain dicts or tuples.
+
+        >>> DeepCollection({"a": [{"b": 1, "c": 2}, {"b": 3}]}).project(["a", "*"], ["b", "c"])
+        [(1, 2), (3, None)]
+        """
+        # These are one-offs and should not mutate self
+        match_args = match_args or self.match_args
+        match_with = match_with or self.match_with
+        match_kwargs = match_kwargs or self.match_kwargs
+        if recursive_match_all is None:
+            recursive_match_all = self.recursive_match_all
+        if strict is None:
+            strict = self.strict
+        if limits is None:
+            limits = self.limits
+
+        return project(
+            self._obj,
+            path,
+            fields,
+            *match_args,
+            default=default,
+            match_with=match_with,
+            recursive_match_all=recursive_match_all,
+            strict=strict,
+            limits=limits,
+            **match_kwargs,
+        )
+
+    @_writes
+    def watch(self, path):
+        """Return a LiveQuery of the matches of path, which is kept current as self is
+        changed. See deep_collections.live.
+
+        >>> dc = DeepCollection({"a": {"n": 1}})
+        >>> live = dc.watch(["*", "n"])
+        >>> dc["b"] = {"n": 2}
+        >>> live.values()
+        [1, 2]
+        """
+        from .live import _Watches
+
+        if self._watches is None:
+            self._watches = _Watches(self)
+        return self._watches.add(path)
+
+    @_writes
+    def journal(self):
+        """Return a Journal of the changes made to self from now on. Those made through
+        DeepCollections spawned from self before it was called aren't recorded. See
+        deep_collections.journal.
+
+        >>> dc = DeepCollection({"a": 1})
+        >>> journal = dc.journal()
+        >>> dc["b"] = 2
+        >>> journal.drain()
+        [Entry(op='set', path=['b'], value=2)]
+        """
+        from .journal import Journal
+
+        if self._journal is None:
+            self._journal = Journal(self)
+        return self._journal
+
+    @_writes
+    def replay(self, entries):
+        """Apply entries from the Journal of another DeepCollection to self, in one pass
+        over them once compacted.
+
+        >>> source, replica = DeepCollection({"a": {}}), DeepCollection({"a": {}})
+        >>> journal = source.journal()
+        >>> source["a", "b"] = 1
+        >>> replica.replay(journal.drain())
+        >>> replica._obj
+        {'a': {'b': 1}}
+        """
+        from .journal import replay
+
+        replay(self, entries)
+
+    @contextmanager
+    def transaction(self):
+        """Make the changes to self in the block as one. Each is made directly to what
+        self wraps, and the cache, journal and watched queries of self are only updated
+        once the block is left. If it raises, the changes are undone. See
+        deep_collections.transactions.
+
+        >>> dc = DeepCollection({"a": {"b": 1}})
+        >>> with dc.transaction():
+        ...     dc["a", "b"] = 2
+        ...     dc["a", "c"] = 3
+        >>> dc._obj
+        {'a': {'b': 2, 'c': 3}}
+        """
+        from .transactions import Transaction
+
+        if _transaction_of(self) is not None:
+            # Join the one that's open, to be committed or undone with it.
+            yield self._transaction
+            return
+
+        with self._lock.write() if self._lock is not None else nullcontext():
+            transaction = self._transaction = Transaction(self)
+            try:
+                yield transaction
+            except BaseException as e:
+                try:
+                    transaction.rollback()
+                except Exception as undo_error:
+                    # Don't hide why the block raised.
+                    warnings.warn(f"Couldn't undo every change after {e!r}: {undo_error!r}", RuntimeWarning)
+                raise
+            transaction.commit()
+
     def items(self, *args, **kwargs):
         # XXX what about when it doesn't exist?
         return super().items(*args, **kwargs)
 
     # Unique public methods
-    def paths_to_key(self, key, *args, match_with=None, recursive_match_all=None, strict=None, **kwargs):
+    @classmethod
+    def from_mmap(cls, path, *args, ndjson=None, index_path=None, save_index=True, **kwargs):
+        """Return a DeepCollection of the JSON (or NDJSON) file at path that is parsed
+        lazily from a memory map of the file. It is read-only.
+
+        See deep_collections.mapped for details. Other arguments are as for
+        DeepCollection.
+        """
+        return cls(open_mapped(path, ndjson=ndjson, index_path=index_path, save_index=save_index), *args, **kwargs)
+
+    def cache_info(self):
+        """Return the hits, misses, evictions, maxsize, current size and version of
+        the query cache, or None without one.
+        """
+        if self._cache is None:
+            return None
+        return self._cache.info()
+
+    def cache_clear(self):
+        """Drop every cached query result and reset the cache's statistics."""
+        if self._cache is not None:
+            self._cache.clear()
+
+    def batch(self, read_only=False):
+        """Return a context manager holding the write lock, so a group of writes is
+        applied atomically with respect to other threads. With `read_only=True` it
+        holds the shared read lock instead, so a group of reads sees one consistent
+        state. Without `threadsafe=True` this does nothing.
+        """
+        if self._lock is None:
+            return nullcontext(self)
+        if read_only:
+            return self._lock.read()
+        return self._lock.write()
+
+    def paths_to_key(self, key, *args, match_with=None, recursive_match_all=None, strict=None, limits=None, **kwargs):
         """
         >>> list(DeepCollection([{"x": {"y": "value", "z": {"y": "asdf"}}}]).paths_to_key("y"))
         [[0, 'x', 'y'], [0, 'x', 'z', 'y']]
@@ -832,18 +2030,23 @@ class DeepCollection(metaclass=DynamicSubclasser):
             recursive_match_all = self.recursive_match_all
         if strict is None:
             strict = self.strict
+        if limits is None:
+            limits = self.limits
 
-        yield from paths_to_key(
-            self,
-            key,
-            *match_args,
-            match_with=match_with,
-            recursive_match_all=recursive_match_all,
-            strict=strict,
-            **match_kwargs,
+        yield from self._snapshot(
+            paths_to_key(
+                self,
+                key,
+                *match_args,
+                match_with=match_with,
+                recursive_match_all=recursive_match_all,
+                strict=strict,
+                limits=limits,
+                **match_kwargs,
+            )
         )
 
-    def paths_to_value(self, key, *args, match_with=None, recursive_match_all=None, **kwargs):
+    def paths_to_value(self, key, *args, match_with=None, recursive_match_all=None, limits=None, **kwargs):
         """
         >>> list(DeepCollection([{"x": {"y": "value", "z": {"y": "asdf"}}}]).paths_to_value("asdf"))
         [[0, 'x', 'z', 'y']]
@@ -853,12 +2056,22 @@ class DeepCollection(metaclass=DynamicSubclasser):
         match_kwargs = kwargs or self.match_kwargs
         if recursive_match_all is None:
             recursive_match_all = self.recursive_match_all
+        if limits is None:
+            limits = self.limits
 
-        yield from paths_to_value(
-            self, key, *match_args, match_with=match_with, recursive_match_all=recursive_match_all, **match_kwargs
+        yield from self._snapshot(
+            paths_to_value(
+                self,
+                key,
+                *match_args,
+                match_with=match_with,
+                recursive_match_all=recursive_match_all,
+                limits=limits,
+                **match_kwargs,
+            )
         )
 
-    def values_for_key(self, key, *args, match_with=None, recursive_match_all=None, strict=None, **kwargs):
+    def values_for_key(self, key, *args, match_with=None, recursive_match_all=None, strict=None, limits=None, **kwargs):
         """
         >>> dc = DeepCollection([{"x": {"y": "v", "z": {"y": "v"}}, "y": {1: 2}}], return_deep=False)
         >>> list(dc.values_for_key("y"))
@@ -871,18 +2084,25 @@ class DeepCollection(metaclass=DynamicSubclasser):
             recursive_match_all = self.recursive_match_all
         if strict is None:
             strict = self.strict
+        if limits is None:
+            limits = self.limits
 
-        yield from values_for_key(
-            self,
-            key,
-            *match_args,
-            match_with=match_with,
-            recursive_match_all=recursive_match_all,
-            strict=strict,
-            **match_kwargs,
+        yield from self._snapshot(
+            values_for_key(
+                self,
+                key,
+                *match_args,
+                match_with=match_with,
+                recursive_match_all=recursive_match_all,
+                strict=strict,
+                limits=limits,
+                **match_kwargs,
+            )
         )
 
-    def deduped_values_for_key(self, key, *args, match_with=None, recursive_match_all=None, strict=None, **kwargs):
+    def deduped_values_for_key(
+        self, key, *args, match_with=None, recursive_match_all=None, strict=None, limits=None, **kwargs
+    ):
         """
         >>> dc = DeepCollection([{"x": {"y": "v", "z": {"y": "v"}}, "y": {1: 2}}], return_deep=False)
         >>> 'v' in dc.deduped_values_for_key("y")  # order not gaurunteed
@@ -897,17 +2117,22 @@ class DeepCollection(metaclass=DynamicSubclasser):
             recursive_match_all = self.recursive_match_all
         if strict is None:
             strict = self.strict
+        if limits is None:
+            limits = self.limits
 
         return deduped_items(
             list(
-                values_for_key(
-                    self,
-                    key,
-                    *match_args,
-                    match_with=match_with,
-                    recursive_match_all=recursive_match_all,
-                    strict=strict,
-                    **match_kwargs,
+                self._snapshot(
+                    values_for_key(
+                        self,
+                        key,
+                        *match_args,
+                        match_with=match_with,
+                        recursive_match_all=recursive_match_all,
+                        strict=strict,
+                        limits=limits,
+                        **match_kwargs,
+                    )
                 )
             )
         )
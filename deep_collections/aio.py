@@ -0,0 +1,284 @@
+"""asyncio versions of the searches that don't block the event loop on big documents.
+
+The traversal is the same as the synchronous functions of the same names, and so are
+the results. The difference is that these hand control back to the event loop
+every `yield_every` nodes, or every `yield_interval` seconds, whichever comes first.
+
+With Limits(cycles=...), cycles are found as by the synchronous functions, but an
+object referred to from many places is searched again at each.
+
+Alternatively, pass an `executor` (a thread or process pool) to run the whole search
+there while the event loop carries on, and iterate the results once it's done.
+
+>>> import asyncio
+>>> async def main():
+...     return [p async for p in apaths_to_key({"a": {"x": 1}, "x": 2}, "x")]
+>>> asyncio.run(main())
+[['a', 'x'], ['x']]
+"""
+import asyncio
+import time
+from functools import partial
+
+from . import _getitem_from_resolved
+from . import _lookup_for
+from . import _simplify_double_splats
+from . import getitem_by_path
+from . import getitem_by_path_strict
+from . import matched_keys
+from .limits import CycleError
+from .matching import match_style
+from .planning import planners
+from .planning import searches
+from .utils import pathlike
+
+# Defaults for how much work may be done between handing control back to the loop.
+YIELD_EVERY = 1000
+YIELD_INTERVAL = 0.002
+
+
+class _Budget:
+    """Track work done since control was last handed back to the event loop."""
+
+    def __init__(self, yield_every, yield_interval):
+        self.yield_every = yield_every
+        self.yield_interval = yield_interval
+        self.reset()
+
+    def reset(self):
+        self.nodes = 0
+        self.deadline = time.perf_counter() + self.yield_interval
+
+    def spend(self, nodes=1):
+        """Record some work, and return True if it's time to yield to the loop."""
+        self.nodes += nodes
+        return self.nodes >= self.yield_every or time.perf_counter() >= self.deadline
+
+    async def pause(self):
+        await asyncio.sleep(0)
+        self.reset()
+
+
+def _run_search(search, obj, query, args, kwargs):
+    return list(searches[search](obj, query, *args, **kwargs))
+
+
+async def _asearch(search, obj, query, args, kwargs, yield_every, yield_interval, executor):
+    if not pathlike(obj):
+        raise TypeError(f"First argument must be able to be deep, not type '{type(obj)}'")
+
+    if executor is not None:
+        loop = asyncio.get_running_loop()
+        for path in await loop.run_in_executor(executor, partial(_run_search, search, obj, query, args, kwargs)):
+            yield path
+        return
+
+    async for path in _awalk(search, obj, query, args, kwargs, _Budget(yield_every, yield_interval), []):
+        yield path
+
+
+async def _awalk(search, obj, query, args, kwargs, budget, current):
+    """Yield the results of the search of obj at current, charging budget for each
+    node visited.
+    """
+    if not pathlike(obj):
+        raise TypeError(f"First argument must be able to be deep, not type '{type(obj)}'")
+
+    # Walk the plan of the search depth first, splitting every shard in turn so the
+    # results come out in serial order and each step is a single node's children.
+    planner = planners[search]
+    stack = [planner(obj, query, args, kwargs, current)]
+    # With limits.cycles, the (id(), path) of each object being searched, as on stack.
+    limits = kwargs.get("limits")
+    cycles = limits is not None and limits.cycles
+    searching = [(id(obj), current)]
+    while stack:
+        unit = next(stack[-1], None)
+        if unit is None:
+            stack.pop()
+            searching.pop()
+            continue
+
+        if unit[0] == "paths":
+            for path in unit[1]:
+                yield path
+            nodes = 1
+        else:
+            _, path, subobj = unit
+            if cycles:
+                target = next((p for i, p in searching if i == id(subobj)), None)
+                if target is not None:
+                    if cycles == "raise":
+                        raise CycleError(path, target)
+                    continue
+            stack.append(planner(subobj, query, args, kwargs, path))
+            searching.append((id(subobj), path))
+            nodes = len(subobj) if hasattr(subobj, "__len__") else 1
+
+        if budget.spend(nodes):
+            await budget.pause()
+
+
+async def _aresolve(
+    obj, path, args, budget, current, match_with="glob", recursive_match_all=True, limits=None, **kwargs
+):
+    """Yield the paths resolve_path(obj, path) would, charging budget for each node
+    visited, so a search that matches nothing still hands control back to the loop.
+    """
+    if recursive_match_all and "**" in path:
+        path = _simplify_double_splats(path)
+
+    if recursive_match_all and "**" in path:
+        # As _resolve_double_splat, with the search from each start walked in turn.
+        i = path.index("**")
+        search_kwargs = dict(match_with=match_with, recursive_match_all=recursive_match_all, limits=limits, **kwargs)
+        flags = dict(match_with=match_with, recursive_match_all=recursive_match_all, **kwargs)
+        starts = _aresolve(obj, path[:i], args, budget, [], **flags) if path[:i] else _once([])
+        rest = path[i + 1 :]  # noqa: E203
+        async for start in starts:
+            subobj = getitem_by_path_strict(obj, start)
+            async for found in _awalk("paths_to_key", subobj, rest, args, search_kwargs, budget, start):
+                yield current + found
+        return
+    elif not path:
+        return
+
+    keys = matched_keys(obj, path[0], *args, match_with=match_with, **kwargs)
+    if budget.spend(len(obj) if hasattr(obj, "__len__") else 1):
+        await budget.pause()
+    if len(path) == 1:
+        for key in keys:
+            yield current + [key]
+        return
+
+    flags = dict(match_with=match_with, recursive_match_all=recursive_match_all, limits=limits, **kwargs)
+    lookup = _lookup_for(obj)
+    for key in keys:
+        async for found in _aresolve(lookup(obj, key), path[1:], args, budget, current + [key], **flags):
+            yield found
+
+
+async def _once(value):
+    yield value
+
+
+async def apaths_to_key(
+    obj,
+    key,
+    *args,
+    match_with="glob",
+    recursive_match_all=True,
+    yield_every=YIELD_EVERY,
+    yield_interval=YIELD_INTERVAL,
+    executor=None,
+    **kwargs,
+):
+    """Async version of deep_collections.paths_to_key."""
+    kwargs.update(match_with=match_with, recursive_match_all=recursive_match_all)
+    async for path in _asearch("paths_to_key", obj, key, args, kwargs, yield_every, yield_interval, executor):
+        yield path
+
+
+async def apaths_to_value(
+    obj,
+    value,
+    *args,
+    match_with="glob",
+    recursive_match_all=True,
+    yield_every=YIELD_EVERY,
+    yield_interval=YIELD_INTERVAL,
+    executor=None,
+    **kwargs,
+):
+    """Async version of deep_collections.paths_to_value."""
+    kwargs.update(match_with=match_with, recursive_match_all=recursive_match_all)
+    async for path in _asearch("paths_to_value", obj, value, args, kwargs, yield_every, yield_interval, executor):
+        yield path
+
+
+async def avalues_for_key(
+    obj,
+    key,
+    *args,
+    match_with="glob",
+    recursive_match_all=True,
+    yield_every=YIELD_EVERY,
+    yield_interval=YIELD_INTERVAL,
+    executor=None,
+    **kwargs,
+):
+    """Async version of deep_collections.values_for_key."""
+    async for path in apaths_to_key(
+        obj,
+        key,
+        *args,
+        match_with=match_with,
+        recursive_match_all=recursive_match_all,
+        yield_every=yield_every,
+        yield_interval=yield_interval,
+        executor=executor,
+        **kwargs,
+    ):
+        yield getitem_by_path(
+            obj, path, *args, match_with=match_with, recursive_match_all=recursive_match_all, **kwargs
+        )
+
+
+def _get_many(obj, paths, default, args, kwargs):
+    rv = []
+    for path in paths:
+        try:
+            rv.append(getitem_by_path(obj, path, *args, **kwargs))
+        except (KeyError, IndexError, TypeError):
+            rv.append(default)
+    return rv
+
+
+async def aget_many(
+    obj,
+    paths,
+    default=None,
+    *args,
+    match_with="glob",
+    strict=False,
+    yield_every=YIELD_EVERY,
+    yield_interval=YIELD_INTERVAL,
+    executor=None,
+    **kwargs,
+):
+    """Yield getitem_by_path(obj, path) for each of the given paths, in order. As with
+    DeepCollection.get, a path that can't be found yields `default` instead.
+
+    Globbed paths are resolved incrementally, handing control back to the event
+    loop as each node is searched, whether or not it matches. With an `executor`,
+    the paths are all got there instead.
+
+    >>> import asyncio
+    >>> async def main():
+    ...     obj = {"a": {"x": 1, "y": 2}}
+    ...     return [v async for v in aget_many(obj, [["a", "x"], ["a", "*"], ["b"]])]
+    >>> asyncio.run(main())
+    [1, [1, 2], None]
+    """
+    if executor is not None:
+        loop = asyncio.get_running_loop()
+        kwargs.update(match_with=match_with, strict=strict)
+        for value in await loop.run_in_executor(executor, partial(_get_many, obj, list(paths), default, args, kwargs)):
+            yield value
+        return
+
+    budget = _Budget(yield_every, yield_interval)
+    for path in paths:
+        try:
+            if strict or not pathlike(path) and not match_style(match_with).patterned(path, *args, **kwargs):
+                value = getitem_by_path(obj, path, *args, match_with=match_with, strict=strict, **kwargs)
+            else:
+                path = list(path) if pathlike(path) else [path]
+                resolved = [p async for p in _aresolve(obj, path, args, budget, [], match_with=match_with, **kwargs)]
+                value = _getitem_from_resolved(obj, path, resolved, *args, match_with=match_with, **kwargs)
+        except (KeyError, IndexError, TypeError):
+            value = default
+
+        yield value
+        if budget.spend():
+            await budget.pause()
@@ -0,0 +1,149 @@
+"""NumPy arrays of the values matched by a path.
+
+get_array is for pulling numeric data out of a document, as in
+numpy.array(getitem_by_path(obj, ["series", "*", "value"])), but without building
+the intermediate list. Matched values are written straight into a typed array as
+the path is resolved. The dtype is inferred from the first value, and widened as
+needed, as from ints to floats, or to object for anything that isn't a number.
+
+NumPy is an optional dependency. It's only imported when these are used.
+
+>>> obj = {"series": [{"value": 1}, {"value": 2.5}, {"value": 4}]}
+>>> get_array(obj, ["series", "*", "value"])
+array([1. , 2.5, 4. ])
+
+Values that are lists of the same length make a multi-dimensional array.
+
+>>> get_array({"rows": [{"xy": [1, 2]}, {"xy": [3, 4]}]}, ["rows", "*", "xy"])
+array([[1, 2],
+       [3, 4]])
+"""
+from collections.abc import Sequence
+from itertools import chain
+
+from . import _patterned
+from . import _resolve_items
+from . import getitem_by_path
+from .utils import _stringlike
+from .utils import pathlike
+
+_MISSING = object()
+
+# Capacity to start with when the number of matches can't be estimated.
+INITIAL_CAPACITY = 1024
+
+
+def _numpy():
+    try:
+        import numpy
+    except ModuleNotFoundError as e:
+        raise ModuleNotFoundError("NumPy is required for arrays. Install it with `pip install numpy`.") from e
+    return numpy
+
+
+def _dtype_of(np, value):
+    """Return the dtype to store value in, or None if it isn't a number."""
+    if isinstance(value, bool):
+        return np.dtype(bool)
+    if isinstance(value, int):
+        return np.dtype(np.int64)
+    if isinstance(value, float):
+        return np.dtype(np.float64)
+    if isinstance(value, complex):
+        return np.dtype(np.complex128)
+    if isinstance(value, (np.number, np.bool_)):
+        return value.dtype
+    return None
+
+
+def _estimated_count(obj, path, is_pattern):
+    """Guess the number of matches as the length of the first patterned step."""
+    for step in path:
+        if is_pattern(step):
+            break
+        try:
+            obj = obj[step]
+        except (KeyError, IndexError, TypeError):
+            return 0
+    try:
+        return len(obj)
+    except TypeError:
+        return INITIAL_CAPACITY
+
+
+def _to_array(np, values, dtype):
+    """Convert a list of values, which may be lists themselves, as numpy.array would,
+    but to an object array rather than e.g. strings for values that aren't numbers.
+    """
+    if dtype is None:
+        try:
+            arr = np.array(values)
+        except ValueError:  # ragged
+            arr = None
+        if arr is not None and arr.dtype.kind in "biufc":
+            return arr
+        dtype = object
+    return np.array(values, dtype=dtype)
+
+
+def _fill(np, values, capacity, dtype=None):
+    """Write values into a preallocated array, growing and widening it as needed."""
+    values = iter(values)
+    first = next(values, _MISSING)
+    if first is _MISSING:
+        return np.empty(0, dtype=dtype or np.float64)
+
+    if pathlike(first):  # e.g. lists of lists make a multi-dimensional array
+        return _to_array(np, [first, *values], dtype)
+
+    fixed = dtype is not None
+    dtype = np.dtype(dtype) if fixed else (_dtype_of(np, first) or np.dtype(object))
+    arr = np.empty(max(capacity, 1), dtype=dtype)
+    count = 0
+
+    for value in chain([first], values):
+        if count == len(arr):
+            arr = np.concatenate([arr, np.empty(len(arr), dtype=arr.dtype)])
+
+        if not fixed and arr.dtype != object:
+            value_dtype = _dtype_of(np, value)
+            if value_dtype is None:
+                arr = arr.astype(object)
+            elif value_dtype != arr.dtype:
+                arr = arr.astype(np.result_type(arr.dtype, value_dtype))
+
+        try:
+            arr[count] = value
+        except OverflowError:  # an int too big for int64
+            if fixed:
+                raise
+            arr = arr.astype(object)
+            arr[count] = value
+        count += 1
+
+    if count < len(arr):
+        arr = arr[:count].copy()
+    return arr
+
+
+def get_array(obj, path, *args, dtype=None, match_with="glob", recursive_match_all=True, strict=False, **kwargs):
+    """Return what getitem_by_path(obj, path) would, as a NumPy array.
+
+    If path has any patterns, the array holds every match, in order, even if there
+    is only one. Otherwise it's the value at path as an array. If dtype is given,
+    values are converted to it, rather than it being inferred.
+    """
+    np = _numpy()
+
+    def is_pattern(step):
+        return _patterned([step], *args, match_with=match_with, recursive_match_all=recursive_match_all, **kwargs)
+
+    steps = list(path) if pathlike(path) else [path]
+    if strict or not any(is_pattern(step) for step in steps):
+        value = getitem_by_path(obj, path, *args, match_with=match_with, strict=strict, **kwargs)
+        if isinstance(value, Sequence) and not _stringlike(value):
+            return _to_array(np, list(value), dtype)
+        return np.asarray(value, dtype=dtype)
+
+    items = _resolve_items(obj, steps, *args, match_with=match_with, recursive_match_all=recursive_match_all, **kwargs)
+    return _fill(np, (value for _, value in items), _estimated_count(obj, steps, is_pattern), dtype)
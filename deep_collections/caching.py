@@ -0,0 +1,154 @@
+"""A bounded LRU cache of query results, for DeepCollection(cache=...).
+
+Results are cached by the object queried, the path, and the match settings. Any
+mutation of a DeepCollection with a cache, or of one spawned from it, invalidates
+the whole cache by bumping its version. Results are copied going into the cache and
+again coming out, so callers can't change what later queries return by mutating it.
+
+That copy is made on every hit, and costs time in proportion to the size of the
+result. Dicts, lists and tuples are copied directly, and strs, numbers and None are
+shared, which is about three times faster than deepcopy, but a hit on a query that
+returns large subtrees still pays for copying them. The cache helps most with
+queries that search a lot to return a little.
+
+>>> cache = QueryCache(maxsize=2)
+>>> obj = {"a": 1}
+>>> cache.get(obj, "key") is MISSING
+True
+>>> cache.put(obj, "key", [1], cache.version)
+>>> cache.get(obj, "key")
+[1]
+>>> cache.invalidate()
+>>> cache.get(obj, "key") is MISSING
+True
+>>> cache.info()
+CacheInfo(hits=1, misses=2, evictions=0, maxsize=2, currsize=0, version=1)
+"""
+import threading
+from collections import namedtuple
+from collections import OrderedDict
+from copy import deepcopy
+
+from .utils import pathlike
+
+DEFAULT_MAXSIZE = 128
+
+CacheInfo = namedtuple("CacheInfo", "hits misses evictions maxsize currsize version")
+
+# Returned by QueryCache.get for a miss, since None may be a cached result.
+MISSING = object()
+
+# Types _copy shares rather than copies, as deepcopy does.
+_ATOMIC = frozenset((str, bytes, int, float, complex, bool, type(None), range))
+
+
+class QueryCache:
+    """An LRU cache of up to maxsize query results.
+
+    Entries keep a reference to the object they were queried from, so that an object
+    that's been freed can't have its id reused to match a stale entry.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.version = 0
+        self.hits = self.misses = self.evictions = 0
+        self._entries = OrderedDict()
+        # Many readers may share a cache under a DeepCollection's read lock.
+        self._mutex = threading.Lock()
+
+    def get(self, obj, key):
+        """Return a copy of the result cached for key on obj, or MISSING."""
+        with self._mutex:
+            entry = self._entries.get((id(obj), key))
+            if entry is None or entry[0] is not obj:
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end((id(obj), key))
+            self.hits += 1
+            value = entry[1]
+        return _copy(value)
+
+    def put(self, obj, key, value, version):
+        """Cache value for key on obj, unless the cache has been invalidated since
+        version, when value was computed.
+        """
+        value = _copy(value)
+        with self._mutex:
+            if version != self.version:
+                return
+            self._entries[(id(obj), key)] = (obj, value)
+            self._entries.move_to_end((id(obj), key))
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self):
+        """Drop every cached result, as after a mutation."""
+        with self._mutex:
+            self.version += 1
+            self._entries.clear()
+
+    def clear(self):
+        """Drop every cached result and reset the statistics."""
+        with self._mutex:
+            self.version += 1
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def info(self):
+        with self._mutex:
+            return CacheInfo(self.hits, self.misses, self.evictions, self.maxsize, len(self._entries), self.version)
+
+
+def _copy(value, memo=None):
+    """Return a deep copy of value. Plain dicts, lists and tuples are copied here,
+    sharing what's immutable, and anything else is left to deepcopy. Like deepcopy,
+    an object found twice is copied once.
+
+    >>> value = {"a": [1, "s"]}
+    >>> copied = _copy(value)
+    >>> copied == value, copied["a"] is value["a"], copied["a"][1] is value["a"][1]
+    (True, False, True)
+    """
+    cls = type(value)
+    if cls in _ATOMIC:
+        return value
+    if memo is None:
+        memo = {}
+    rv = memo.get(id(value), MISSING)
+    if rv is not MISSING:
+        return rv
+
+    if cls is dict:
+        rv = memo[id(value)] = {}
+        for k, v in value.items():
+            rv[k] = v if type(v) in _ATOMIC else _copy(v, memo)
+    elif cls is list:
+        rv = memo[id(value)] = []
+        for v in value:
+            rv.append(v if type(v) in _ATOMIC else _copy(v, memo))
+    elif cls is tuple:
+        rv = memo[id(value)] = tuple(_copy(v, memo) for v in value)
+    else:
+        rv = deepcopy(value, memo)
+    return rv
+
+
+def query_key(path, *args, match_with="glob", recursive_match_all=True, strict=False, **kwargs):
+    """Return the cache key for a query, or None if it can't be hashed."""
+    key = (
+        tuple(path) if pathlike(path) else (path,),
+        match_with,
+        recursive_match_all,
+        strict,
+        args,
+        tuple(sorted(kwargs.items())),
+    )
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
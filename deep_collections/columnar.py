@@ -0,0 +1,123 @@
+"""Columnar storage for long lists of records that all have the same keys.
+
+A list like [{"id": 1, "ms": 2.5}, {"id": 2, "ms": 3.0}, ...] costs a dict per record,
+each holding its own copy of the same keys. ColumnarRecords stores it instead as
+one column per key, with the keys in a single shared schema. Columns of ints or
+floats are packed into arrays, and other columns are lists.
+
+ColumnarRecords is a read-only Sequence of the records, so it behaves just like
+the list it came from. Indexing it gives the record as a new dict.
+
+>>> records = columnarize([{"id": 1, "ms": 2.5}, {"id": 2, "ms": 3.0}])
+>>> records.schema, records.columns["id"]
+(('id', 'ms'), array('q', [1, 2]))
+>>> records[1]
+{'id': 2, 'ms': 3.0}
+
+getitem_by_path and everything built on it, like DeepCollection, resolve a path
+through ColumnarRecords by column. So a path like ["*", "ms"] matches "ms" against
+the schema once, and then reads that column, rather than visiting each record.
+
+>>> from deep_collections import getitem_by_path
+>>> getitem_by_path(records, ["*", "ms"])
+[2.5, 3.0]
+"""
+from array import array
+from collections.abc import Mapping
+from collections.abc import Sequence
+
+# The fewest records worth storing as columns.
+MIN_RECORDS = 2
+
+# Ints in arrays must fit in a signed 64 bit type.
+_INT_MIN, _INT_MAX = -(2**63), 2**63 - 1
+
+
+def _column(values):
+    """Return values as an array if they are all ints or all floats, else a list."""
+    types = set(map(type, values))
+    if types == {int} and _INT_MIN <= min(values) and max(values) <= _INT_MAX:
+        return array("q", values)
+    if types == {float}:
+        return array("d", values)
+    return values
+
+
+class ColumnarRecords(Sequence):
+    """A read-only sequence of records with the same keys, stored by column.
+
+    It may be made from records, or from another ColumnarRecords, whose columns it
+    then shares.
+    """
+
+    def __init__(self, records=()):
+        if isinstance(records, ColumnarRecords):
+            self.schema = records.schema
+            self.columns = records.columns
+            self._len = records._len
+            return
+
+        records = list(records)
+        self.schema = tuple(records[0]) if records else ()
+        for record in records:
+            if not isinstance(record, Mapping) or tuple(record) != self.schema:
+                raise ValueError("Records must all be mappings with the same keys, in the same order")
+
+        self.columns = {key: _column([record[key] for record in records]) for key in self.schema}
+        self._len = len(records)
+
+    def _row(self, idx):
+        return {key: self.columns[key][idx] for key in self.schema}
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self._row(i) for i in range(*idx.indices(self._len))]
+        if idx < 0:
+            idx += self._len
+        if not 0 <= idx < self._len:
+            raise IndexError("ColumnarRecords index out of range")
+        return self._row(idx)
+
+    def __len__(self):
+        return self._len
+
+    def column(self, key):
+        """Return the values of key in every record, as a list."""
+        return list(self.columns[key])
+
+    def __eq__(self, other):
+        if isinstance(other, ColumnarRecords):
+            return self.schema == other.schema and self.columns == other.columns
+        if isinstance(other, (list, tuple, Sequence)) and not isinstance(other, (str, bytes, bytearray)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def __reduce__(self):
+        return (ColumnarRecords, (list(self),))
+
+
+def _is_records(obj, min_records):
+    if not isinstance(obj, list) or len(obj) < min_records or not isinstance(obj[0], Mapping):
+        return False
+    schema = tuple(obj[0])
+    return all(isinstance(record, Mapping) and tuple(record) == schema for record in obj)
+
+
+def columnarize(obj, min_records=MIN_RECORDS):
+    """Return a copy of obj where every list of at least min_records mappings with
+    the same keys, in the same order, is replaced by ColumnarRecords. This includes
+    obj itself, and such lists nested within the records.
+    """
+    if _is_records(obj, min_records):
+        records = [{k: columnarize(v, min_records) for k, v in record.items()} for record in obj]
+        return ColumnarRecords(records)
+    if isinstance(obj, dict):
+        return {k: columnarize(v, min_records) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [columnarize(v, min_records) for v in obj]
+    return obj
@@ -0,0 +1,367 @@
+"""Estimate what a query will cost before running it.
+
+explain describes how getitem_by_path would resolve a path, segment by segment,
+with estimates of the containers it would visit, the calls it would make to the
+match function, and the results it would return. That's enough to reject or rewrite
+a query built from user input, like one with a leading "**" on a large document,
+before running it.
+
+Each segment gets one of these strategies:
+
+- lookup: a plain item lookup. A path is looked up directly when strict, or when
+  it's a single key that isn't a pattern.
+- select_all: "*", which takes every key without matching them.
+- filter: a Where, which tests the child of every key. See deep_collections.filters.
+- scan: every key is matched against the segment. Literal segments of a path are
+  scanned too, unless the whole path is looked up.
+- column: the segment is matched once against the keys shared by ColumnarRecords,
+  rather than in every record.
+- recursive_descent: "**", which visits every container below where it starts. The
+  segments after it are then tried at each of them.
+
+Estimates come from sampling a few containers of the document at each step, or
+from DocumentStats computed ahead of time, which don't need the document at all.
+Without the document, patterns other than "*" are assumed to match every key, so
+those estimates are upper bounds.
+
+>>> obj = {"users": [{"name": f"u{i}", "tags": ["a", "b"]} for i in range(100)]}
+>>> plan = explain(obj, ["users", "*", "tags", "*"])
+>>> [(s["segment"], s["strategy"]) for s in plan["segments"]]
+[('users', 'scan'), ('*', 'select_all'), ('tags', 'scan'), ('*', 'select_all')]
+>>> plan["estimated_nodes"], plan["estimated_match_calls"], plan["estimated_results"]
+(202, 201, 200)
+>>> explain(DocumentStats.of(obj), ["**", "name"])["estimated_results"]
+100
+"""
+from itertools import islice
+
+from . import _patterned
+from . import _simplify_double_splats
+from .columnar import ColumnarRecords
+from .filters import Where
+from .matching import GlobMatch
+from .matching import GlobOrRegexMatch
+from .matching import match_style
+from .traversal import strategy_for
+from .utils import pathlike
+
+# Containers sampled at each step.
+SAMPLE_SIZE = 8
+# Keys of each sampled container tested against a pattern.
+SAMPLE_KEYS = 64
+# Containers looked at to estimate the size of a subtree below "**".
+SUBTREE_BUDGET = 256
+# Distinct keys of the containers kept by each summary in DocumentStats.
+MAX_KEYS = 1024
+
+
+def _keys(obj):
+    return strategy_for(type(obj)).keys(obj)
+
+
+def _values(obj):
+    return (value for _, value in strategy_for(type(obj)).items(obj))
+
+
+class _Marker:
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return self.name
+
+
+# DocumentStats keys for the items of sequences, and for keys beyond MAX_KEYS.
+ANY_INDEX = _Marker("[*]")
+OTHER_KEYS = _Marker("...")
+
+
+def _summary(count=0):
+    return dict(count=count, containers=0, sequences=0, keys=0, children={})
+
+
+class DocumentStats:
+    """A summary of the structure of a document, which is enough to estimate
+    queries without the document itself.
+
+    Containers reached by the same keys are counted together, taking every item of
+    a sequence to be reached by the same key, ANY_INDEX. Each summary counts how
+    often its key appears, the containers it's for, how many are sequences, all
+    their keys, and holds the summaries of their children by key. Up to MAX_KEYS
+    distinct keys are kept for each. Further keys are counted together as
+    OTHER_KEYS.
+
+    >>> stats = DocumentStats.of({"a": [{"b": 1}, {"b": 2, "c": 3}]})
+    >>> stats.root["children"]["a"]["children"][ANY_INDEX]["children"]["b"]["count"]
+    2
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    @classmethod
+    def of(cls, obj):
+        """Walk obj once to summarize it."""
+        root = _summary(count=1)
+        stack = [(obj, root)] if pathlike(obj) else []
+        while stack:
+            container, summary = stack.pop()
+            summary["containers"] += 1
+            summary["keys"] += len(container)
+            strategy = strategy_for(type(container))
+            if strategy.mapping:
+                items = strategy.items(container)
+            else:
+                summary["sequences"] += 1
+                items = ((ANY_INDEX, value) for _, value in strategy.items(container))
+
+            children = summary["children"]
+            for key, value in items:
+                if key not in children and len(children) >= MAX_KEYS:
+                    key = OTHER_KEYS
+                child = children.get(key)
+                if child is None:
+                    child = children[key] = _summary()
+                child["count"] += 1
+                if pathlike(value):
+                    stack.append((value, child))
+        return cls(root)
+
+    def as_dict(self):
+        """Return the summaries as plain dicts, with the markers as their names."""
+
+        def plain(summary):
+            children = {repr(k) if isinstance(k, _Marker) else k: plain(v) for k, v in summary["children"].items()}
+            return dict(summary, children=children)
+
+        return plain(self.root)
+
+    def __repr__(self):
+        return f"DocumentStats({self.as_dict()})"
+
+
+def _descendants(summary):
+    """Yield summary and every summary below it that's for containers."""
+    stack = [summary]
+    while stack:
+        summary = stack.pop()
+        if summary["containers"]:
+            yield summary
+        stack.extend(summary["children"].values())
+
+
+def _spread(items, n):
+    """Return up to n items, spread evenly across items."""
+    if len(items) <= n:
+        return items
+    step = len(items) / n
+    return [items[int(i * step)] for i in range(n)]
+
+
+def _subtree(obj, budget):
+    """Estimate the containers in the subtree at obj, looking at about budget of
+    them. Return the estimate and the containers that were looked at.
+    """
+    seen = [obj]
+    children = [v for v in islice(_values(obj), SAMPLE_SIZE) if pathlike(v)]
+    if not children or budget <= 1:
+        return 1, seen
+
+    share = (budget - 1) // len(children)
+    sizes = []
+    for child in children:
+        size, child_seen = _subtree(child, share)
+        sizes.append(size)
+        seen.extend(child_seen)
+    # Scale the sampled children up to all of them.
+    sampled = min(len(obj), SAMPLE_SIZE)
+    return 1 + len(obj) * len(children) / sampled * sum(sizes) / len(sizes), seen
+
+
+class _Frontier:
+    """The estimated number of containers a step starts from, with a sample of them
+    or, when estimating from DocumentStats, the number for each summary.
+    """
+
+    def __init__(self, count, samples=None, summaries=None):
+        self.count = count
+        self.samples = samples
+        self.summaries = summaries
+
+    @classmethod
+    def of_summaries(cls, summaries):
+        return cls(sum(n for _, n in summaries), summaries=summaries)
+
+
+def _matches_from_stats(key, child, summary, segment, strategy, style, args, kwargs):
+    """Return how many of a child's appearances would match segment."""
+    if strategy in ("select_all", "filter"):
+        # Children aren't kept, so assume they all pass a filter.
+        return child["count"]
+    patterned = style.patterned(segment, *args, **kwargs)
+    if key is ANY_INDEX:
+        # Indices aren't kept, so any may match a pattern, and each sequence may have an int.
+        if patterned:
+            return child["count"]
+        return min(child["count"], summary["sequences"]) if isinstance(segment, int) else 0
+    if key is OTHER_KEYS:
+        return child["count"] if patterned else min(child["count"], summary["containers"] - summary["sequences"])
+    return child["count"] if style.match(key, segment, *args, **kwargs) else 0
+
+
+def _step_from_stats(frontier, segment, strategy, style, args, kwargs):
+    calls = results = 0
+    summaries = []
+    for summary, count in frontier.summaries:
+        # The frontier may be only some of the containers a summary is for.
+        share = count / summary["containers"]
+        if strategy != "select_all":
+            calls += summary["keys"] * share
+        for key, child in summary["children"].items():
+            matched = _matches_from_stats(key, child, summary, segment, strategy, style, args, kwargs) * share
+            results += matched
+            if matched and child["containers"]:
+                summaries.append((child, child["containers"] * matched / child["count"]))
+    return calls, results, _Frontier.of_summaries(summaries)
+
+
+def _step(frontier, segment, strategy, style, args, kwargs):
+    """Return the estimated (match calls, results, next frontier) of a segment."""
+    count = frontier.count
+    if frontier.summaries is not None:
+        return _step_from_stats(frontier, segment, strategy, style, args, kwargs)
+
+    samples = frontier.samples
+    if not samples:
+        return 0, 0, _Frontier(0, [])
+
+    matched = 0
+    children = []
+    for sample in samples:
+        if strategy == "select_all":
+            keys = list(islice(_keys(sample), SAMPLE_KEYS))
+            sample_tested, sample_matched = len(keys), keys
+        elif strategy == "filter":
+            keys = list(islice(_keys(sample), SAMPLE_KEYS))
+            sample_matched = segment.select(sample, keys, strategy_for(type(sample)).lookup)
+            sample_tested = len(keys)
+        elif not style.patterned(segment, *args, **kwargs):
+            try:
+                sample[segment]
+            except (KeyError, IndexError, TypeError):
+                sample_matched = []
+            else:
+                sample_matched = [segment]
+            sample_tested = len(sample)
+        else:
+            keys = list(islice(_keys(sample), SAMPLE_KEYS))
+            sample_matched = [k for k in keys if style.match(k, segment, *args, **kwargs)]
+            # Scale matches in the keys tested up to all of the keys.
+            sample_tested = len(keys)
+        matched += len(sample_matched) * (len(sample) / sample_tested if sample_tested else 0)
+        children.extend(sample[k] for k in sample_matched[:SAMPLE_SIZE])
+
+    fanout = sum(len(s) for s in samples) / len(samples)
+    calls = 0 if strategy == "select_all" else count * fanout
+    results = count * matched / len(samples)
+    containers = [c for c in children if pathlike(c)]
+    next_count = results * len(containers) / len(children) if children else 0
+    return calls, results, _Frontier(next_count, _spread(containers, SAMPLE_SIZE))
+
+
+def _descend(frontier):
+    """Return the estimated containers visited by "**", and the frontier of all of them."""
+    if frontier.summaries is not None:
+        summaries = []
+        for summary, count in frontier.summaries:
+            share = count / summary["containers"]
+            summaries.extend((d, d["containers"] * share) for d in _descendants(summary))
+        frontier = _Frontier.of_summaries(summaries)
+        return frontier.count, frontier
+
+    if not frontier.samples:
+        return 0, _Frontier(0, [])
+    sizes, seen = [], []
+    for sample in frontier.samples:
+        size, sample_seen = _subtree(sample, SUBTREE_BUDGET // len(frontier.samples))
+        sizes.append(size)
+        seen.extend(sample_seen)
+    visited = frontier.count * sum(sizes) / len(sizes)
+    return visited, _Frontier(visited, _spread(seen, SAMPLE_SIZE))
+
+
+def explain(obj_or_stats, path, *args, match_with="glob", recursive_match_all=True, strict=False, **kwargs):
+    """Return how getitem_by_path(obj, path) would be resolved, with estimates of
+    its cost, as a dict. obj_or_stats is the document, or DocumentStats of it.
+    Other arguments are as for getitem_by_path.
+    """
+    stats = obj_or_stats if isinstance(obj_or_stats, DocumentStats) else None
+    style = match_style(match_with)
+    steps = list(path) if pathlike(path) else [path]
+    settings = dict(match_with=match_with, recursive_match_all=recursive_match_all)
+
+    if strict or not pathlike(path) and not _patterned(path, *args, **settings, **kwargs):
+        segments = [dict(segment=s, strategy="lookup", nodes=1, match_calls=0, results=1) for s in steps]
+        return dict(
+            path=steps,
+            strategy="lookup",
+            segments=segments,
+            estimated_nodes=len(steps),
+            estimated_match_calls=0,
+            estimated_results=1,
+        )
+
+    if recursive_match_all:
+        steps = _simplify_double_splats(steps)
+
+    if stats is not None:
+        frontier = _Frontier.of_summaries([(stats.root, 1)] if stats.root["containers"] else [])
+    else:
+        frontier = _Frontier(1, [obj_or_stats]) if pathlike(obj_or_stats) else _Frontier(0, [])
+
+    segments = []
+    results = 0
+    # The number of ColumnarRecords the last segment indexed, and their keys.
+    columns = None
+    descended = False
+    for segment in steps:
+        nodes = frontier.count
+        if recursive_match_all and segment == "**":
+            strategy, calls = "recursive_descent", 0
+            nodes, frontier = _descend(frontier)
+            results, columns, descended = frontier.count, None, True
+        else:
+            if segment == "*" and style in (GlobMatch, GlobOrRegexMatch):
+                strategy = "select_all"
+            elif isinstance(segment, Where):
+                strategy = "filter"
+            else:
+                strategy = "scan"
+
+            samples = frontier.samples
+            calls, results, frontier = _step(frontier, segment, strategy, style, args, kwargs)
+            if columns is not None:
+                count, keys = columns
+                strategy, nodes, calls = "column", count, 0 if strategy == "select_all" else count * keys
+            if samples and all(isinstance(s, ColumnarRecords) for s in samples):
+                columns = (nodes, sum(len(s.schema) for s in samples) / len(samples))
+            else:
+                columns = None
+            if descended:
+                # These containers were counted as visited by the "**" before this.
+                nodes, descended = 0, False
+
+        segments.append(dict(segment=segment, strategy=strategy, nodes=nodes, match_calls=calls, results=results))
+
+    for segment in segments:
+        for key in ("nodes", "match_calls", "results"):
+            segment[key] = round(segment[key])
+
+    return dict(
+        path=steps,
+        strategy="resolve",
+        segments=segments,
+        estimated_nodes=sum(s["nodes"] for s in segments),
+        estimated_match_calls=sum(s["match_calls"] for s in segments),
+        estimated_results=round(results),
+    )
@@ -0,0 +1,144 @@
+"""Filter segments, which match the keys of a container by the children they hold.
+
+A Where in a path matches each key of the container it's applied to whose child
+passes a test, like [?...] in jmespath. Children are tested as they're reached, so
+the ones that fail aren't descended into, and never have to be fetched and then
+filtered afterwards.
+
+A test is a function of the child, or a comparison of a field of the child, which
+may be a key or a path, with a value. Tests are combined with &, | and ~.
+
+>>> from deep_collections import getitem_by_path
+>>> obj = {"jobs": [
+...     {"id": 1, "status": "failed", "retries": 5},
+...     {"id": 2, "status": "ok", "retries": 0},
+...     {"id": 3, "status": "failed", "retries": 1},
+...     {"id": 4, "status": "failed", "retries": 4},
+... ]}
+>>> getitem_by_path(obj, ["jobs", Where("status", "==", "failed") & Where("retries", ">", 3), "id"])
+[1, 4]
+>>> getitem_by_path(obj, ["jobs", Where(lambda job: job["id"] % 2 == 0), "status"])
+['ok', 'failed']
+
+A child without the field, or whose field can't be compared with the value, fails
+the test. Where can't be used in paths that are matched one key at a time, as by
+deep_collections.patterns, since those never see the children.
+"""
+import operator
+
+from .columnar import ColumnarRecords
+from .traversal import lookup_by_path
+from .utils import pathlike
+
+OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "in": lambda field, value: field in value,
+    "not in": lambda field, value: field not in value,
+    "contains": operator.contains,
+}
+
+_MISSING = object()
+
+
+class Where:
+    """A path segment that matches the keys whose children pass a test.
+
+    Where(test) calls test(child). Where(field, op, value) compares the field of the
+    child with value by op, one of OPERATORS. Where(field) checks that the field is
+    there, and truthy.
+    """
+
+    def __init__(self, test, op=None, value=_MISSING):
+        if callable(test) and op is None:
+            self._test = test
+            self._key = (test,)
+            self.field = None
+            return
+
+        if op is not None and op not in OPERATORS:
+            raise ValueError(f"Unknown operator {op!r}. Use one of {list(OPERATORS)}")
+        if (op is None) != (value is _MISSING):
+            raise ValueError("Give both an operator and a value to compare with, or neither")
+        self.field = test
+        self.op = op
+        self.value = value
+        self._compare = OPERATORS[op] if op is not None else None
+        self._test = self._test_field
+        self._key = (test, op, value)
+
+    def _field_of(self, child):
+        field = self.field
+        try:
+            return lookup_by_path(child, field) if pathlike(field) else lookup_by_path(child, [field])
+        except (KeyError, IndexError, TypeError, AttributeError):
+            return _MISSING
+
+    def _passes(self, field):
+        if field is _MISSING:
+            return False
+        if self._compare is None:
+            return bool(field)
+        try:
+            return bool(self._compare(field, self.value))
+        except TypeError:  # e.g. None > 3
+            return False
+
+    def _test_field(self, child):
+        return self._passes(self._field_of(child))
+
+    def __call__(self, child):
+        """Return True if child passes the test."""
+        return bool(self._test(child))
+
+    def select(self, obj, keys, lookup):
+        """Return the keys of obj whose children pass the test. ColumnarRecords are
+        tested by column, without building each record.
+        """
+        if isinstance(obj, ColumnarRecords) and not pathlike(self.field) and self.field in obj.columns:
+            column = obj.columns[self.field]
+            return [key for key in keys if self._passes(column[key])]
+        return [key for key in keys if self(lookup(obj, key))]
+
+    def __and__(self, other):
+        return _Combined(lambda child: self(child) and other(child), ("&", self, other))
+
+    def __or__(self, other):
+        return _Combined(lambda child: self(child) or other(child), ("|", self, other))
+
+    def __invert__(self):
+        return _Combined(lambda child: not self(child), ("~", self))
+
+    # Equal Wheres are equal segments, so DeepCollection can cache their queries.
+    def __eq__(self, other):
+        if not isinstance(other, Where):
+            return NotImplemented
+        return self._key == other._key
+
+    def __hash__(self):
+        return hash(self._key)
+
+    def __repr__(self):
+        if self.field is None:
+            return f"Where({self._test!r})"
+        if self.op is None:
+            return f"Where({self.field!r})"
+        return f"Where({self.field!r}, {self.op!r}, {self.value!r})"
+
+
+class _Combined(Where):
+    """Wheres combined by &, | or ~."""
+
+    def __init__(self, test, key):
+        super().__init__(test)
+        self._key = key
+
+    def __repr__(self):
+        if self._key[0] == "~":
+            return f"~{self._key[1]!r}"
+        op, left, right = self._key
+        return f"({left!r} {op} {right!r})"
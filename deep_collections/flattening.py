@@ -0,0 +1,128 @@
+"""Convert documents to and from flat maps of {path: value}.
+
+flatten walks a document once, taking each value as it's reached, rather than
+matching every key against a pattern and then looking each path up again, as
+paths_to_key(obj, "*") and getitem_by_path_strict would. unflatten builds a document
+back from such a map, making each dict once, rather than walking from the top for
+each path as set_by_path would.
+
+>>> flat = flatten({"a": {"b": [1, 2]}, "c": {}})
+>>> flat
+{('a', 'b', 0): 1, ('a', 'b', 1): 2, ('c',): {}}
+>>> unflatten(flat)
+{'a': {'b': [1, 2]}, 'c': {}}
+
+Containers are traversed as in the rest of deep_collections, including types
+registered with deep_collections.traversal, and empty ones are kept as leaves so
+they're made again by unflatten.
+"""
+from .traversal import strategy_of
+from .utils import pathlike
+
+_MISSING = object()
+
+
+def flatten(obj, leaves_only=True, path_type=tuple):
+    """Return {path: value} for every leaf in obj, in the order they're found. With
+    leaves_only False, containers are included too, before what's in them. Paths are
+    tuples, or are made by calling path_type with each tuple, which must return
+    something hashable.
+
+    >>> flatten({"a": [1, {"b": 2}]}, leaves_only=False)
+    {('a',): [1, {'b': 2}], ('a', 0): 1, ('a', 1): {'b': 2}, ('a', 1, 'b'): 2}
+    >>> flatten({"a": [1, {"b": 2}]}, path_type=lambda path: "/".join(map(str, path)))
+    {'a/0': 1, 'a/1/b': 2}
+    >>> flatten(1)
+    {(): 1}
+    """
+    rv = {}
+    strategy = strategy_of(obj)
+    if strategy is None:
+        rv[()] = obj
+    else:
+        _flatten(obj, strategy, (), rv, leaves_only)
+
+    if path_type is not tuple:
+        return {path_type(path): value for path, value in rv.items()}
+    return rv
+
+
+def _flatten(obj, strategy, prefix, rv, leaves_only):
+    for key, value in strategy.items(obj):
+        path = prefix + (key,)
+        child_strategy = strategy_of(value)
+        if child_strategy is None:
+            rv[path] = value
+        elif leaves_only:
+            size = len(rv)
+            _flatten(value, child_strategy, path, rv, leaves_only)
+            if len(rv) == size:  # empty
+                rv[path] = value
+        else:
+            rv[path] = value
+            _flatten(value, child_strategy, path, rv, leaves_only)
+
+
+def unflatten(mapping, lists=True):
+    """Return the document that mapping, of {path: value} as flatten returns, is of.
+
+    Dicts are made along each path, and made lists once they're built if their keys
+    are all the indexes of a list, unless lists is False. A path that's a key of
+    mapping, but not a tuple or list, is of that one key. A value at a path within
+    another path's value, as when flatten includes containers, replaces what was there.
+
+    >>> unflatten({("a", 0): 1, ("a", 1, "b"): 2})
+    {'a': [1, {'b': 2}]}
+    >>> unflatten({("a", 0): 1}, lists=False)
+    {'a': {0: 1}}
+    >>> unflatten({(): 1})
+    1
+    """
+    root = {}
+    # (parent, key, node) for each dict made, parents first, to make lists of them
+    # afterwards, from the bottom up.
+    made = []
+    made_ids = {id(root)}
+    # The parents of the last path, and the dict made for them. Siblings are usually
+    # next to each other, and then their parent isn't looked up again.
+    last_parents, last_node = (), root
+
+    for path, value in mapping.items():
+        if type(path) is not tuple:
+            path = tuple(path) if pathlike(path) else (path,)
+        if not path:
+            if len(mapping) > 1:
+                raise ValueError("The empty path is the whole document, so it can't be given with others.")
+            return value
+
+        parents = path[:-1]
+        if parents == last_parents:
+            node = last_node
+        else:
+            node = root
+            for key in parents:
+                child = node.get(key, _MISSING)
+                if child is _MISSING or id(child) not in made_ids:
+                    child = node[key] = {}
+                    made.append((node, key, child))
+                    made_ids.add(id(child))
+                node = child
+            last_parents, last_node = parents, node
+        node[path[-1]] = value
+
+    if lists:
+        for parent, key, node in reversed(made):
+            if parent[key] is node and _indexed(node):
+                parent[key] = [node[i] for i in range(len(node))]
+        if _indexed(root):
+            return [root[i] for i in range(len(root))]
+    return root
+
+
+def _indexed(node):
+    """Return True if the keys of dict node are the indexes of a list of its length."""
+    size = len(node)
+    for key in node:
+        if type(key) is not int or not 0 <= key < size:
+            return False
+    return size > 0
@@ -0,0 +1,166 @@
+"""A journal of the changes made to a DeepCollection, to replay them onto another.
+
+DeepCollection.journal() starts recording every change made through the
+collection, as by setting or deleting a path, set_by_path and del_by_path on it, or
+its own methods like update, as an Entry. Entries are small and picklable, so a
+replica can be kept in sync by sending it only what changed, rather than the whole
+document.
+
+>>> from deep_collections import DeepCollection
+>>> dc = DeepCollection({"web": {"replicas": 2}})
+>>> journal = dc.journal()
+>>> dc["web", "replicas"] = 3
+>>> dc.update(db={"replicas": 1})
+>>> del dc["web", "replicas"]
+>>> entries = journal.drain()
+>>> entries
+[Entry(op='set', path=['web', 'replicas'], value=3), Entry(op='set', path=['db'], value={'replicas': 1}), Entry(op='delete', path=['web', 'replicas'], value=None)]
+>>> compact(entries)
+[Entry(op='set', path=['db'], value={'replicas': 1}), Entry(op='delete', path=['web', 'replicas'], value=None)]
+>>> replica = DeepCollection({"web": {"replicas": 2}})
+>>> replica.replay(entries)
+>>> replica == dc
+True
+
+Values are copied as they're recorded, so later changes to them don't change the
+entries. A change made through a DeepCollection spawned from the journaled one, as
+by dc["a"]["b"] = 1, doesn't know where it is in the document, so it's recorded as
+setting the whole document. So is deleting an item from the sequence at the top of
+a collection, since that moves the items after it. Deleting from a nested sequence
+is recorded as setting the sequence. Changes made to the document other than
+through the DeepCollection aren't recorded, nor are those made through one spawned
+from it before journal() was called, which doesn't know of the journal:
+
+>>> dc = DeepCollection({"web": {"replicas": 2}})
+>>> web = dc["web"]
+>>> journal = dc.journal()
+>>> web["replicas"] = 4
+>>> journal.drain()
+[]
+"""
+from collections import namedtuple
+from contextlib import nullcontext
+from copy import deepcopy
+
+from . import _patterned
+from . import getitem_by_path_strict
+
+Entry = namedtuple("Entry", "op path value")
+Entry.__doc__ = """A change to a DeepCollection. op is "set", with the value set at path, or
+"delete", with a value of None.
+"""
+
+
+class Journal:
+    """The changes made to a DeepCollection. See deep_collections.journal."""
+
+    def __init__(self, dc):
+        self.dc = dc
+        self.entries = []
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __repr__(self):
+        return f"Journal({self.entries!r})"
+
+    def _lock(self):
+        return self.dc._lock.write() if self.dc._lock is not None else nullcontext()
+
+    def _record(self, obj, path):
+        """Record a change at path in obj, the journaled DeepCollection or one spawned
+        from it.
+        """
+        dc = self.dc
+        if obj is not dc or _patterned(
+            path,
+            *dc.match_args,
+            match_with=dc.match_with,
+            recursive_match_all=dc.recursive_match_all,
+            **dc.match_kwargs,
+        ):
+            path = []
+        path = list(path)
+        try:
+            value = getitem_by_path_strict(dc._obj, path)
+        except (KeyError, IndexError):
+            self.entries.append(Entry("delete", path, None))
+        else:
+            self.entries.append(Entry("set", path, deepcopy(value)))
+
+    def drain(self):
+        """Return the entries recorded so far, and start again with none."""
+        with self._lock():
+            entries, self.entries = self.entries, []
+        return entries
+
+    def close(self):
+        """Stop recording changes."""
+        with self._lock():
+            if self.dc._journal is self:
+                self.dc._journal = None
+
+
+def compact(entries):
+    """Return entries without those overwritten by later ones, which set or delete the
+    same path or one that holds it.
+
+    >>> compact([Entry("set", ["a", "b"], 1), Entry("set", ["c"], 2), Entry("set", ["a"], {})])
+    [Entry(op='set', path=['c'], value=2), Entry(op='set', path=['a'], value={})]
+    """
+    covered = set()
+    kept = []
+    for entry in reversed(entries):
+        path = tuple(entry.path)
+        if not any(path[:n] in covered for n in range(len(path) + 1)):
+            kept.append(entry)
+        covered.add(path)
+    kept.reverse()
+    return kept
+
+
+def replay(dc, entries):
+    """Apply entries, compacted, to DeepCollection dc. Paths are taken literally, and
+    dicts are made along them as needed, as with set_by_path.
+    """
+    from . import _changed
+
+    for op, path, value in compact(entries):
+        if not path:
+            _replace(dc, deepcopy(value))
+            continue
+
+        # Change the top of dc through it, so it's kept in sync, and below that, what
+        # it wraps, so no DeepCollection is spawned for each step.
+        *parents, last = path
+        if op == "delete":
+            try:
+                branch = getitem_by_path_strict(dc._obj, parents) if parents else dc
+                del branch[last]
+            except (KeyError, IndexError):
+                # It may have been made since the entries overwritten by this one, and
+                # so never be in dc.
+                continue
+        else:
+            branch = dc
+            for key in parents:
+                container = dc._obj if branch is dc else branch
+                try:
+                    branch = container[key]
+                except (KeyError, IndexError):
+                    branch[key] = {}
+                    branch = container[key]
+            branch[last] = deepcopy(value)
+
+        # dc updates itself when changed directly.
+        if branch is not dc:
+            _changed(dc, path)
+
+
+def _replace(dc, value):
+    """Replace everything in dc with what's in value."""
+    dc.clear()
+    if hasattr(dc, "extend"):
+        dc.extend(value)
+    else:
+        dc.update(value)
@@ -0,0 +1,122 @@
+"""Bounds on how far the recursive searches descend, for paths_to_key, paths_to_value,
+values_for_key, and the "**" in a path.
+
+Without limits, a search descends into every child that's pathlike, including e.g.
+long lists of numbers that can never hold a match. Limits stop it early:
+
+- max_depth: don't descend below, or find anything deeper than, this many steps.
+- min_depth: don't find anything shallower than this many steps, though the search
+  still descends through those levels.
+- skip_types: don't descend into children of these types.
+- prune: a function of (path, child) that returns True to not descend into child.
+- cycles: "skip" or "raise" to track the objects searched by id(). An object that
+  refers back to one it's inside of isn't searched again, or raises CycleError. An
+  object referred to from many places, as by YAML anchors, is searched once, and
+  what's found in it is reused under each of the other places.
+
+Depth is the length of a found path, so for "**" it's counted from the object the
+whole path is resolved on, not from where the "**" is. skip_types and prune are only
+consulted before descending, so a skipped or pruned child can itself still be found.
+paths_to_key still matches its key, and paths_to_value compares it as a whole.
+
+>>> from deep_collections import paths_to_key
+>>> obj = {"x": 1, "a": {"x": 2, "b": {"x": 3}}, "blob": [{"x": 4}]}
+>>> list(paths_to_key(obj, "x", limits=Limits(max_depth=2)))
+[['x'], ['a', 'x']]
+>>> list(paths_to_key(obj, "x", limits=Limits(min_depth=2, skip_types=list)))
+[['a', 'x'], ['a', 'b', 'x']]
+>>> list(paths_to_key(obj, "x", limits=Limits(prune=lambda path, child: path == ["a"])))
+[['x'], ['blob', 0, 'x']]
+
+Without cycles, a shared object is searched again everywhere it's referred to, and
+one that contains itself is searched until RecursionError:
+
+>>> shared = {"x": 1}
+>>> loop = {"a": shared, "b": shared}
+>>> loop["c"] = loop
+>>> list(paths_to_key(loop, "x", limits=Limits(cycles="skip")))
+[['a', 'x'], ['b', 'x']]
+>>> list(paths_to_key(loop, "x", limits=Limits(cycles="raise")))
+Traceback (most recent call last):
+    ...
+deep_collections.limits.CycleError: ['c'] refers back to []
+"""
+from collections import namedtuple
+
+
+class CycleError(ValueError):
+    """Raised by a search with Limits(cycles="raise") on finding an object inside of
+    itself. path is where it was found, and target the path it was first found at.
+    """
+
+    def __init__(self, path, target):
+        super().__init__(f"{path} refers back to {target}")
+        self.path = path
+        self.target = target
+
+
+class Limits(namedtuple("Limits", "max_depth min_depth skip_types prune cycles", defaults=(None, 0, (), None, None))):
+    """Bounds for a recursive search. See deep_collections.limits."""
+
+    __slots__ = ()
+
+    def descends(self, path, child):
+        """Return True if the search should look inside child, found at path."""
+        if self.max_depth is not None and len(path) >= self.max_depth:
+            return False
+        if self.skip_types and isinstance(child, self.skip_types):
+            return False
+        return self.prune is None or not self.prune(path, child)
+
+    def reports(self, path):
+        """Return True if path is within the depths a search may find."""
+        return self.min_depth <= len(path) and (self.max_depth is None or len(path) <= self.max_depth)
+
+
+class _Visits:
+    """The objects being searched, and those already searched, by one search with
+    limits.cycles set, by id().
+    """
+
+    def __init__(self, limits):
+        self.cycles = limits.cycles
+        # prune is given whole paths, so a subtree's results may differ by where it is.
+        self.reuse = limits.prune is None
+        # Depth limits make a subtree's results differ by how deep it is.
+        self.by_depth = limits.max_depth is not None or limits.min_depth > 0
+        # The path of each object being searched, by id().
+        self.ancestors = {}
+        self.cycles_found = 0
+        # (obj, relative paths found) by id(), or by (id(), depth). obj is kept so its
+        # id can't be reused by another object.
+        self.found = {}
+
+    def search(self, obj, current, paths):
+        """Yield from paths, the search of obj at current, unless obj is being searched
+        already, or reuse the relative paths of an earlier search of obj.
+        """
+        target = self.ancestors.get(id(obj))
+        if target is not None:
+            if self.cycles == "raise":
+                raise CycleError(current, target)
+            self.cycles_found += 1
+            return
+
+        key = (id(obj), len(current)) if self.by_depth else id(obj)
+        if key in self.found:
+            for path in self.found[key][1]:
+                yield current + path
+            return
+
+        self.ancestors[id(obj)] = current
+        cycles_found = self.cycles_found
+        found = []
+        for path in paths:
+            found.append(path[len(current) :])  # noqa: E203
+            yield path
+        del self.ancestors[id(obj)]
+
+        # Inside a cycle, what's found depends on where the search came in, so only
+        # reuse what was found without one.
+        if self.reuse and self.cycles_found == cycles_found:
+            self.found[key] = (obj, found)
@@ -0,0 +1,261 @@
+"""Live results of queries on a DeepCollection, kept current as it's changed.
+
+DeepCollection.watch(path) returns a LiveQuery of the matches of path. Changes made
+through the DeepCollection, as by setting or deleting a path, set_by_path and
+del_by_path on it, or its own methods like update, keep it up to date. Rather than
+resolving every watched path again, the changed path is run through a PathPattern
+of all of the paths watched on the collection. Only the queries it could affect are
+updated, and only the part of the document under the changed path is searched.
+
+>>> from deep_collections import DeepCollection
+>>> dc = DeepCollection({"web": {"replicas": 2}, "db": {"replicas": 1}})
+>>> replicas = dc.watch(["**", "replicas"])
+>>> replicas.values()
+[2, 1]
+>>> dc["db", "replicas"] = 3
+>>> dc["cache"] = {"replicas": 5}
+>>> replicas.items()
+[(['web', 'replicas'], 2), (['db', 'replicas'], 3), (['cache', 'replicas'], 5)]
+
+Subscribers are called with the LiveQuery, and a list of Changes, after each change
+that affects it.
+
+>>> changes = []
+>>> _ = replicas.subscribe(lambda live, batch: changes.extend(batch))
+>>> del dc["web"]
+>>> changes
+[Change(kind='removed', path=['web', 'replicas'], value=2)]
+
+Matches found after the first are added at the end, so the order may differ from
+that of the same query run again. A query with a Where, or on a DeepCollection with
+limits, is run again in full on every change. So are all queries when a change is
+made through a DeepCollection spawned from the watched one, as by dc["a"]["b"] = 1,
+since where that is in the document isn't known. Changes made to the document other
+than through the DeepCollection aren't seen. When a "**" is followed by more than
+one key, a change below where it starts is searched again from there, since "**"
+isn't searched below a match of all of what follows it.
+"""
+from collections import namedtuple
+
+from . import _patterned
+from . import _resolve_items
+from . import _simplify_double_splats
+from . import getitem_by_path_strict
+from .filters import Where
+from .patterns import PathPattern
+from .traversal import strategy_for
+from .utils import pathlike
+
+Change = namedtuple("Change", "kind path value")
+Change.__doc__ = """A change to the matches of a LiveQuery. kind is "added", "removed" or
+"changed", as when the value at a matched path was replaced or changed within.
+"""
+
+_MISSING = object()
+
+
+class LiveQuery:
+    """The matches of a path on a DeepCollection, kept current. See deep_collections.live."""
+
+    def __init__(self, watches, path):
+        self.path = list(path) if pathlike(path) else [path]
+        self._watches = watches
+        self._subscribers = []
+        # Queries that can't be updated from the changed path alone are run again.
+        self.incremental = watches.dc.limits is None and not any(isinstance(p, Where) for p in self.path)
+        # The path as it's resolved, and as matched against changes.
+        self._path = list(self.path)
+        # "**" stops being searched below a match of all of what follows it, unless
+        # that's a single key, and it only matches the indexes of items that aren't
+        # collections. A change past where the "**" starts, at _anchor, may then change
+        # what it matches anywhere below there, so it's searched again from there.
+        self._anchor = None
+        self._splat_key = False
+        if watches.settings[1]["recursive_match_all"] and "**" in self._path:
+            self._path = _simplify_double_splats(self._path)
+            if "**" in self._path:
+                start = self._path.index("**")
+                tail = self._path[start + 1 :]  # noqa: E203
+                if len(tail) == 1 and not pathlike(tail[0]):
+                    self._splat_key = True
+                else:
+                    self._anchor = start
+        # Values by tuple(path), in the order they were found.
+        self._results = self._resolve(watches.dc._obj, self._path)
+
+    def _resolve(self, obj, path):
+        args, kwargs = self._watches.settings
+        items = _resolve_items(obj, list(path), *args, limits=self._watches.dc.limits, **kwargs)
+        return {tuple(p): v for p, v in items}
+
+    def paths(self):
+        """Return the paths that match."""
+        return [list(p) for p in self._results]
+
+    def values(self):
+        """Return the values at the paths that match."""
+        return list(self._results.values())
+
+    def items(self):
+        """Return (path, value) for each match."""
+        return [(list(p), v) for p, v in self._results.items()]
+
+    def __len__(self):
+        return len(self._results)
+
+    def __iter__(self):
+        return iter(self.values())
+
+    def __repr__(self):
+        return f"LiveQuery({self.path!r}, {self.values()!r})"
+
+    def subscribe(self, callback):
+        """Call callback(live_query, changes) after each change to the matches. Return
+        callback, so it can be passed to unsubscribe.
+        """
+        self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        self._subscribers.remove(callback)
+
+    def close(self):
+        """Stop keeping the matches current."""
+        self._watches.remove(self)
+
+    def _refresh(self):
+        """Run the query again in full."""
+        self._replace((), self._resolve(self._watches.dc._obj, self._path), ())
+
+    def _update(self, path, rests, prefixes):
+        """Update the matches after a change at path. rests are what's left of the
+        path of the query to match below path, and prefixes the lengths of the
+        matches that hold path.
+        """
+        root = self._watches.dc._obj
+        path = tuple(path)
+        holders = [path[:n] for n in prefixes]
+        if self._anchor is not None and len(path) > self._anchor:
+            self._reanchor(path[: self._anchor], holders)
+            return
+
+        if self._splat_key:
+            # What's left after the "**" itself is matched by what's left with it, as
+            # paths_to_key would match it.
+            rests = [rest for rest in rests if len(rest) != 1]
+        found = {}
+        if rests:
+            try:
+                obj = getitem_by_path_strict(root, path)
+            except (KeyError, IndexError, TypeError):
+                obj = _MISSING  # deleted
+            if obj is not _MISSING:
+                for rest in rests:
+                    if not rest:
+                        if self._splat_key and pathlike(obj) and self._in_sequence(root, path):
+                            continue
+                        found[path] = obj
+                    elif pathlike(obj):
+                        for p, v in self._resolve(obj, rest).items():
+                            found[path + p] = v
+        self._replace(path, found, holders)
+
+    def _reanchor(self, anchor, holders):
+        """Search again for the matches below anchor, where a "**" in the path starts."""
+        try:
+            obj = getitem_by_path_strict(self._watches.dc._obj, anchor)
+        except (KeyError, IndexError, TypeError):
+            obj = _MISSING
+        found = {}
+        if obj is not _MISSING and pathlike(obj):
+            for p, v in self._resolve(obj, self._path[self._anchor :]).items():  # noqa: E203
+                found[anchor + p] = v
+        self._replace(anchor, found, holders)
+
+    @staticmethod
+    def _in_sequence(root, path):
+        """Return True if what's at path in root is an item of a sequence."""
+        parent = getitem_by_path_strict(root, path[:-1])
+        return not strategy_for(type(parent)).mapping
+
+    def _replace(self, path, found, holders):
+        """Replace the matches at and below path with found, and note that the matches
+        at holders were changed within.
+        """
+        old = {p: v for p, v in self._results.items() if p[: len(path)] == path}
+        changes = []
+        for p, v in old.items():
+            if p not in found:
+                del self._results[p]
+                changes.append(Change("removed", list(p), v))
+        for p, v in found.items():
+            if p not in old:
+                changes.append(Change("added", list(p), v))
+            elif old[p] is not v or p == path:
+                changes.append(Change("changed", list(p), v))
+            self._results[p] = v
+        for p in holders:
+            if p in self._results:
+                changes.append(Change("changed", list(p), self._results[p]))
+
+        if changes:
+            for callback in list(self._subscribers):
+                callback(self, changes)
+
+
+class _Watches:
+    """The LiveQueries of a DeepCollection, and a PathPattern of their paths."""
+
+    def __init__(self, dc):
+        self.dc = dc
+        self.settings = (
+            dc.match_args,
+            dict(match_with=dc.match_with, recursive_match_all=dc.recursive_match_all, **dc.match_kwargs),
+        )
+        self.queries = []
+        self._compile()
+
+    def _compile(self):
+        self.incremental = [q for q in self.queries if q.incremental]
+        args, kwargs = self.settings
+        self.pattern = PathPattern([q._path for q in self.incremental], *args, **kwargs)
+
+    def add(self, path):
+        query = LiveQuery(self, path)
+        self.queries.append(query)
+        self._compile()
+        return query
+
+    def remove(self, query):
+        if query in self.queries:
+            self.queries.remove(query)
+            self._compile()
+
+    def changed(self, path):
+        """Update the queries after a change at path, or anywhere if it's None."""
+        args, kwargs = self.settings
+        if path is None or _patterned(path, *args, **kwargs):
+            for query in list(self.queries):
+                query._refresh()
+            return
+
+        for query in [q for q in self.queries if not q.incremental]:
+            query._refresh()
+
+        # Step through path, noting the queries that match a part of it, and then
+        # those that could still match below it.
+        pattern = self.pattern
+        prefixes = {}
+        states = pattern.start()
+        for n, key in enumerate(path):
+            for idx in pattern.accepted(states):
+                prefixes.setdefault(idx, []).append(n)
+            states = pattern.step(states, key)
+            if not states:
+                break
+        rests = {}
+        for idx, seg_idx in sorted(states):
+            rests.setdefault(idx, []).append(pattern.paths[idx][seg_idx:])
+
+        for idx in sorted(set(prefixes) | set(rests)):
+            self.incremental[idx]._update(path, rests.get(idx, ()), prefixes.get(idx, ()))
@@ -0,0 +1,109 @@
+import threading
+from contextlib import contextmanager
+
+
+class RWLock:
+    """A readers-writer lock. Many threads may hold the read lock at once, but the
+    write lock is exclusive.
+
+    Writers are preferred: once a writer is waiting, new readers queue behind it so
+    a steady stream of reads can't starve writes. Both sides are reentrant for the
+    thread that holds them, and the thread holding the write lock may also take
+    the read lock, which lets a write operation read its own tree mid-write.
+
+    >>> lock = RWLock()
+    >>> with lock.read():
+    ...     with lock.read():
+    ...         pass
+    >>> with lock.write():
+    ...     with lock.read():
+    ...         pass
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None
+        self._writer_depth = 0
+        self._writers_waiting = 0
+        self._local = threading.local()
+
+    def _read_depth(self):
+        return getattr(self._local, "depth", 0)
+
+    def holds_read(self):
+        """Return True if the current thread holds the read lock."""
+        return self._read_depth() > 0
+
+    def holds_write(self):
+        """Return True if the current thread holds the write lock."""
+        return self._writer == threading.get_ident()
+
+    def acquire_read(self):
+        depth = self._read_depth()
+        if depth or self.holds_write():
+            # Already inside a read or write on this thread; don't queue behind
+            # waiting writers or we'd deadlock against ourselves.
+            self._local.depth = depth + 1
+            return
+
+        with self._cond:
+            while self._writer is not None or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        self._local.depth = 1
+
+    def release_read(self):
+        depth = self._read_depth()
+        if depth <= 0:
+            raise RuntimeError("Cannot release a read lock that is not held.")
+        self._local.depth = depth - 1
+
+        if depth == 1 and not self.holds_write():
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    def acquire_write(self):
+        me = threading.get_ident()
+        if self._writer == me:
+            self._writer_depth += 1
+            return
+        if self._read_depth():
+            raise RuntimeError("Cannot upgrade a read lock to a write lock.")
+
+        with self._cond:
+            self._writers_waiting += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+            finally:
+                self._writers_waiting -= 1
+            self._writer = me
+            self._writer_depth = 1
+
+    def release_write(self):
+        if not self.holds_write():
+            raise RuntimeError("Cannot release a write lock that is not held.")
+        self._writer_depth -= 1
+        if not self._writer_depth:
+            with self._cond:
+                self._writer = None
+                self._cond.notify_all()
+
+    @contextmanager
+    def read(self):
+        self.acquire_read()
+        try:
+            yield self
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self):
+        self.acquire_write()
+        try:
+            yield self
+        finally:
+            self.release_write()
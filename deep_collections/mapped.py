@@ -0,0 +1,359 @@
+"""Lazily parsed JSON and NDJSON documents backed by a memory-mapped file.
+
+open_mapped memory-maps a JSON file and indexes where every object and array starts
+and ends. The document is then exposed as read-only MappedObject and MappedArray
+views, which are ordinary Mapping and Sequence types that all of deep_collections
+can use.
+
+Nothing is parsed until it's accessed. The keys and value offsets of a container
+are scanned the first time it's used, jumping straight over any nested containers,
+and values are parsed straight from the mapped file. So a lookup only touches the
+pages of the file that hold what it reads. Since the file is mapped rather than
+read, those pages live in the OS page cache, which is shared by every process
+mapping the same file.
+
+The index is saved next to the file, e.g. data.json.dcindex, so that later opens,
+including from other processes, can load it rather than scan the file again. It's
+only a header and the offsets as raw int64s, so loading it can't run anything. It is
+rebuilt if the file's size or modification time change, or if it's not a valid index.
+
+>>> import json, tempfile, os
+>>> with tempfile.TemporaryDirectory() as tmp:
+...     path = os.path.join(tmp, "data.json")
+...     with open(path, "w") as f:
+...         json.dump({"a": [1, {"b": "c"}], "d": None}, f)
+...     doc = open_mapped(path)
+...     doc["a"][1]["b"], list(doc), doc == {"a": [1, {"b": "c"}], "d": None}
+('c', ['a', 'd'], True)
+"""
+import json
+import mmap
+import operator
+import os
+import re
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+from collections.abc import Sequence
+
+INDEX_SUFFIX = ".dcindex"
+INDEX_VERSION = 2
+
+# The magic, version, flags, file size and mtime, and number of containers, then the
+# starts and ends of the containers, all little-endian.
+_INDEX_MAGIC = b"DCIX"
+_INDEX_HEADER = struct.Struct("<4sHHqqq")
+_NDJSON_FLAG = 1
+
+# Bound on the number of containers whose scanned children are kept per document.
+CHILDREN_CACHE_SIZE = 4096
+
+# Everything up to the next bracket outside of a string.
+_CONTAINER_BODY = re.compile(rb'(?:[^"\[\]{}]+|"(?:[^"\\]|\\.)*")*', re.DOTALL)
+_WHITESPACE = re.compile(rb"[ \t\n\r]*")
+_SEPARATORS = re.compile(rb"[ \t\n\r,:]*")
+_STRING = re.compile(rb'"(?:[^"\\]|\\.)*"', re.DOTALL)
+_SCALAR = re.compile(rb'[^ \t\n\r,:\[\]{}"]+')
+
+# The container number of the synthetic array holding the lines of an NDJSON file.
+_LINES = -1
+
+
+class MappedIndex:
+    """Where the containers of a JSON document start and end.
+
+    Containers are numbered in the order they start, and container i spans
+    buf[starts[i]:ends[i]].
+    """
+
+    def __init__(self, starts, ends, ndjson=False):
+        self.starts = starts
+        self.ends = ends
+        self.ndjson = ndjson
+
+    @classmethod
+    def build(cls, buf, ndjson=False):
+        """Scan the JSON in buf (bytes, mmap, etc.) once to build its index."""
+        starts, ends = array("q"), array("q")
+        stack = []
+        pos = 0
+        while True:
+            # Strings and scalars are matched past in C. Only brackets stop here.
+            pos = _CONTAINER_BODY.match(buf, pos).end()
+            char = buf[pos : pos + 1]  # noqa: E203
+            if char in (b"{", b"["):
+                if not stack and starts and not ndjson:
+                    raise ValueError(f"Extra data at offset {pos}. Is this NDJSON?")
+                stack.append((len(starts), b"}" if char == b"{" else b"]"))
+                starts.append(pos), ends.append(-1)
+            elif char in (b"}", b"]"):
+                if not stack or stack[-1][1] != char:
+                    raise ValueError(f"Unexpected {char.decode()} at offset {pos}")
+                ends[stack.pop()[0]] = pos + 1
+            elif char == b'"':
+                raise ValueError(f"Unterminated string at offset {pos}")
+            else:
+                break
+            pos += 1
+
+        if stack:
+            raise ValueError("Unexpected end of document")
+
+        index = cls(starts, ends, ndjson)
+        if not ndjson:
+            start = _WHITESPACE.match(buf).end()
+            end = index.end_of(buf, start) if start < len(buf) else start
+            if _WHITESPACE.match(buf, end).end() != len(buf):
+                raise ValueError(f"Extra data at offset {end}. Is this NDJSON?")
+        return index
+
+    def dump(self, f, size, mtime):
+        """Write the index to binary file f, for a JSON file of size and mtime."""
+        flags = _NDJSON_FLAG if self.ndjson else 0
+        f.write(_INDEX_HEADER.pack(_INDEX_MAGIC, INDEX_VERSION, flags, size, mtime, len(self.starts)))
+        for offsets in (self.starts, self.ends):
+            if sys.byteorder == "big":
+                offsets = array("q", offsets)
+                offsets.byteswap()
+            offsets.tofile(f)
+
+    @classmethod
+    def load(cls, f, size, mtime):
+        """Load an index from binary file f, or return None if it isn't one of this
+        version, for a JSON file of size and mtime. Raise ValueError if it's invalid.
+        """
+        header = f.read(_INDEX_HEADER.size)
+        if len(header) != _INDEX_HEADER.size:
+            return None
+        magic, version, flags, index_size, index_mtime, count = _INDEX_HEADER.unpack(header)
+        if (magic, version, index_size, index_mtime) != (_INDEX_MAGIC, INDEX_VERSION, size, mtime):
+            return None
+        if flags & ~_NDJSON_FLAG or count < 0:
+            raise ValueError("Invalid index header")
+        if os.fstat(f.fileno()).st_size != _INDEX_HEADER.size + 2 * count * array("q").itemsize:
+            raise ValueError("Index is the wrong size")
+
+        starts, ends = array("q"), array("q")
+        starts.fromfile(f, count)
+        ends.fromfile(f, count)
+        if sys.byteorder == "big":
+            starts.byteswap()
+            ends.byteswap()
+        # Lookups bisect the starts, and slice the file by both.
+        if count:
+            in_file = starts[0] >= 0 and max(ends) <= size
+            if not in_file or not all(map(operator.lt, starts, ends)) or not all(map(operator.lt, starts, starts[1:])):
+                raise ValueError("Invalid index offsets")
+        return cls(starts, ends, bool(flags & _NDJSON_FLAG))
+
+    def container_at(self, offset):
+        """Return the number of the container starting at offset."""
+        i = bisect_left(self.starts, offset)
+        if i == len(self.starts) or self.starts[i] != offset:
+            raise ValueError(f"No container starts at offset {offset}")
+        return i
+
+    def end_of(self, buf, offset):
+        """Return the offset just past the value starting at offset."""
+        char = buf[offset : offset + 1]  # noqa: E203
+        if char in (b"{", b"["):
+            return self.ends[self.container_at(offset)]
+        match = (_STRING if char == b'"' else _SCALAR).match(buf, offset)
+        if not match:
+            raise ValueError(f"Expecting value at offset {offset}")
+        return match.end()
+
+
+class MappedDocument:
+    """A memory-mapped JSON file and its index."""
+
+    def __init__(self, buf, index):
+        self.buf = buf
+        self.index = index
+        self._children = {}
+
+    def value_at(self, offset):
+        """Return the value starting at offset, as a view if it's a container."""
+        char = self.buf[offset : offset + 1]  # noqa: E203
+        if char == b"{":
+            return MappedObject(self, self.index.container_at(offset))
+        if char == b"[":
+            return MappedArray(self, self.index.container_at(offset))
+        return json.loads(self.buf[offset : self.index.end_of(self.buf, offset)])  # noqa: E203
+
+    def children(self, container):
+        """Return the keys (None for arrays) and value offsets of a container."""
+        try:
+            return self._children[container]
+        except KeyError:
+            pass
+
+        if container == _LINES:
+            start, end, is_object = 0, len(self.buf), False
+        else:
+            start, end = self.index.starts[container] + 1, self.index.ends[container] - 1
+            is_object = self.buf[start - 1 : start] == b"{"  # noqa: E203
+
+        keys = [] if is_object else None
+        offsets = array("q")
+        pos = _SEPARATORS.match(self.buf, start).end()
+        while pos < end:
+            value_end = self.index.end_of(self.buf, pos)
+            if is_object and len(keys) == len(offsets):
+                keys.append(json.loads(self.buf[pos:value_end]))
+            else:
+                offsets.append(pos)
+            pos = _SEPARATORS.match(self.buf, value_end).end()
+
+        if len(self._children) >= CHILDREN_CACHE_SIZE:
+            self._children.clear()
+        self._children[container] = rv = (keys, offsets)
+        return rv
+
+    def root(self):
+        if self.index.ndjson:
+            return MappedArray(self, _LINES)
+        start = _WHITESPACE.match(self.buf).end()
+        if start == len(self.buf):
+            raise ValueError("Empty document")
+        return self.value_at(start)
+
+
+class _MappedContainer:
+    """Shared parts of the container views.
+
+    A view may also be made from another view of the same kind, which shares its
+    document. That lets DeepCollection subclass and initialize these like any other
+    collection.
+    """
+
+    def __init__(self, doc, container=0):
+        if isinstance(doc, _MappedContainer):
+            doc, container = doc._doc, doc._container
+        self._doc = doc
+        self._container = container
+
+    def _same(self, other):
+        return isinstance(other, _MappedContainer) and other._doc is self._doc and other._container == self._container
+
+    def __reduce__(self):
+        # The mapped file can't be pickled, so send the plain data instead.
+        if self._container == _LINES:
+            return (list, ([self._doc.value_at(offset) for offset in self._doc.children(_LINES)[1]],))
+        index = self._doc.index
+        return (json.loads, (self._doc.buf[index.starts[self._container] : index.ends[self._container]],))  # noqa: E203
+
+
+class MappedObject(_MappedContainer, Mapping):
+    """A read-only, lazily parsed view of a JSON object in a mapped file."""
+
+    _lookup = None
+
+    def _offsets_by_key(self):
+        if self._lookup is None:
+            # Later duplicate keys win, as with json.loads.
+            self._lookup = dict(zip(*self._doc.children(self._container)))
+        return self._lookup
+
+    def __getitem__(self, key):
+        return self._doc.value_at(self._offsets_by_key()[key])
+
+    def __iter__(self):
+        return iter(self._offsets_by_key())
+
+    def __len__(self):
+        return len(self._offsets_by_key())
+
+    def _items(self):
+        # Not through self[key], which a subclass like DeepCollection may override.
+        return ((key, self._doc.value_at(offset)) for key, offset in self._offsets_by_key().items())
+
+    def __eq__(self, other):
+        if self._same(other):
+            return True
+        return Mapping.__eq__(self, other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(dict(self._items()))
+
+
+class MappedArray(_MappedContainer, Sequence):
+    """A read-only, lazily parsed view of a JSON array in a mapped file."""
+
+    def _offsets(self):
+        return self._doc.children(self._container)[1]
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self._doc.value_at(offset) for offset in self._offsets()[idx]]
+        return self._doc.value_at(self._offsets()[idx])
+
+    def __iter__(self):
+        for offset in self._offsets():
+            yield self._doc.value_at(offset)
+
+    def __len__(self):
+        return len(self._offsets())
+
+    def __eq__(self, other):
+        if self._same(other):
+            return True
+        if isinstance(other, (list, tuple, Sequence)) and not isinstance(other, (str, bytes, bytearray)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr([self._doc.value_at(offset) for offset in self._offsets()])
+
+
+def open_mapped(path, ndjson=None, index_path=None, save_index=True):
+    """Memory-map the JSON file at path, and return its root as a lazy view.
+
+    If ndjson is None, files ending in .ndjson or .jsonl are treated as newline
+    delimited JSON, whose root is an array of the documents on each line.
+
+    The index is loaded from, or saved to, index_path, which defaults to the path
+    with ".dcindex" added. Pass save_index=False to never write it.
+    """
+    if ndjson is None:
+        ndjson = str(path).endswith((".ndjson", ".jsonl"))
+    if index_path is None:
+        index_path = f"{path}{INDEX_SUFFIX}"
+
+    with open(path, "rb") as f:
+        stat = os.fstat(f.fileno())
+        if stat.st_size:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:  # empty files can't be mapped
+            buf = b""
+
+    meta = {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+    index = None
+    try:
+        with open(index_path, "rb") as f:
+            index = MappedIndex.load(f, **meta)
+    except (OSError, EOFError, ValueError, struct.error):
+        # Missing, unreadable or corrupt. It's only a cache, so rebuild it.
+        pass
+
+    if index is None or index.ndjson != ndjson:
+        index = MappedIndex.build(buf, ndjson=ndjson)
+        if save_index:
+            tmp_path = f"{index_path}.{os.getpid()}.tmp"
+            try:
+                with open(tmp_path, "wb") as f:
+                    index.dump(f, **meta)
+                os.replace(tmp_path, index_path)
+            except OSError:  # e.g. a read-only directory, or a full disk. Work without saving.
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+
+    return MappedDocument(buf, index).root()
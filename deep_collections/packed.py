@@ -0,0 +1,354 @@
+"""A compact binary encoding of JSON-like documents that can be queried in place.
+
+pack turns a tree of dicts, lists, tuples and scalars into a single flat buffer.
+Each node is a small tagged header followed by its data, and containers hold a slot
+per child, so a lookup jumps straight to what it needs. A slot is the offset of the
+child's node or, for small ints, None, True and False, the value itself. Dict keys
+are interned in one table, so a key that's repeated across many records is only
+stored once.
+
+PackedMapping and PackedSequence are read-only views of the containers in a buffer.
+They decode only what is accessed, and share the buffer rather than copying any of
+it, so they can be used anywhere a dict or list is read, including every function
+in deep_collections. PackedDeepCollection is a DeepCollection of them.
+
+>>> buf = pack({"a": [1, {"b": "c"}], "d": None})
+>>> unpack(buf)
+{'a': [1, {'b': 'c'}], 'd': None}
+>>> dc = PackedDeepCollection(buf)
+>>> dc["a", 1, "b"], dc["*", 1, "b"]
+('c', 'c')
+"""
+import struct
+from bisect import bisect_left
+from collections.abc import Mapping
+from collections.abc import Sequence
+
+from . import DeepCollection
+
+MAGIC = b"DCPK"
+VERSION = 1
+
+# Buffer header: magic, version, offset of the key table, slot of the root.
+_HEADER = struct.Struct("<4sIQq")
+# Node header: tag, count or byte length.
+_NODE = struct.Struct("<BxxxI")
+_INT = struct.Struct("<q")
+_FLOAT = struct.Struct("<d")
+_OFFSET = struct.Struct("<Q")
+_SLOT = struct.Struct("<q")
+
+INT, BIGINT, FLOAT, STR, BYTES, DICT, LIST, TUPLE = range(8)
+
+# Nodes are 8 byte aligned, so the low 3 bits of a slot are free to say what it is.
+_SLOT_NODE, _SLOT_INT, _SLOT_CONSTANT = range(3)
+_CONSTANTS = (None, False, True)
+# The range of ints that fit in a slot alongside its tag.
+_SLOT_INT_MIN, _SLOT_INT_MAX = -(2**60), 2**60 - 1
+
+
+def _pad(out):
+    """Pad out to 8 byte alignment, so the offset arrays in it can be read directly."""
+    out.extend(b"\0" * (-len(out) % 8))
+
+
+class _Packer:
+    def __init__(self):
+        self.out = bytearray(_HEADER.size)
+        self.key_ids = {}
+        self.keys = []
+
+    def key_id(self, key):
+        # By type too, since e.g. 1 == True == 1.0 but they are different keys.
+        interned = (type(key), key)
+        if interned not in self.key_ids:
+            if not isinstance(key, (str, bytes, int, float)) and key is not None:
+                raise TypeError(f"Can't pack dict key of type '{type(key)}'")
+            self.key_ids[interned] = len(self.keys)
+            self.keys.append(key)
+        return self.key_ids[interned]
+
+    def write(self, obj):
+        """Write obj, and return its slot."""
+        if obj is None or obj is True or obj is False:
+            return _CONSTANTS.index(obj) << 3 | _SLOT_CONSTANT
+        if type(obj) is int and _SLOT_INT_MIN <= obj <= _SLOT_INT_MAX:
+            return obj << 3 | _SLOT_INT
+
+        out = self.out
+        offset = len(out)
+
+        if isinstance(obj, int):
+            try:
+                out += _NODE.pack(INT, 0) + _INT.pack(obj)
+            except struct.error:  # too big for 64 bits
+                data = obj.to_bytes((obj.bit_length() + 8) // 8, "little", signed=True)
+                out += _NODE.pack(BIGINT, len(data)) + data
+        elif isinstance(obj, float):
+            out += _NODE.pack(FLOAT, 0) + _FLOAT.pack(obj)
+        elif isinstance(obj, str):
+            data = obj.encode("utf-8", "surrogatepass")
+            out += _NODE.pack(STR, len(data)) + data
+        elif isinstance(obj, (bytes, bytearray)):
+            out += _NODE.pack(BYTES, len(obj)) + obj
+        elif isinstance(obj, Mapping):
+            self.write_dict(obj)
+        elif isinstance(obj, (list, tuple, Sequence)):
+            self.write_sequence(obj)
+        else:
+            raise TypeError(f"Can't pack object of type '{type(obj)}'")
+
+        _pad(out)
+        return offset
+
+    def write_dict(self, obj):
+        """Dicts are laid out as the header, then their children's offsets, key ids,
+        and lastly the key ids in sorted order with the positions they sort from,
+        for lookups by binary search.
+        """
+        out = self.out
+        items = list(obj.items())
+        ids = [self.key_id(k) for k, _ in items]
+        order = sorted(range(len(ids)), key=ids.__getitem__)
+
+        out += _NODE.pack(DICT, len(items))
+        slots = len(out)
+        out += bytes(8 * len(items))
+        out += struct.pack(f"<{len(ids)}I", *ids)
+        out += struct.pack(f"<{len(ids)}I", *(ids[i] for i in order))
+        out += struct.pack(f"<{len(ids)}I", *order)
+        _pad(out)
+
+        for i, (_, value) in enumerate(items):
+            _SLOT.pack_into(out, slots + 8 * i, self.write(value))
+
+    def write_sequence(self, obj):
+        out = self.out
+        items = list(obj)
+        out += _NODE.pack(TUPLE if isinstance(obj, tuple) else LIST, len(items))
+        slots = len(out)
+        out += bytes(8 * len(items))
+        for i, value in enumerate(items):
+            _SLOT.pack_into(out, slots + 8 * i, self.write(value))
+
+    def finish(self, root):
+        out = self.out
+        key_slots = [self.write(key) for key in self.keys]
+        table = len(out)
+        out += _OFFSET.pack(len(key_slots))
+        out += struct.pack(f"<{len(key_slots)}q", *key_slots)
+        _HEADER.pack_into(out, 0, MAGIC, VERSION, table, root)
+        return bytes(out)
+
+
+def pack(obj):
+    """Return obj packed into bytes."""
+    packer = _Packer()
+    return packer.finish(packer.write(obj))
+
+
+class PackedDocument:
+    """A packed buffer, with its key table decoded."""
+
+    def __init__(self, buf):
+        self.buf = buf
+        self.view = memoryview(buf).cast("B")
+        try:
+            magic, version, table, self.root_slot = _HEADER.unpack_from(self.view)
+        except struct.error:
+            magic = version = None
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a packed deep_collections buffer")
+
+        (count,) = _OFFSET.unpack_from(self.view, table)
+        key_slots = self.view[table + 8 : table + 8 + 8 * count].cast("q")  # noqa: E203
+        self.keys = [self.value(slot) for slot in key_slots]
+        # The ids of the keys equal to each. Keys are interned by type, so e.g. 1 and
+        # 1.0 have different ids, but a dict holds at most one of them, which looking
+        # up either should find, as with a dict.
+        self.key_ids = {}
+        for i, k in enumerate(self.keys):
+            self.key_ids.setdefault(k, []).append(i)
+
+    def value(self, slot):
+        """Return the value in a slot, as a view if it's a container."""
+        kind = slot & 7
+        if kind == _SLOT_INT:
+            return slot >> 3
+        if kind == _SLOT_CONSTANT:
+            return _CONSTANTS[slot >> 3]
+
+        offset = slot
+        tag, n = _NODE.unpack_from(self.view, offset)
+        data = offset + _NODE.size
+        if tag == DICT:
+            return PackedMapping(self, offset)
+        if tag in (LIST, TUPLE):
+            return PackedSequence(self, offset)
+        if tag == STR:
+            return str(self.view[data : data + n], "utf-8", "surrogatepass")  # noqa: E203
+        if tag == INT:
+            return _INT.unpack_from(self.view, data)[0]
+        if tag == FLOAT:
+            return _FLOAT.unpack_from(self.view, data)[0]
+        if tag == BYTES:
+            return bytes(self.view[data : data + n])  # noqa: E203
+        if tag == BIGINT:
+            return int.from_bytes(self.view[data : data + n], "little", signed=True)  # noqa: E203
+        raise ValueError(f"Unknown tag {tag} at offset {offset}")
+
+    def root(self):
+        return self.value(self.root_slot)
+
+    def release(self):
+        """Release the memoryview of the buffer, e.g. so shared memory can be closed.
+        Views of the document can't be used after this.
+        """
+        self.view.release()
+
+
+class _PackedContainer:
+    """Shared parts of the container views.
+
+    A view may also be made from another view of the same kind, which shares its
+    document. That lets DeepCollection subclass and initialize these like any other
+    collection.
+    """
+
+    def __init__(self, doc, offset=None):
+        if isinstance(doc, _PackedContainer):
+            doc, offset = doc._doc, doc._offset
+        self._doc = doc
+        self._offset = offset
+        self._len = _NODE.unpack_from(doc.view, offset)[1]
+        start = offset + _NODE.size
+        self._children = doc.view[start : start + 8 * self._len].cast("q")  # noqa: E203
+
+    def __len__(self):
+        return self._len
+
+    def _same(self, other):
+        return isinstance(other, _PackedContainer) and other._doc is self._doc and other._offset == self._offset
+
+    def __reduce__(self):
+        # Views can't be pickled, and the buffer may be shared memory, so send the data.
+        if self._offset == self._doc.root_slot:
+            return (open_packed, (bytes(self._doc.view),))
+        return (open_packed, (pack(self),))
+
+    __hash__ = None
+
+
+class PackedMapping(_PackedContainer, Mapping):
+    """A read-only view of a dict in a packed buffer."""
+
+    def _ids(self, i):
+        """Return the i-th array of key ids after the offsets: 0 in order, 1 sorted,
+        and 2 the positions of the sorted ids.
+        """
+        start = self._offset + _NODE.size + 8 * self._len + 4 * self._len * i
+        return self._doc.view[start : start + 4 * self._len].cast("I")  # noqa: E203
+
+    def __getitem__(self, key):
+        try:
+            key_ids = self._doc.key_ids[key]
+        except (KeyError, TypeError):
+            raise KeyError(key) from None
+
+        sorted_ids = self._ids(1)
+        for key_id in key_ids:
+            i = bisect_left(sorted_ids, key_id)
+            if i < self._len and sorted_ids[i] == key_id:
+                return self._doc.value(self._children[self._ids(2)[i]])
+        raise KeyError(key)
+
+    def __iter__(self):
+        keys = self._doc.keys
+        for key_id in self._ids(0):
+            yield keys[key_id]
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def _items(self):
+        # Not through self[key], which a subclass like DeepCollection may override.
+        keys, value = self._doc.keys, self._doc.value
+        return ((keys[key_id], value(slot)) for key_id, slot in zip(self._ids(0), self._children))
+
+    def __eq__(self, other):
+        if self._same(other):
+            return True
+        return Mapping.__eq__(self, other)
+
+    def __repr__(self):
+        return repr(dict(self._items()))
+
+
+class PackedSequence(_PackedContainer, Sequence):
+    """A read-only view of a list or tuple in a packed buffer."""
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self._doc.value(slot) for slot in self._children[idx]]
+        return self._doc.value(self._children[idx])
+
+    def __iter__(self):
+        value = self._doc.value
+        for slot in self._children:
+            yield value(slot)
+
+    def __eq__(self, other):
+        if self._same(other):
+            return True
+        if isinstance(other, (list, tuple, Sequence)) and not isinstance(other, (str, bytes, bytearray)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+def _unpacked(value):
+    if isinstance(value, PackedMapping):
+        return {k: _unpacked(v) for k, v in value._items()}
+    if isinstance(value, PackedSequence):
+        seq = [_unpacked(v) for v in value]
+        return tuple(seq) if _NODE.unpack_from(value._doc.view, value._offset)[0] == TUPLE else seq
+    return value
+
+
+def unpack(buf):
+    """Return the object packed in buf, as plain dicts, lists, etc."""
+    return _unpacked(PackedDocument(buf).root())
+
+
+def open_packed(buf):
+    """Return a read-only view of the root of a packed buffer, without copying it."""
+    return PackedDocument(buf).root()
+
+
+class PackedDeepCollection(DeepCollection):
+    """A read-only DeepCollection over a packed buffer.
+
+    It may be given a packed buffer (bytes, memoryview, etc.), a view from one, or
+    any other object, which is packed first.
+    """
+
+    @classmethod
+    def _coerce(cls, obj):
+        if isinstance(obj, _PackedContainer):
+            return obj
+        if isinstance(obj, (bytes, bytearray, memoryview)) and bytes(obj[:4]) == MAGIC:
+            return open_packed(obj)
+        return open_packed(pack(obj))
+
+    def _spawn(self, obj, cls=None, **overrides):
+        if cls is None and not isinstance(obj, _PackedContainer):
+            # e.g. the list of results of a globbed path. Its items are still views, so
+            # rather than pack it all again, make it an ordinary DeepCollection.
+            cls = DeepCollection
+        return super()._spawn(obj, cls, **overrides)
@@ -0,0 +1,111 @@
+"""Process pool versions of the recursive searches, for very large documents.
+
+The document is split into shards (subtrees) in the same order the serial search
+visits them. Shards are searched in worker processes, and their results are merged
+in order, so the output is identical to the serial functions of the same name. With
+Limits(cycles=...), the search runs serially, in this process.
+
+>>> obj = {"a": {"x": 1}, "b": [{"x": 2}, {"y": 3}], "x": 4}
+>>> list(paths_to_key(obj, "x", workers=1))
+[['a', 'x'], ['b', 0, 'x'], ['x']]
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from . import getitem_by_path
+from . import getitem_by_path_strict
+from .planning import plan_shards
+from .planning import searches
+from .utils import pathlike
+
+# How many shards to aim for per worker, so one slow shard doesn't idle the others.
+SHARDS_PER_WORKER = 4
+
+# Per worker process state, set once by _init_worker rather than sent with each shard.
+_worker_query = None
+# The whole document, inherited by forked workers so shards need only send a path.
+_worker_document = None
+
+
+def _init_worker(search, query, args, kwargs):
+    global _worker_query
+    _worker_query = (searches[search], query, args, kwargs)
+
+
+def _search_shard(path, subobj=None):
+    func, query, args, kwargs = _worker_query
+    if subobj is None:
+        subobj = getitem_by_path_strict(_worker_document, path)
+    return list(func(subobj, query, *args, _current=list(path), **kwargs))
+
+
+def _parallel_search(search, obj, query, args, kwargs, workers):
+    if not pathlike(obj):
+        raise TypeError(f"First argument must be able to be deep, not type '{type(obj)}'")
+
+    workers = workers or os.cpu_count() or 1
+    limits = kwargs.get("limits")
+    # Seen objects are tracked across the whole search, so it can't be split up.
+    if workers <= 1 or limits is not None and limits.cycles:
+        yield from searches[search](obj, query, *args, **kwargs)
+        return
+
+    units = plan_shards(search, obj, query, args, kwargs, workers * SHARDS_PER_WORKER)
+
+    global _worker_document
+    ctx = multiprocessing.get_context()
+    # Forked workers already have the document, so only the shard path need be sent.
+    forked = ctx.get_start_method() == "fork"
+    if forked:
+        _worker_document = obj
+
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(search, query, args, kwargs),
+        ) as pool:
+            pending = []
+            for unit in units:
+                if unit[0] == "shard":
+                    _, path, subobj = unit
+                    future = pool.submit(_search_shard, path, None if forked else subobj)
+                    pending.append(("future", future))
+                else:
+                    pending.append(unit)
+
+            for kind, result in pending:
+                yield from result.result() if kind == "future" else result
+    finally:
+        if forked:
+            _worker_document = None
+
+
+def paths_to_key(obj, key, *args, workers=None, match_with="glob", recursive_match_all=True, **kwargs):
+    """Parallel version of deep_collections.paths_to_key. With `workers` (default:
+    the CPU count) at 1, this simply runs the serial search.
+    """
+    kwargs.update(match_with=match_with, recursive_match_all=recursive_match_all)
+    yield from _parallel_search("paths_to_key", obj, key, args, kwargs, workers)
+
+
+def paths_to_value(obj, value, *args, workers=None, match_with="glob", recursive_match_all=True, **kwargs):
+    """Parallel version of deep_collections.paths_to_value. With `workers` (default:
+    the CPU count) at 1, this simply runs the serial search.
+    """
+    kwargs.update(match_with=match_with, recursive_match_all=recursive_match_all)
+    yield from _parallel_search("paths_to_value", obj, value, args, kwargs, workers)
+
+
+def values_for_key(obj, key, *args, workers=None, match_with="glob", recursive_match_all=True, **kwargs):
+    """Parallel version of deep_collections.values_for_key. The paths are searched
+    for in parallel, and their values are then retrieved in this process.
+    """
+    for path in paths_to_key(
+        obj, key, *args, workers=workers, match_with=match_with, recursive_match_all=recursive_match_all, **kwargs
+    ):
+        yield getitem_by_path(
+            obj, path, *args, match_with=match_with, recursive_match_all=recursive_match_all, **kwargs
+        )
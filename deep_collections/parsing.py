@@ -0,0 +1,137 @@
+"""Paths written as strings, like "spec.template.containers[0].image".
+
+Paths are usually lists, and a str is always a single key. parse_path splits a str
+written in this syntax into the path it's of, and DeepCollection(path_sep=".")
+accepts such strs as paths wherever it's indexed:
+
+>>> parse_path("spec.template.containers[0].image")
+('spec', 'template', 'containers', 0, 'image')
+>>> parse_path('labels."app.kubernetes.io/name"')
+('labels', 'app.kubernetes.io/name')
+>>> parse_path(r"a\\.b.c")
+('a.b', 'c')
+>>> parse_path("a/b[-1]", sep="/")
+('a', 'b', -1)
+
+Keys are separated by sep. A key in quotes, or after a backslash, may have sep or
+any other character in it. `[n]` is an index, an int, and `["key"]` or `['key']`
+is a key. Anything else in brackets, like `[*]`, is a key as written. Keys are
+otherwise strs, so "a.0" is of the key "0", not the index 0, and patterns like "*"
+and "**" are kept as they are, to be matched as usual.
+
+Parsed paths are kept in an LRU cache of the last MAXSIZE strs parsed, so a path
+that's used again isn't parsed again.
+"""
+from functools import lru_cache
+
+MAXSIZE = 1024
+
+_QUOTES = "\"'"
+
+
+@lru_cache(maxsize=MAXSIZE)
+def parse_path(path, sep="."):
+    """Return the path, as a tuple of keys, that str path is of. See
+    deep_collections.parsing.
+
+    >>> parse_path("a..b"), parse_path("a[0][1]"), parse_path("")
+    (('a', '', 'b'), ('a', 0, 1), ('',))
+    """
+    if not sep or sep[0] in "[]\\" + _QUOTES:
+        raise ValueError(f"Can't separate keys with {sep!r}")
+
+    keys = []
+    # The characters of the key being read, or None between keys.
+    key = None
+    # Whether a key is due, as at the start or after sep, so that sep again, or the
+    # end, gives an empty key.
+    expect_key = True
+    i, end = 0, len(path)
+    while i < end:
+        char = path[i]
+        if path.startswith(sep, i):
+            if key is not None:
+                keys.append("".join(key))
+            elif expect_key:
+                keys.append("")
+            key, expect_key = None, True
+            i += len(sep)
+        elif char == "[":
+            if key is not None:
+                keys.append("".join(key))
+                key = None
+            i = _bracket(path, i, keys)
+            if i < end and path[i] != "[" and not path.startswith(sep, i):
+                raise ValueError(f"Expected {sep!r} or [ after ] at {i - 1} in {path!r}")
+            expect_key = False
+        else:
+            key = [] if key is None else key
+            if char == "\\":
+                if i + 1 == end:
+                    raise ValueError(f"Nothing to escape at the end of {path!r}")
+                key.append(path[i + 1])
+                i += 2
+            elif char in _QUOTES:
+                close = _closing(path, i)
+                key.append(_unescape(path[i + 1 : close]))  # noqa: E203
+                i = close + 1
+            else:
+                key.append(char)
+                i += 1
+
+    if key is not None:
+        keys.append("".join(key))
+    elif expect_key:
+        keys.append("")
+    return tuple(keys)
+
+
+def _bracket(path, start, keys):
+    """Add the key in the brackets at start in path to keys, and return the index
+    after them.
+    """
+    if path[start + 1 : start + 2] in tuple(_QUOTES):  # noqa: E203
+        close = _closing(path, start + 1)
+        if path[close + 1 : close + 2] != "]":  # noqa: E203
+            raise ValueError(f"Expected ] after the key at {close} in {path!r}")
+        keys.append(_unescape(path[start + 2 : close]))  # noqa: E203
+        return close + 2
+
+    close = path.find("]", start + 1)
+    if close == -1:
+        raise ValueError(f"Unclosed [ at {start} in {path!r}")
+    inner = path[start + 1 : close]  # noqa: E203
+    try:
+        keys.append(int(inner))
+    except ValueError:
+        keys.append(inner)
+    return close + 1
+
+
+def _closing(path, start):
+    """Return the index of the quote that closes the one at start in path."""
+    quote = path[start]
+    i = start + 1
+    while i < len(path):
+        if path[i] == "\\":
+            i += 2
+        elif path[i] == quote:
+            return i
+        else:
+            i += 1
+    raise ValueError(f"Unclosed {quote} at {start} in {path!r}")
+
+
+def _unescape(text):
+    """Return text without the backslashes that escape its characters."""
+    if "\\" not in text:
+        return text
+    chars = []
+    escaped = False
+    for char in text:
+        if char == "\\" and not escaped:
+            escaped = True
+            continue
+        chars.append(char)
+        escaped = False
+    return "".join(chars)
@@ -0,0 +1,118 @@
+"""Compiled path patterns that can be matched one key at a time.
+
+The path functions in deep_collections resolve a path against an object they can
+see all of. Sometimes the keys arrive one at a time instead, as when streaming a
+file, or when checking a single changed path against many saved queries. A
+PathPattern compiles one or more paths into a small automaton for that.
+
+Each state is a (pattern index, segment index) pair. `step` consumes one key, and
+a set of states that includes the end of a pattern means the keys seen so far are
+a match for that pattern. An empty set of states means nothing deeper can match.
+
+>>> pattern = PathPattern([["a", "**", "?d"], ["b", 0]])
+>>> states = pattern.step(pattern.start(), "a")
+>>> pattern.accepts(states)
+False
+>>> states = pattern.step(pattern.step(states, "x"), "xd")
+>>> pattern.accepts(states)
+True
+>>> pattern.step(pattern.start(), "c")
+frozenset()
+"""
+from . import _simplify_double_splats
+from .matching import match_style
+from .utils import pathlike
+
+
+# Bound on the number of memoized steps kept by a PathPattern.
+STEP_CACHE_SIZE = 4096
+
+
+def _simplified(path, recursive_match_all):
+    path = list(path) if pathlike(path) else [path]
+    if recursive_match_all:
+        path = _simplify_double_splats(path)
+    return tuple(path)
+
+
+class PathPattern:
+    def __init__(self, paths, *args, match_with="glob", recursive_match_all=True, **kwargs):
+        self.paths = [_simplified(p, recursive_match_all) for p in paths]
+        self.match_func = match_style(match_with).match
+        self.match_args = args
+        self.match_kwargs = kwargs
+        self.recursive_match_all = recursive_match_all
+        self._steps = {}
+        self._start = self._closure((i, 0) for i in range(len(self.paths)))
+
+    def _is_double_splat(self, pattern_idx, seg_idx):
+        return self.recursive_match_all and self.paths[pattern_idx][seg_idx] == "**"
+
+    def _closure(self, states):
+        """Add the states reachable by letting a "**" match zero keys."""
+        rv = set()
+        for pattern_idx, seg_idx in states:
+            rv.add((pattern_idx, seg_idx))
+            path = self.paths[pattern_idx]
+            while seg_idx < len(path) and self._is_double_splat(pattern_idx, seg_idx):
+                seg_idx += 1
+                rv.add((pattern_idx, seg_idx))
+        return frozenset(rv)
+
+    def start(self):
+        """Return the states for the root, before any key has been consumed."""
+        return self._start
+
+    def step(self, states, key):
+        """Return the states after consuming key from the given states."""
+        # Include the type, since e.g. 1 == True == 1.0 but they may not match alike.
+        cache_key = (states, type(key), key)
+        try:
+            return self._steps[cache_key]
+        except KeyError:
+            pass
+        except TypeError:  # unhashable key
+            return self._step(states, key)
+
+        rv = self._step(states, key)
+        if len(self._steps) >= STEP_CACHE_SIZE:
+            self._steps.clear()
+        self._steps[cache_key] = rv
+        return rv
+
+    def _step(self, states, key):
+        rv = set()
+        for pattern_idx, seg_idx in states:
+            path = self.paths[pattern_idx]
+            if seg_idx == len(path):
+                continue  # this pattern already ended
+            if self._is_double_splat(pattern_idx, seg_idx):
+                rv.add((pattern_idx, seg_idx))  # "**" consumes the key and keeps going
+            elif self.match_func(key, path[seg_idx], *self.match_args, **self.match_kwargs):
+                rv.add((pattern_idx, seg_idx + 1))
+        return self._closure(rv)
+
+    def accepts(self, states):
+        """Return True if any pattern has matched."""
+        return any(seg_idx == len(self.paths[pattern_idx]) for pattern_idx, seg_idx in states)
+
+    def continues(self, states):
+        """Return True if any deeper key could still lead to a match."""
+        return any(seg_idx < len(self.paths[pattern_idx]) for pattern_idx, seg_idx in states)
+
+    def accepted(self, states):
+        """Return the indices of the patterns that have matched, in order."""
+        return sorted({p for p, seg_idx in states if seg_idx == len(self.paths[p])})
+
+    def match(self, path):
+        """Return True if a concrete path matches any pattern.
+
+        >>> PathPattern([["*", "b"]]).match(["a", "b"])
+        True
+        """
+        states = self.start()
+        for key in path:
+            states = self.step(states, key)
+            if not states:
+                return False
+        return self.accepts(states)
@@ -0,0 +1,137 @@
+"""Split the recursive searches into ordered units of work.
+
+A search like paths_to_key(obj, key) can be broken up into the results found at
+the top of obj, and the same search run on each of its subtrees. Done in the order
+the serial search visits them, running the units in turn and concatenating their
+results gives exactly the serial output. This lets a search be spread across
+processes (see deep_collections.parallel), or paused between units (see
+deep_collections.aio).
+
+A unit is either ("paths", [path, ...]) for results already found, or
+("shard", path, subobj) for a subtree that still has to be searched.
+
+>>> obj = {"a": {"x": 1}, "x": 2}
+>>> list(plan_paths_to_key(obj, "x", (), {}, []))
+[('shard', ['a'], {'x': 1}), ('paths', [['x']])]
+"""
+from . import paths_to_key
+from . import paths_to_value
+from . import resolve_path
+from .filters import Where
+from .matching import match_style
+from .traversal import strategy_for
+from .utils import pathlike
+
+
+def _children(obj):
+    """Return an iterable of (key, child) pairs, and whether obj is mapping-like."""
+    strategy = strategy_for(type(obj))
+    return strategy.items(obj), strategy.mapping
+
+
+def _match_kwargs(kwargs):
+    return {k: v for k, v in kwargs.items() if k not in ("match_with", "recursive_match_all", "limits")}
+
+
+def _descends(limits, path, child):
+    return pathlike(child) and (limits is None or limits.descends(path, child))
+
+
+def _reports(limits, path):
+    return limits is None or limits.reports(path)
+
+
+def plan_paths_to_key(obj, key, args, kwargs, current):
+    """Yield the units of work for paths_to_key(obj, key) in serial order."""
+    limits = kwargs.get("limits")
+    if pathlike(key) and len(key) > 1:
+        resolve_kwargs = {k: v for k, v in kwargs.items() if k != "limits"}
+        resolved = [current + p for p in resolve_path(obj, key, *args, **resolve_kwargs)]
+        resolved = [p for p in resolved if _reports(limits, p)]
+        if resolved:
+            yield ("paths", resolved)
+            return
+        children, _ = _children(obj)
+        for k, v in children:
+            if _descends(limits, current + [k], v):
+                yield ("shard", current + [k], v)
+        return
+
+    if pathlike(key):
+        key = next(iter(key))
+
+    if isinstance(key, Where):
+        # Children are tested rather than keys, so any may pass, even in a sequence.
+        children, _ = _children(obj)
+        for k, v in children:
+            if _descends(limits, current + [k], v):
+                yield ("shard", current + [k], v)
+            if key(v) and _reports(limits, current + [k]):
+                yield ("paths", [current + [k]])
+        return
+
+    match_func = match_style(kwargs.get("match_with", "glob")).match
+    children, mapping = _children(obj)
+    for k, v in children:
+        if pathlike(v):
+            if _descends(limits, current + [k], v):
+                yield ("shard", current + [k], v)
+            if mapping and match_func(k, key) and _reports(limits, current + [k]):
+                yield ("paths", [current + [k]])
+        elif match_func(k, key) and _reports(limits, current + [k]):
+            yield ("paths", [current + [k]])
+
+
+def plan_paths_to_value(obj, value, args, kwargs, current):
+    """Yield the units of work for paths_to_value(obj, value) in serial order."""
+    match_func = match_style(kwargs.get("match_with", "glob")).match
+    match_kwargs = _match_kwargs(kwargs)
+    limits = kwargs.get("limits")
+    if match_func(obj, value, *args, **match_kwargs) and _reports(limits, current):
+        yield ("paths", [current])
+        return
+
+    children, mapping = _children(obj)
+    for k, v in children:
+        if pathlike(v):
+            if _descends(limits, current + [k], v):
+                yield ("shard", current + [k], v)
+            elif (pathlike(value) or not mapping) and match_func(v, value, *args, **match_kwargs):
+                # Not searched, so it's only matched as a whole, as the serial search does.
+                if _reports(limits, current + [k]):
+                    yield ("paths", [current + [k]])
+            if mapping and not pathlike(value) and match_func(v, value, *args, **match_kwargs):
+                if _reports(limits, current + [k]):
+                    yield ("paths", [current + [k]])
+        elif not pathlike(value) and match_func(v, value, *args, **match_kwargs) and _reports(limits, current + [k]):
+            yield ("paths", [current + [k]])
+
+
+planners = {"paths_to_key": plan_paths_to_key, "paths_to_value": plan_paths_to_value}
+searches = {"paths_to_key": paths_to_key, "paths_to_value": paths_to_value}
+
+
+def plan_shards(search, obj, query, args, kwargs, target):
+    """Return the ordered units of work for a search, splitting the largest shard
+    further until there are at least `target` shards or nothing is left to split.
+    """
+    planner = planners[search]
+    units = list(planner(obj, query, args, kwargs, []))
+
+    while True:
+        shards = [(len(u[2]), i) for i, u in enumerate(units) if u[0] == "shard" and _sized(u[2])]
+        if not shards or len(shards) >= target:
+            return units
+        size, i = max(shards)
+        if size <= 1:
+            return units
+        _, path, subobj = units[i]
+        units[i : i + 1] = planner(subobj, query, args, kwargs, path)  # noqa: E203
+
+
+def _sized(obj):
+    try:
+        len(obj)
+    except TypeError:
+        return False
+    return True
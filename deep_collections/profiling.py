@@ -0,0 +1,129 @@
+"""Counts and timings of the work done by queries, to see where a slow one spends its
+time.
+
+Inside `with profile() as stats:`, the deep_collections functions, and so the
+DeepCollection methods built on them, record what they do into stats:
+
+- nodes_visited: containers that keys were matched in, or that were searched.
+- keys_tested: keys of those containers considered by matched_keys.
+- matcher_calls: calls to each match style's match function, by style name.
+- paths_produced: paths resolved by a query, or yielded by a search.
+- paths_materialized: values looked up by a whole path, as after resolving it.
+- stage_seconds: time spent in each stage. Stages nest, e.g. "resolve" includes the
+  "matched_keys" it calls, so these add up to more than the total.
+
+>>> from deep_collections import getitem_by_path
+>>> with profile() as stats:
+...     getitem_by_path({"a": [{"b": 1}, {"b": 2}, {"c": 3}]}, ["a", "*", "b"])
+[1, 2]
+>>> stats.nodes_visited, stats.keys_tested, stats.paths_produced, dict(stats.matcher_calls)
+(5, 7, 2, {'GlobMatch': 4})
+
+Only work in the current thread, or asyncio task, is recorded, so work sent to other
+threads or processes, as by deep_collections.parallel, isn't. Outside of profile(),
+each instrumented function only checks whether it's profiling, so the cost is small.
+"""
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from .matching import match_style
+
+# The Stats being recorded into, or None when not profiling.
+_active_stats = ContextVar("deep_collections_profile", default=None)
+
+
+class Stats:
+    """Counters and stage timings recorded while profiling."""
+
+    def __init__(self):
+        self.nodes_visited = 0
+        self.keys_tested = 0
+        self.matcher_calls = Counter()
+        self.paths_produced = 0
+        self.paths_materialized = 0
+        self.stage_seconds = Counter()
+        # How deep each stage is nested in itself, so recursion isn't timed twice,
+        # and how many path producing stages are running at all.
+        self._depth = Counter()
+        self._producing = 0
+
+    def counted(self, match_with):
+        """Return the match function of a match style, counting its calls."""
+        style = match_style(match_with)
+        match, name, calls = style.match, style.__name__, self.matcher_calls
+
+        def wrapped(*args, **kwargs):
+            calls[name] += 1
+            return match(*args, **kwargs)
+
+        return wrapped
+
+    def timing(self, stage):
+        """Return True if stage is already being timed."""
+        return self._depth[stage] > 0
+
+    def timed(self, stage, func, *args, **kwargs):
+        """Return func(*args, **kwargs), timed as stage."""
+        if self._depth[stage]:
+            return func(*args, **kwargs)
+        self._depth[stage] += 1
+        start = perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.stage_seconds[stage] += perf_counter() - start
+            self._depth[stage] -= 1
+
+    def timed_paths(self, stage, paths):
+        """Yield from an iterable of paths, timing the work of producing each as stage.
+        Paths that reach code outside of every such stage are counted as produced.
+        """
+        paths = iter(paths)
+        while True:
+            nested = self._depth[stage]
+            self._depth[stage] += 1
+            self._producing += 1
+            start = perf_counter()
+            try:
+                path = next(paths)
+            except StopIteration:
+                return
+            finally:
+                if not nested:
+                    self.stage_seconds[stage] += perf_counter() - start
+                self._depth[stage] -= 1
+                self._producing -= 1
+
+            if not self._producing:
+                self.paths_produced += 1
+            yield path
+
+    def as_dict(self):
+        """Return the stats as plain dicts and numbers, e.g. to send to a metrics system."""
+        return dict(
+            nodes_visited=self.nodes_visited,
+            keys_tested=self.keys_tested,
+            matcher_calls=dict(self.matcher_calls),
+            paths_produced=self.paths_produced,
+            paths_materialized=self.paths_materialized,
+            stage_seconds=dict(self.stage_seconds),
+        )
+
+    def __repr__(self):
+        return f"Stats({self.as_dict()})"
+
+
+@contextmanager
+def profile(stats=None):
+    """Record the work of queries made within this, into stats or a new Stats.
+
+    Pass the same stats to several profile() blocks to add them up.
+    """
+    stats = Stats() if stats is None else stats
+    token = _active_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _active_stats.reset(token)
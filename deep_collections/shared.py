@@ -0,0 +1,140 @@
+"""Read-only documents shared between processes through shared memory.
+
+publish packs a document (see deep_collections.packed) into a block of shared
+memory. Other processes attach to it by name and query it in place, as a
+PackedDeepCollection, without copying or unpickling anything. However many
+processes attach, there is only the one copy of the document in memory.
+
+>>> with publish({"a": [1, {"b": "c"}]}) as doc:
+...     dc = attach(doc.name)  # e.g. in another process
+...     dc["a", 1, "b"], dc["**", "b"]
+('c', 'c')
+
+The publishing process owns the shared memory, and should unlink it when it's no
+longer needed, as leaving the `with` block above does. Attached processes map it
+read-only, and it stays mapped for as long as any of their collections of it do.
+
+Attaching relies on CPython internals before Python 3.13, where SharedMemory gained
+`track=False`: the private _posixshmem module on POSIX, to map the memory without
+registering it with the resource tracker, and SharedMemory._fd, to close it when
+its buffer can't be released yet. Without _posixshmem, as on Windows or other Python
+implementations, attaching falls back to SharedMemory, which may register it.
+"""
+import mmap
+import os
+import sys
+from multiprocessing.shared_memory import SharedMemory
+
+from .packed import MAGIC
+from .packed import pack
+from .packed import PackedDeepCollection
+from .packed import PackedDocument
+
+# SharedMemory(track=False) attaches without the resource tracker.
+_UNTRACKED = sys.version_info >= (3, 13)
+
+try:
+    from _posixshmem import shm_open
+except ImportError:  # Windows, or not CPython
+    shm_open = None
+
+
+class _SharedMemory(SharedMemory):
+    def __del__(self):
+        try:
+            self.close()
+        except BufferError:
+            # Views of the buffer are being freed along with this. The memory is
+            # unmapped once the last of them goes, but the file descriptor is ours.
+            # _fd is private, so this does nothing where it doesn't exist.
+            if getattr(self, "_fd", -1) >= 0:
+                os.close(self._fd)
+                self._fd = -1
+
+
+def _map_shared_memory(name):
+    """Return a read-only map of the named shared memory, and an object to close it by.
+
+    Attaching with SharedMemory registers it with this process's resource tracker,
+    which can unlink it from under the publisher when this process exits. So where
+    SharedMemory can't be told not to, on POSIX this maps it directly.
+    """
+    if _UNTRACKED:
+        shm = _SharedMemory(name=name, track=False)
+        return shm.buf.toreadonly(), shm
+    if shm_open is None:
+        shm = _SharedMemory(name=name)
+        return shm.buf.toreadonly(), shm
+
+    fd = shm_open("/" + name.lstrip("/"), os.O_RDONLY)
+    try:
+        buf = mmap.mmap(fd, os.fstat(fd).st_size, access=mmap.ACCESS_READ)
+    finally:
+        os.close(fd)
+    return buf, buf
+
+
+class SharedDocument(PackedDocument):
+    """A packed document in shared memory, as published or attached to by name."""
+
+    def __init__(self, name=None, shm=None):
+        if shm is None:
+            buf, self._closer = _map_shared_memory(name)
+        else:
+            buf, self._closer = shm.buf, shm
+        self.name = shm.name if shm else name
+        self.shm = shm
+        super().__init__(buf)
+
+    def collection(self, **kwargs):
+        """Return a PackedDeepCollection of the document, with the given settings."""
+        return PackedDeepCollection(self.root(), **kwargs)
+
+    def close(self):
+        """Close this process's access to the document. This raises BufferError while
+        any of its collections are still in use.
+        """
+        self.release()
+        self._closer.close()
+
+    def unlink(self):
+        """Free the shared memory once every process has closed it. Only the publisher
+        should do this.
+        """
+        (self.shm or SharedMemory(name=self.name)).unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        if self.shm is not None:
+            self.unlink()
+
+
+def publish(obj, name=None):
+    """Pack obj into new shared memory, and return it as a SharedDocument. obj may
+    also be an already packed buffer.
+
+    The shared memory gets a random name unless one is given.
+    """
+    if isinstance(obj, (bytes, bytearray, memoryview)) and bytes(obj[:4]) == MAGIC:
+        buf = obj
+    else:
+        buf = pack(obj)
+
+    shm = _SharedMemory(name=name, create=True, size=len(buf))
+    try:
+        shm.buf[: len(buf)] = buf
+        return SharedDocument(shm=shm)
+    except BaseException:
+        shm.close()
+        shm.unlink()
+        raise
+
+
+def attach(name, **kwargs):
+    """Return a read-only PackedDeepCollection of the document published by name.
+    Other arguments are as for DeepCollection.
+    """
+    return SharedDocument(name).collection(**kwargs)
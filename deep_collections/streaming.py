@@ -0,0 +1,243 @@
+"""Query a JSON file as it streams by, without loading the whole document.
+
+stream_query reads a JSON file in chunks, keeping track of the path to where it is
+in the document. Wherever the path matches one of the given path patterns, that
+value is parsed and yielded as a (path, value) pair. Everything else is scanned
+past without building any Python objects, so memory use is bounded by the largest
+matching value rather than the size of the file.
+
+>>> import io
+>>> f = io.StringIO('{"a": {"b": 1, "c": [2, {"b": 3}]}, "b": 4}')
+>>> list(stream_query(f, ["**", "b"]))
+[(['a', 'b'], 1), (['a', 'c', 1, 'b'], 3), (['b'], 4)]
+
+Values are yielded as soon as they have been read in full, so a match nested inside
+another match is yielded first. Unlike the in-memory path functions, a "**" here
+always matches at every depth, even below an earlier match of the same pattern.
+"""
+import codecs
+import json
+import re
+
+from .patterns import PathPattern
+from .utils import pathlike
+
+CHUNK_SIZE = 1 << 16
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_STRING = re.compile(r'"(?:[^"\\]|\\.)*"', re.DOTALL)
+_SCALAR = re.compile(r"[^\s,:\[\]{}\"]+")
+# Everything up to the next bracket outside of a string.
+_CONTAINER_BODY = re.compile(r'(?:[^"\[\]{}]+|"(?:[^"\\]|\\.)*")*', re.DOTALL)
+
+
+class _Tokenizer:
+    """Incrementally scan JSON text from a file object.
+
+    Scanning happens over a buffer that holds at least the current token. The
+    consumed part of the buffer is dropped as more is read, except for the spans of
+    any values being captured, which are kept so they can be parsed once complete.
+    """
+
+    def __init__(self, fileobj, chunk_size=CHUNK_SIZE):
+        self.fileobj = fileobj
+        self.chunk_size = chunk_size
+        self.decoder = None
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        # Each capture is [start position in buf, [text before buf]]
+        self.captures = []
+
+    def _read(self):
+        """Read more text into the buffer. Return False at the end of the file."""
+        while not self.eof:
+            chunk = self.fileobj.read(self.chunk_size)
+            if isinstance(chunk, bytes):
+                if self.decoder is None:
+                    self.decoder = codecs.getincrementaldecoder("utf-8-sig")()
+                self.eof = not chunk
+                chunk = self.decoder.decode(chunk, final=self.eof)
+            else:
+                self.eof = not chunk
+
+            if chunk:
+                for capture in self.captures:
+                    capture[1].append(self.buf[capture[0] : self.pos])  # noqa: E203
+                    capture[0] = 0
+                self.buf = self.buf[self.pos :] + chunk  # noqa: E203
+                self.pos = 0
+                return True
+        return False
+
+    def error(self, msg):
+        return json.JSONDecodeError(msg, self.buf, self.pos)
+
+    def peek(self):
+        """Skip whitespace and return the next character, or "" at the end."""
+        if self.pos < len(self.buf) and self.buf[self.pos] not in " \t\n\r":
+            return self.buf[self.pos]
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._read():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise self.error(f"Expecting '{char}'")
+        self.pos += 1
+
+    def _match_token(self, regex):
+        """Return a match of regex at the current position, reading more text until the
+        token can't be cut short by the end of the buffer.
+        """
+        while True:
+            match = regex.match(self.buf, self.pos)
+            if match and (match.end() < len(self.buf) or self.eof):
+                return match
+            if not self._read():
+                return regex.match(self.buf, self.pos)
+
+    def string(self):
+        """Scan a string, and return it decoded."""
+        match = self._match_token(_STRING)
+        if not match:
+            raise self.error("Unterminated string")
+        self.pos = match.end()
+        return json.decoder.scanstring(match.group(), 1)[0]
+
+    def skip_scalar(self):
+        if self.peek() == '"':
+            match = self._match_token(_STRING)
+            if not match:
+                raise self.error("Unterminated string")
+        else:
+            match = self._match_token(_SCALAR)
+            if not match:
+                raise self.error("Expecting value")
+        self.pos = match.end()
+
+    def skip_value(self):
+        """Scan past a whole value, without parsing any of it."""
+        char = self.peek()
+        if char not in "{[" or not char:
+            if not char or char in ",:}]":
+                raise self.error("Expecting value")
+            self.skip_scalar()
+            return
+
+        self.pos += 1
+        depth = 1
+        while depth:
+            self.pos = _CONTAINER_BODY.match(self.buf, self.pos).end()
+            if self.pos == len(self.buf) or self.buf[self.pos] == '"':
+                # The end of the buffer, or a string cut short by it.
+                if not self._read():
+                    raise self.error("Unexpected end of document")
+            elif self.buf[self.pos] in "{[":
+                depth += 1
+                self.pos += 1
+            else:
+                depth -= 1
+                self.pos += 1
+
+    def start_capture(self):
+        self.peek()
+        self.captures.append([self.pos, []])
+
+    def end_capture(self):
+        start, parts = self.captures.pop()
+        parts.append(self.buf[start : self.pos])  # noqa: E203
+        return "".join(parts)
+
+
+def _walk(tok, pattern, states, path):
+    """Yield the (path, value) matches in the value at the tokenizer's position."""
+    matched = pattern.accepts(states)
+    if matched:
+        tok.start_capture()
+        if not pattern.continues(states):
+            # Nothing inside can match as well, so scan to the end of the value quickly.
+            tok.skip_value()
+            yield list(path), json.loads(tok.end_capture())
+            return
+
+    char = tok.peek()
+    if char == "{":
+        tok.pos += 1
+        if tok.peek() == "}":
+            tok.pos += 1
+        else:
+            while True:
+                if tok.peek() != '"':
+                    raise tok.error("Expecting property name enclosed in double quotes")
+                key = tok.string()
+                tok.expect(":")
+                yield from _walk_child(tok, pattern, states, path, key)
+                char = tok.peek()
+                tok.pos += 1
+                if char == "}":
+                    break
+                if char != ",":
+                    raise tok.error("Expecting ',' delimiter")
+    elif char == "[":
+        tok.pos += 1
+        if tok.peek() == "]":
+            tok.pos += 1
+        else:
+            idx = 0
+            while True:
+                yield from _walk_child(tok, pattern, states, path, idx)
+                idx += 1
+                char = tok.peek()
+                tok.pos += 1
+                if char == "]":
+                    break
+                if char != ",":
+                    raise tok.error("Expecting ',' delimiter")
+    elif char:
+        tok.skip_scalar()
+    else:
+        raise tok.error("Expecting value")
+
+    if matched:
+        yield list(path), json.loads(tok.end_capture())
+
+
+def _walk_child(tok, pattern, states, path, key):
+    child_states = pattern.step(states, key)
+    if child_states:
+        path.append(key)
+        yield from _walk(tok, pattern, child_states, path)
+        path.pop()
+    else:
+        tok.skip_value()
+
+
+def stream_query(
+    fileobj, path_or_paths, *args, match_with="glob", recursive_match_all=True, chunk_size=CHUNK_SIZE, **kwargs
+):
+    """Yield (path, value) for every value in the JSON file that matches a path.
+
+    fileobj may be opened in text or binary mode. path_or_paths is a path as used
+    with getitem_by_path, or a list of them, and is matched the same way, with the
+    same match options.
+
+    >>> import io
+    >>> f = io.BytesIO(b'{"items": [{"id": 1, "x": {}}, {"id": 2}], "id": 0}')
+    >>> list(stream_query(f, [["items", "*", "id"], ["id"]]))
+    [(['items', 0, 'id'], 1), (['items', 1, 'id'], 2), (['id'], 0)]
+    """
+    if pathlike(path_or_paths) and path_or_paths and all(pathlike(p) for p in path_or_paths):
+        paths = path_or_paths
+    else:
+        paths = [path_or_paths]
+
+    pattern = PathPattern(paths, *args, match_with=match_with, recursive_match_all=recursive_match_all, **kwargs)
+    tok = _Tokenizer(fileobj, chunk_size)
+    yield from _walk(tok, pattern, pattern.start(), [])
+
+    if tok.peek():
+        raise tok.error("Extra data")
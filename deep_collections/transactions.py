@@ -0,0 +1,153 @@
+"""Changes to a DeepCollection made as one, with DeepCollection.transaction().
+
+Outside of a transaction, each change made through a DeepCollection updates its
+cache, journal and watched queries as it's made. In one, the changes are made
+directly to what the collection wraps, and noted, and everything else is only
+updated once, when the transaction is committed at the end of the block:
+
+>>> from deep_collections import DeepCollection
+>>> dc = DeepCollection({"web": {"replicas": 2}}, cache=True)
+>>> replicas = dc.watch(["**", "replicas"])
+>>> with dc.transaction():
+...     for name in ("a", "b", "c"):
+...         dc[name, "replicas"] = 1
+...     replicas.values()  # not yet updated
+[2]
+>>> replicas.values()
+[2, 1, 1, 1]
+
+If the block raises, the changes are undone, from a log of what each one replaced,
+rather than from a copy of the whole document taken beforehand:
+
+>>> with dc.transaction():
+...     dc["web", "replicas"] = 10
+...     del dc["a"]
+...     raise RuntimeError
+Traceback (most recent call last):
+...
+RuntimeError
+>>> dc._obj
+{'web': {'replicas': 2}, 'a': {'replicas': 1}, 'b': {'replicas': 1}, 'c': {'replicas': 1}}
+
+Reads in a transaction see its changes, but aren't cached. On a threadsafe
+DeepCollection, the write lock is held for the whole transaction. A transaction
+opened in another joins it, and is committed or undone with it. Only changes made
+through the DeepCollection, or those spawned from it, can be undone.
+"""
+import operator
+from copy import copy
+from functools import partial
+
+from . import _changed
+from . import DeepCollection
+
+
+class Transaction:
+    """The changes made in DeepCollection.transaction(), and how to undo them."""
+
+    def __init__(self, dc):
+        self.dc = dc
+        self.open = True
+        # (obj, path) of each change, for _changed once committed.
+        self.changed = []
+        # Callables that each undo a change, in the order they were made.
+        self._undo = []
+        # Containers copied before the first delete from each, by id.
+        self._copied = set()
+        # DeepCollections whose own items were changed along with what they wrap.
+        self._owners = []
+
+    def set(self, container, key, value, owner=None):
+        """Set container[key] to value, where container is what owner wraps, if given."""
+        try:
+            old = container[key]
+        except (KeyError, IndexError):
+            undo = partial(operator.delitem, container, key)
+        else:
+            undo = partial(operator.setitem, container, key, old)
+        container[key] = value
+        self._undo.append(undo)
+        if owner is not None:
+            super(DeepCollection, owner).__setitem__(key, value)
+            self._owned(owner)
+
+    def delete(self, container, key, owner=None):
+        """Delete container[key], where container is what owner wraps, if given."""
+        # Deleting may move what's after key, as in a list, so copy container once
+        # to put it back. Its items aren't copied, and changes to them are undone
+        # separately. The copy is only noted once the delete has worked, as one that
+        # raises changes nothing, and may be caught within the transaction.
+        first = id(container) not in self._copied
+        if first:
+            items = copy(container)
+        del container[key]
+        if first:
+            self._undo.append(partial(_restore, container, items))
+            self._copied.add(id(container))
+        if owner is not None:
+            super(DeepCollection, owner).__delitem__(key)
+            self._owned(owner)
+
+    def replaced(self, owner, obj):
+        """Note that owner now wraps a copy of obj, after one of its methods changed it."""
+        self._undo.append(partial(setattr, owner, "_obj", obj))
+        self._owned(owner)
+
+    def _owned(self, owner):
+        if not any(o is owner for o in self._owners):
+            self._owners.append(owner)
+
+    def commit(self):
+        """Update what depends on the DeepCollections changed, once for each path."""
+        self.open = False
+        for obj, paths in _outermost(self.changed):
+            for path in paths:
+                _changed(obj, path)
+
+    def rollback(self):
+        """Undo the changes, in the reverse order they were made. If undoing one
+        raises, the rest are still undone, and the first error is raised after.
+        """
+        self.open = False
+        undos = list(reversed(self._undo))
+        for owner in self._owners:
+            # Reset its own items, without going through its methods.
+            undos.append(lambda owner=owner: _restore(super(DeepCollection, owner), owner._obj))
+
+        error = None
+        for undo in undos:
+            try:
+                undo()
+            except Exception as e:
+                if error is None:
+                    error = e
+        if error is not None:
+            raise error
+
+
+def _restore(container, items):
+    """Put items back in container, in place."""
+    container.clear()
+    if hasattr(items, "keys"):
+        container.update(items)
+    else:
+        container.extend(items)
+
+
+def _outermost(changes):
+    """Return (obj, paths) for each obj in changes, without the paths that are within
+    others of the same obj.
+    """
+    by_obj = {}
+    for obj, path in changes:
+        by_obj.setdefault(id(obj), (obj, []))[1].append(tuple(path))
+
+    rv = []
+    for obj, paths in by_obj.values():
+        found = set(paths)
+        kept = []
+        for path in dict.fromkeys(paths):
+            if not any(path[:n] in found for n in range(len(path))):
+                kept.append(list(path))
+        rv.append((obj, kept))
+    return rv
@@ -0,0 +1,165 @@
+"""How to traverse each type of container, by type.
+
+A Strategy says how to list the (key, child) pairs of a container, its keys alone,
+and how to look up a child by key. It's also marked as being for a mapping, whose
+keys are names, or a sequence, whose keys are indexes. Strategies are registered by
+type, and found for a type by its method resolution order, as with
+functools.singledispatch, then cached. Types registered as None are leaves, like
+str, which is iterable but never searched into.
+
+Types that aren't registered are treated as they always have been: a mapping if
+they have `keys` and `items`, a sequence if they are iterable otherwise, and a leaf
+if not. Register a container type to give it a faster strategy, or to make a type
+that isn't iterable, like a protobuf message, searchable:
+
+>>> class Point:
+...     def __init__(self, x, y):
+...         self.x, self.y = x, y
+>>> register(Point, Strategy(lambda p: vars(p).items(), lookup=getattr))
+>>> from deep_collections import getitem_by_path, paths_to_key
+>>> list(paths_to_key({"a": [Point(1, 2)]}, "y"))
+[['a', 0, 'y']]
+>>> getitem_by_path({"a": [Point(1, 2)]}, ["a", 0, "*"])
+[1, 2]
+>>> unregister(Point)
+"""
+import operator
+from collections import deque
+from collections import namedtuple
+from collections import OrderedDict
+from collections import UserDict
+from collections import UserList
+from types import FunctionType
+
+_MISSING = object()
+
+
+class Strategy(namedtuple("Strategy", "items keys lookup mapping")):
+    """How to traverse a type of container. See deep_collections.traversal.
+
+    items(obj) returns the (key, child) pairs of obj, and keys(obj) its keys, which
+    are taken from items if not given. lookup(obj, key) returns a child.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, items, keys=None, lookup=operator.getitem, mapping=True):
+        if keys is None:
+
+            def keys(obj):
+                return [key for key, _ in items(obj)]
+
+        return super().__new__(cls, items, keys, lookup, mapping)
+
+
+def _indexes(obj):
+    return range(len(obj))
+
+
+MAPPING = Strategy(operator.methodcaller("items"), operator.methodcaller("keys"))
+SEQUENCE = Strategy(enumerate, _indexes, mapping=False)
+
+# Strategies by the type they were registered for, and by every type they've been
+# found for since the registry last changed.
+_registry = {
+    dict: MAPPING,
+    OrderedDict: MAPPING,
+    UserDict: MAPPING,
+    list: SEQUENCE,
+    tuple: SEQUENCE,
+    deque: SEQUENCE,
+    UserList: SEQUENCE,
+    str: None,
+    bytes: None,
+    bytearray: None,
+}
+_dispatch_cache = {}
+# Types that weren't registered, but found to be containers by having __iter__ or
+# __getitem__. Like ndarray, which can't iterate when it's 0-d, their instances may
+# still not be iterable, so strategy_of checks each.
+_probed = set()
+
+
+def register(cls, strategy):
+    """Traverse instances of cls, and of its subclasses, with strategy, or never
+    search into them if strategy is None.
+    """
+    _registry[cls] = strategy
+    _dispatch_cache.clear()
+    _probed.clear()
+
+
+def unregister(cls):
+    """Undo register(cls, ...)."""
+    del _registry[cls]
+    _dispatch_cache.clear()
+    _probed.clear()
+
+
+def _default_strategy(cls):
+    """Return the strategy for a type that isn't registered, going by whether iter()
+    would accept its instances.
+
+    Without __iter__, iter() falls back to __getitem__ only if it's for indexing a
+    sequence, as it is when a class defines it in Python. Types like NumPy's scalars
+    have a __getitem__ that iter() doesn't use, so they're leaves.
+    """
+    iter_method = getattr(cls, "__iter__", _MISSING)
+    if iter_method is None:
+        return None
+    if iter_method is _MISSING and not isinstance(getattr(cls, "__getitem__", None), FunctionType):
+        return None
+    # Mappings have both. DeepCollection has `items` even when it's a sequence.
+    return MAPPING if hasattr(cls, "keys") and hasattr(cls, "items") else SEQUENCE
+
+
+def strategy_for(cls):
+    """Return the Strategy to traverse instances of cls with, or None for a leaf.
+
+    >>> strategy_for(dict) is MAPPING, strategy_for(list) is SEQUENCE, strategy_for(str)
+    (True, True, None)
+    """
+    try:
+        return _dispatch_cache[cls]
+    except KeyError:
+        pass
+
+    for base in cls.__mro__:
+        if base in _registry:
+            strategy = _registry[base]
+            break
+    else:
+        strategy = _default_strategy(cls)
+        if strategy is not None:
+            _probed.add(cls)
+    _dispatch_cache[cls] = strategy
+    return strategy
+
+
+def strategy_of(obj):
+    """Return the Strategy to traverse obj with, or None if it's a leaf. This is
+    strategy_for(type(obj)), except that an instance of an unregistered type that
+    iter() doesn't accept is a leaf.
+
+    >>> strategy_of([1]) is SEQUENCE, strategy_of(1)
+    (True, None)
+    """
+    cls = type(obj)
+    try:
+        strategy = _dispatch_cache[cls]
+    except KeyError:
+        strategy = strategy_for(cls)
+    if strategy is not None and cls in _probed:
+        try:
+            iter(obj)
+        except TypeError:
+            return None
+    return strategy
+
+
+def lookup_by_path(obj, path):
+    """Return the child of obj at path, looking each step up by its strategy."""
+    for key in path:
+        strategy = strategy_for(type(obj))
+        obj = obj[key] if strategy is None else strategy.lookup(obj, key)
+    return obj
@@ -1,3 +1,8 @@
+from .traversal import _dispatch_cache
+from .traversal import _probed
+from .traversal import strategy_for
+
+
 def _stringlike(obj):
     """Return True if obj is an instance of str, bytes, or bytearray
     >>> _stringlike("a")
@@ -17,7 +22,8 @@ def pathlike(obj):
     so that an element can be arbitrary, like another collection.
 
     Since this is a simple check, there are false positives, but this works with
-    basic types.
+    basic types. It's decided by the type of obj, and types registered with
+    deep_collections.traversal are pathlike, whether they are iterable or not.
     >>> pathlike([1])
     True
     >>> pathlike({1:2})
@@ -27,12 +33,16 @@ def pathlike(obj):
     >>> pathlike("a")
     False
     """
-    if _stringlike(obj):
-        return False
-
+    cls = type(obj)
     try:
-        iter(obj)
-    except TypeError:
+        strategy = _dispatch_cache[cls]
+    except KeyError:
+        strategy = strategy_for(cls)
+    if strategy is None:
         return False
-
+    if cls in _probed:
+        try:
+            iter(obj)
+        except TypeError:
+            return False
     return True
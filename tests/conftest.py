@@ -1,4 +1,5 @@
 import inspect
+import pickle
 from abc import ABC
 from abc import abstractmethod
 from copy import deepcopy
@@ -42,6 +43,27 @@ class BaseTests(ABC):
         assert new_dc == dc
         assert type(new_dc._obj) == type(self.obj)  # noqa: E721
 
+    @pytest.mark.parametrize("protocol", range(pickle.HIGHEST_PROTOCOL + 1))
+    def test_pickle(self, dc, protocol):
+        new_dc = pickle.loads(pickle.dumps(dc, protocol))
+        assert new_dc == dc
+        assert type(new_dc) is type(dc)
+        assert type(new_dc._obj) is type(self.obj)  # noqa: E721
+
+        # Only a reference to the class is added to the size of the original object.
+        overhead = len(pickle.dumps(DeepCollection, protocol)) + 16
+        assert len(pickle.dumps(dc, protocol)) <= len(pickle.dumps(self.obj, protocol)) + overhead
+
+    def test_pickle_settings(self):
+        dc = DeepCollection(self.obj, match_with="regex", match_kwargs={"flags": 0}, strict=True, threadsafe=True)
+        new_dc = pickle.loads(pickle.dumps(dc))
+        assert new_dc == dc
+        assert new_dc.match_with == "regex"
+        assert new_dc.match_kwargs == {"flags": 0}
+        assert new_dc.strict is True
+        assert new_dc.threadsafe is True
+        assert new_dc._lock is not dc._lock
+
     def test_subclass(self):
         class Foo(DeepCollection):
             pass
@@ -0,0 +1,109 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from deep_collections import getitem_by_path
+from deep_collections import paths_to_key
+from deep_collections import paths_to_value
+from deep_collections import values_for_key
+from deep_collections.aio import aget_many
+from deep_collections.aio import apaths_to_key
+from deep_collections.aio import apaths_to_value
+from deep_collections.aio import avalues_for_key
+
+
+OBJ = {
+    "a": {"b": 0, "c": [{"b": 1}, {"d": {"b": 2}}]},
+    "b": [1, 2, {"b": 3, "e": [0, 1]}],
+    "xa": {"b": {"b": 4}},
+}
+
+
+def collect(agen):
+    async def main():
+        return [i async for i in agen]
+
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize("key", ["b", "?a", 0, ["?a", "b"], ["c", 1, "d"]])
+def test_apaths_to_key(key):
+    assert collect(apaths_to_key(OBJ, key, yield_every=2)) == list(paths_to_key(OBJ, key))
+
+
+@pytest.mark.parametrize("value", [0, 1, {"b": 4}, "[0-2]"])
+def test_apaths_to_value(value):
+    assert collect(apaths_to_value(OBJ, value, yield_every=2)) == list(paths_to_value(OBJ, value))
+
+
+def test_avalues_for_key():
+    assert collect(avalues_for_key(OBJ, "b", yield_every=2)) == list(values_for_key(OBJ, "b"))
+
+
+def test_executor():
+    with ThreadPoolExecutor(1) as executor:
+        assert collect(apaths_to_key(OBJ, "b", executor=executor)) == list(paths_to_key(OBJ, "b"))
+
+
+def test_aget_many():
+    paths = ["a", ["a", "c", 0], ["**", "b"], ["*", "*", "b"], "?a"]
+    expected = [getitem_by_path(OBJ, list(p) if isinstance(p, list) else p) for p in paths]
+    assert collect(aget_many(OBJ, paths, yield_every=1)) == expected
+    assert collect(aget_many(OBJ, [["nope"], ["b", 9]])) == [None, None]
+    assert collect(aget_many(OBJ, [["nope"]], "x")) == ["x"]
+
+
+def test_yields_to_loop():
+    """Other tasks get to run while a long search is in progress."""
+    obj = {f"k{i}": {"b": i} for i in range(100)}
+    ticks = []
+
+    async def ticker():
+        while True:
+            ticks.append(None)
+            await asyncio.sleep(0)
+
+    async def main():
+        task = asyncio.create_task(ticker())
+        await asyncio.sleep(0)
+        ticks.clear()
+        paths = [p async for p in apaths_to_key(obj, "b", yield_every=10)]
+        task.cancel()
+        return paths
+
+    assert len(asyncio.run(main())) == 100
+    assert len(ticks) >= 10
+
+
+def test_aget_many_executor():
+    paths = ["a", ["**", "b"], ["nope"]]
+    with ThreadPoolExecutor(1) as executor:
+        assert collect(aget_many(OBJ, paths, executor=executor)) == collect(aget_many(OBJ, paths))
+
+
+def test_aget_many_yields_without_matches():
+    """Other tasks get to run while a "**" that matches nothing is searched."""
+    obj = {f"k{i}": {f"j{j}": j for j in range(10)} for i in range(100)}
+    ticks = []
+
+    async def ticker():
+        while True:
+            ticks.append(None)
+            await asyncio.sleep(0)
+
+    async def main():
+        task = asyncio.create_task(ticker())
+        await asyncio.sleep(0)
+        ticks.clear()
+        values = [v async for v in aget_many(obj, [["**", "nope"]], yield_every=10)]
+        task.cancel()
+        return values
+
+    assert asyncio.run(main()) == [[]]
+    assert len(ticks) >= 10
+
+
+def test_not_deep():
+    with pytest.raises(TypeError):
+        collect(apaths_to_key(1, "a"))
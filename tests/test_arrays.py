@@ -0,0 +1,103 @@
+import pytest
+
+from deep_collections import DeepCollection
+from deep_collections import getitem_by_path
+from deep_collections.arrays import get_array
+from deep_collections.columnar import columnarize
+
+np = pytest.importorskip("numpy")
+
+
+SERIES = {"series": [{"value": i, "f": i / 2, "xy": [i, -i], "name": f"n{i}"} for i in range(2000)]}
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        [1, 2, 3],
+        [1.5, 2.5],
+        [1, 2.5, 3],
+        [True, False],
+        [1, True],
+        [1j, 2],
+        [2**70, 1],
+        [1, 2**70],
+        [1, "a"],
+        ["a", "b"],
+        [1, None],
+        [np.float32(1), np.float32(2)],
+        [[1, 2], [3, 4]],
+        [[1.5, 2], [3, 4]],
+        [[1, 2], [3]],
+        [{"a": 1}, {"a": 2}],
+    ],
+)
+def test_same_as_numpy_array(values):
+    obj = {"x": [{"v": v} for v in values]}
+    arr = get_array(obj, ["x", "*", "v"])
+    try:
+        expected = np.array(values)
+        if expected.dtype.kind not in "biufc":
+            expected = np.array(values, dtype=object)
+    except ValueError:
+        expected = np.array(values, dtype=object)
+    assert arr.dtype == expected.dtype
+    assert arr.shape == expected.shape
+    assert arr.tolist() == expected.tolist()
+
+
+def test_grows_past_estimate():
+    obj = {"a": {f"k{i}": list(range(i)) for i in range(100)}}
+    arr = get_array(obj, ["a", "*", "*"])
+    assert arr.tolist() == getitem_by_path(obj, ["a", "*", "*"])
+
+
+def test_large():
+    arr = get_array(SERIES, ["series", "*", "value"])
+    assert arr.dtype == np.int64
+    assert arr.tolist() == list(range(2000))
+    assert get_array(SERIES, ["series", "*", "xy"]).shape == (2000, 2)
+
+
+def test_dtype():
+    arr = get_array(SERIES, ["series", "*", "value"], dtype=np.float32)
+    assert arr.dtype == np.float32
+    assert get_array({"a": [1, 2]}, "a", dtype=float).tolist() == [1.0, 2.0]
+
+
+def test_single_match_is_array():
+    assert get_array(SERIES, ["series", "[0]", "value"]).tolist() == [0]
+
+
+def test_no_matches():
+    assert get_array(SERIES, ["series", "*", "nope"]).shape == (0,)
+
+
+def test_no_pattern():
+    assert get_array(SERIES, ["series", 1, "xy"]).tolist() == [1, -1]
+    assert get_array(SERIES, ["series", 1, "value"]).tolist() == 1
+    assert get_array({"a": [[1, 2], [3, 4]]}, "a").shape == (2, 2)
+    with pytest.raises(KeyError):
+        get_array(SERIES, ["nope"])
+
+
+def test_double_splat():
+    obj = {"a": {"v": 1, "b": {"v": 2}}, "c": [{"v": 3}]}
+    assert get_array(obj, ["**", "v"]).tolist() == getitem_by_path(obj, ["**", "v"])
+
+
+def test_columnar():
+    arr = get_array(columnarize(SERIES), ["series", "*", "f"])
+    assert arr.tolist() == [i / 2 for i in range(2000)]
+
+
+def test_as_array():
+    arr = getitem_by_path(SERIES, ["series", "*", "f"], as_array=True)
+    assert isinstance(arr, np.ndarray)
+    assert arr.tolist() == getitem_by_path(SERIES, ["series", "*", "f"])
+
+
+def test_deep_collection():
+    dc = DeepCollection(SERIES, match_with="regex")
+    assert dc.get_array(["series", ".*", "value"]).tolist() == list(range(2000))
+    assert dc.get_array(["series", "*", "value"], match_with="glob").tolist() == list(range(2000))
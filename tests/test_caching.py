@@ -0,0 +1,170 @@
+import pickle
+
+import pytest
+
+from deep_collections import DeepCollection
+from deep_collections import del_by_path
+from deep_collections import set_by_path
+from deep_collections.caching import _copy
+from deep_collections.caching import QueryCache
+
+
+@pytest.fixture
+def dc():
+    return DeepCollection(
+        {"services": [{"endpoint": {"url": "a"}}, {"endpoint": {"url": "b"}}], "n": [1, 2]},
+        cache=True,
+    )
+
+
+def test_hits(dc):
+    assert dc["**", "url"] == ["a", "b"]
+    assert dc["**", "url"] == ["a", "b"]
+    assert dc.get(["**", "url"]) == ["a", "b"]
+    info = dc.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (2, 1, 1)
+
+
+def test_off_by_default():
+    dc = DeepCollection({"a": 1})
+    assert dc["*"] == 1
+    assert dc.cache_info() is None
+    dc.cache_clear()
+
+
+def test_plain_paths_not_cached(dc):
+    dc["services", 0, "endpoint", "url"]
+    dc["services"]
+    assert dc.cache_info().misses == 0
+    assert dc["services"][0]["endpoint"]._obj is dc._obj["services"][0]["endpoint"]
+
+
+def test_settings_in_key(dc):
+    dc["**", "url"]
+    dc.get(["**", "url"], match_with="regex")
+    dc.get(["**", "url"], recursive_match_all=False)
+    assert dc.cache_info().misses == 3
+    dc.get(["**", "url"], strict=True)  # not patterned when strict
+    assert dc.cache_info().misses == 3
+
+
+def test_normalized_path(dc):
+    dc[["n", "*"]]
+    dc[("n", "*")]
+    dc[iter(["n", "*"])]
+    assert dc.cache_info().hits == 2
+
+
+@pytest.mark.parametrize(
+    "mutate",
+    [
+        lambda dc: dc.__setitem__("n", [3]),
+        lambda dc: dc.__setitem__(["services", 0, "endpoint", "url"], "x"),
+        lambda dc: dc.__delitem__("n"),
+        lambda dc: dc.__delitem__(["services", 0, "endpoint"]),
+        lambda dc: dc["services"][0].__setitem__("extra", 1),
+        lambda dc: dc["services"].append({"endpoint": {"url": "c"}}),
+        lambda dc: dc.update({"n": []}),
+        lambda dc: dc.pop("n"),
+        lambda dc: set_by_path(dc, ["services", 0, "endpoint", "url"], "x"),
+        lambda dc: del_by_path(dc, ["services", 1]),
+    ],
+)
+def test_mutation_invalidates(dc, mutate):
+    dc["**", "url"]
+    version = dc.cache_info().version
+    mutate(dc)
+    info = dc.cache_info()
+    assert info.version > version
+    assert info.currsize == 0
+
+
+def test_fresh_after_mutation(dc):
+    assert dc["**", "url"] == ["a", "b"]
+    dc["services", 0, "endpoint", "url"] = "x"
+    assert dc["**", "url"] == ["x", "b"]
+
+
+def test_caller_mutation(dc):
+    dc["services", "*", "endpoint"][0]["url"] = "x"
+    rv = dc["services", "*", "endpoint"]
+    assert rv == [{"url": "a"}, {"url": "b"}]
+    rv[0]["url"] = "y"
+    assert dc._obj["services"][0]["endpoint"]["url"] == "a"
+    assert dc["services", "*", "endpoint"] == [{"url": "a"}, {"url": "b"}]
+
+
+def test_copy():
+    class Box:
+        def __init__(self, items):
+            self.items = items
+
+    shared = [1]
+    value = {"a": shared, "b": (shared, "s"), "c": Box([2]), "d": None}
+    copied = _copy(value)
+    assert copied["a"] == shared and copied["a"] is not shared
+    assert copied["b"][0] is copied["a"]
+    assert copied["b"][1] is value["b"][1]
+    assert copied["c"] is not value["c"] and copied["c"].items == [2]
+    assert copied["c"].items is not value["c"].items
+
+    loop = []
+    loop.append(loop)
+    assert _copy(loop)[0] is not loop
+
+
+def test_eviction():
+    dc = DeepCollection({"a": 1, "b": 2, "c": 3}, cache=2)
+    dc["a*"], dc["b*"], dc["c*"]
+    info = dc.cache_info()
+    assert (info.maxsize, info.currsize, info.evictions) == (2, 2, 1)
+    dc["b*"]
+    dc["a*"]
+    assert dc.cache_info().hits == 1
+
+
+def test_shared_with_spawned(dc):
+    services = dc["services"]
+    assert services._cache is dc._cache
+    services["*", "endpoint", "url"]
+    dc["services"]["*", "endpoint", "url"]  # same object queried, so a hit
+    assert dc.cache_info().hits == 1
+
+
+def test_unhashable_path():
+    dc = DeepCollection({"a": {"b": 1}}, cache=True)
+    assert dc.get(["*", "b"], match_kwargs={"x": []}) == 1
+    assert dc.cache_info().currsize == 0
+
+
+def test_cache_clear(dc):
+    dc["**", "url"], dc["**", "url"]
+    dc.cache_clear()
+    info = dc.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (0, 0, 0)
+
+
+def test_shared_instance():
+    cache = QueryCache(4)
+    dc1 = DeepCollection({"a": 1}, cache=cache)
+    dc2 = DeepCollection({"a": 2}, cache=cache)
+    assert (dc1["*"], dc2["*"]) == (1, 2)
+    assert cache.info().currsize == 2
+
+
+def test_pickle():
+    dc = pickle.loads(pickle.dumps(DeepCollection({"a": 1}, cache=8)))
+    assert dc.cache_info().maxsize == 8
+
+
+def test_threadsafe():
+    dc = DeepCollection({"a": [1, 2]}, cache=True, threadsafe=True)
+    assert dc["a", "*"] == [1, 2]
+    with dc.batch():
+        dc["a", 0] = 3
+    assert dc["a", "*"] == [3, 2]
+
+
+def test_maxsize():
+    with pytest.raises(ValueError):
+        QueryCache(0)
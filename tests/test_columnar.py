@@ -0,0 +1,114 @@
+import pickle
+from array import array
+
+import pytest
+
+from deep_collections import DeepCollection
+from deep_collections import getitem_by_path
+from deep_collections import paths_to_key
+from deep_collections import resolve_path
+from deep_collections.columnar import columnarize
+from deep_collections.columnar import ColumnarRecords
+
+
+DOC = {
+    "records": [
+        {
+            "id": i,
+            "ms": i * 0.5,
+            "name": f"n{i}",
+            "ok": i % 2 == 0,
+            "tags": ["t", i],
+            "sub": [{"x": i, "y": -i}, {"x": i + 1, "y": 0}],
+        }
+        for i in range(5)
+    ],
+    "mixed": [{"a": 1}, {"b": 2}],
+    "meta": {"count": 5},
+}
+
+
+@pytest.fixture
+def col():
+    return columnarize(DOC)
+
+
+def test_columnarize(col):
+    assert isinstance(col["records"], ColumnarRecords)
+    assert isinstance(col["records"][0]["sub"], ColumnarRecords)
+    assert isinstance(col["mixed"], list)
+    assert col["records"].schema == ("id", "ms", "name", "ok", "tags", "sub")
+    assert col["records"].columns["id"] == array("q", range(5))
+    assert col["records"].columns["ms"] == array("d", [i * 0.5 for i in range(5)])
+    assert type(col["records"].columns["ok"]) is list
+    assert col["records"].column("name") == [f"n{i}" for i in range(5)]
+
+
+def test_columnarize_min_records():
+    assert isinstance(columnarize([{"a": 1}], min_records=1), ColumnarRecords)
+    assert isinstance(columnarize([{"a": 1}, {"a": 2}], min_records=3), list)
+
+
+@pytest.mark.parametrize("values", [[1, 2.0], [True, 1], [2**63, 1], [None, 1]])
+def test_column_types(values):
+    records = columnarize([{"a": v} for v in values])
+    assert [type(r["a"]) for r in records] == [type(v) for v in values]
+
+
+def test_same_as_rows(col):
+    assert col == DOC
+    assert col["records"] == DOC["records"]
+    assert col["records"][-1] == DOC["records"][-1]
+    assert col["records"][1:3] == DOC["records"][1:3]
+    with pytest.raises(IndexError):
+        col["records"][5]
+
+
+def test_inconsistent_records():
+    with pytest.raises(ValueError):
+        ColumnarRecords([{"a": 1}, {"b": 2}])
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        ["records", "*", "ms"],
+        ["records", "*", "?d"],
+        ["records", "[1-3]", "*"],
+        ["records", 2, "name"],
+        ["records", "*", "sub", "*", "x"],
+        ["records", "*", "tags", 1],
+        ["records", "*", "nope"],
+        ["records", "*", "id", "nope"],
+        ["**", "x"],
+        ["records", "**", "y"],
+    ],
+)
+def test_resolves_same_as_rows(col, path):
+    assert getitem_by_path(col, list(path)) == getitem_by_path(DOC, list(path))
+    assert list(resolve_path(col, list(path))) == list(resolve_path(DOC, list(path)))
+
+
+def test_match_options(col):
+    path = ["records", ".*", "n.*"]
+    assert getitem_by_path(col, path, match_with="regex") == getitem_by_path(DOC, path, match_with="regex")
+    path = ["records", "*", "NAME"]
+    assert getitem_by_path(col, path, case_sensitive=False) == getitem_by_path(DOC, path, case_sensitive=False)
+
+
+def test_searches(col):
+    assert list(paths_to_key(col, "x")) == list(paths_to_key(DOC, "x"))
+
+
+def test_deep_collection(col):
+    dc = DeepCollection(col)
+    assert dc["records", "*", "ms"] == [i * 0.5 for i in range(5)]
+    assert isinstance(dc["records"], ColumnarRecords)
+    assert dc["records"] == DOC["records"]
+    assert dc["records", 1, "sub", 0, "x"] == 1
+    assert list(dc.values_for_key("id")) == list(range(5))
+
+
+def test_pickle(col):
+    assert pickle.loads(pickle.dumps(col)) == DOC
+    assert isinstance(pickle.loads(pickle.dumps(col))["records"], ColumnarRecords)
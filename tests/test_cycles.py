@@ -0,0 +1,161 @@
+import asyncio
+
+import pytest
+
+from deep_collections import count_by_path
+from deep_collections import DeepCollection
+from deep_collections import getitem_by_path
+from deep_collections import Limits
+from deep_collections import parallel
+from deep_collections import paths_to_key
+from deep_collections import paths_to_value
+from deep_collections import values_for_key
+from deep_collections.aio import apaths_to_key
+from deep_collections.aio import apaths_to_value
+from deep_collections.limits import CycleError
+from deep_collections.profiling import profile
+
+SKIP = Limits(cycles="skip")
+RAISE = Limits(cycles="raise")
+
+
+def shared_config():
+    """Like a YAML document that uses anchors: many references to the same dicts."""
+    defaults = {"retries": 3, "timeout": {"connect": 1, "read": 5}}
+    service = {"defaults": defaults, "ports": [80, 443]}
+    return {
+        "defaults": defaults,
+        "services": {"a": service, "b": service, "c": {"defaults": defaults, "ports": [22]}},
+        "backup": [service, defaults],
+    }
+
+
+def doubling(depth):
+    """Each level refers to the next twice, so there are 2**depth paths to the bottom."""
+    level = {"bottom": True}
+    for _ in range(depth):
+        level = {"left": level, "right": level}
+    return level
+
+
+def cyclic():
+    a = {"x": 1}
+    b = {"x": 2, "a": a}
+    a["b"] = b
+    return {"p": a, "q": b, "self": None}
+
+
+async def collect(agen):
+    return [p async for p in agen]
+
+
+@pytest.mark.parametrize("key", ["read", "defaults", "ports", ["timeout", "connect"], "nope"])
+def test_shared_subtrees_find_the_same_paths(key):
+    obj = shared_config()
+    assert list(paths_to_key(obj, key, limits=SKIP)) == list(paths_to_key(obj, key))
+    assert list(paths_to_key(obj, key, limits=RAISE)) == list(paths_to_key(obj, key))
+
+
+@pytest.mark.parametrize("value", [5, 443, {"connect": 1, "read": 5}, [80, 443]])
+def test_shared_subtrees_find_the_same_values(value):
+    obj = shared_config()
+    assert list(paths_to_value(obj, value, limits=SKIP)) == list(paths_to_value(obj, value))
+
+
+def test_shared_subtrees_are_searched_once():
+    obj = doubling(12)
+    with profile() as stats:
+        assert list(paths_to_key(obj, "nope")) == []
+    assert stats.nodes_visited == 2**13 - 1
+
+    with profile() as stats:
+        assert list(paths_to_key(obj, "nope", limits=SKIP)) == []
+    assert stats.nodes_visited == 2 * 12 + 1
+
+    # Every path is still found.
+    assert count_by_path(obj, ["**", "bottom"], limits=SKIP) == 2**12
+    assert list(paths_to_key(doubling(3), "bottom", limits=SKIP)) == list(paths_to_key(doubling(3), "bottom"))
+
+
+def test_deep_sharing_finishes():
+    # 2**60 paths, if every one were walked.
+    assert list(paths_to_value(doubling(60), "nope", limits=SKIP)) == []
+
+
+def test_skip_cycles():
+    obj = cyclic()
+    obj["self"] = obj
+    assert list(paths_to_key(obj, "x", limits=SKIP)) == [["p", "x"], ["p", "b", "x"], ["q", "x"], ["q", "a", "x"]]
+    assert list(paths_to_value(obj, 2, limits=SKIP)) == [["p", "b", "x"], ["q", "x"]]
+    # The key of an object that refers back is still found.
+    assert list(paths_to_key(obj, "self", limits=SKIP)) == [["self"]]
+
+
+def test_raise_on_cycles():
+    obj = cyclic()
+    with pytest.raises(CycleError) as info:
+        list(paths_to_key(obj, "x", limits=RAISE))
+    assert info.value.path == ["p", "b", "a"]
+    assert info.value.target == ["p"]
+    assert isinstance(info.value, ValueError)
+
+    with pytest.raises(CycleError):
+        getitem_by_path(obj, ["q", "**", "x"], limits=RAISE)
+
+
+def test_without_cycles_recursion_error():
+    obj = cyclic()
+    with pytest.raises(RecursionError):
+        list(paths_to_key(obj, "x"))
+
+
+def test_double_splat():
+    obj = shared_config()
+    assert getitem_by_path(obj, ["**", "read"], limits=SKIP) == getitem_by_path(obj, ["**", "read"])
+    assert getitem_by_path(obj, ["services", "**", "read"], limits=SKIP) == [5, 5, 5]
+
+    obj = cyclic()
+    assert getitem_by_path(obj, ["**", "x"], limits=SKIP) == [1, 2, 2, 1]
+    assert list(values_for_key(obj, "x", limits=SKIP)) == [1, 2, 2, 1]
+
+
+def test_with_other_limits():
+    obj = shared_config()
+    for limits in [Limits(max_depth=3), Limits(min_depth=4), Limits(prune=lambda path, child: path[-1:] == ["c"])]:
+        expected = list(paths_to_key(obj, "read", limits=limits))
+        assert list(paths_to_key(obj, "read", limits=limits._replace(cycles="skip"))) == expected
+
+
+def test_reuse_stops_at_cycles():
+    # b is found inside a's cycle, so what's found in it differs with where it's found.
+    a = {"x": 1}
+    b = {"a": a, "y": 2}
+    a["b"] = b
+    obj = {"a": a, "b": b}
+    assert list(paths_to_key(obj, "y", limits=SKIP)) == [["a", "b", "y"], ["b", "y"]]
+    assert list(paths_to_key(obj, "x", limits=SKIP)) == [["a", "x"], ["b", "a", "x"]]
+
+
+@pytest.mark.parametrize("obj", [shared_config(), cyclic()])
+def test_parallel_and_aio(obj):
+    for key in ["x", "read", "a"]:
+        expected = list(paths_to_key(obj, key, limits=SKIP))
+        assert list(parallel.paths_to_key(obj, key, workers=2, limits=SKIP)) == expected
+        assert asyncio.run(collect(apaths_to_key(obj, key, limits=SKIP))) == expected
+    for value in [1, 5]:
+        expected = list(paths_to_value(obj, value, limits=SKIP))
+        assert asyncio.run(collect(apaths_to_value(obj, value, limits=SKIP))) == expected
+
+
+def test_aio_raise():
+    with pytest.raises(CycleError):
+        asyncio.run(collect(apaths_to_key(cyclic(), "x", limits=RAISE)))
+
+
+def test_deep_collection():
+    obj = cyclic()
+    dc = DeepCollection(obj, limits=SKIP, return_deep=False)
+    assert list(dc.paths_to_key("x")) == [["p", "x"], ["p", "b", "x"], ["q", "x"], ["q", "a", "x"]]
+    assert dc["**", "x"] == [1, 2, 2, 1]
+    with pytest.raises(CycleError):
+        dc.count_by_path(["**", "x"], limits=RAISE)
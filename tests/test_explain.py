@@ -0,0 +1,124 @@
+import pytest
+
+from deep_collections import DeepCollection
+from deep_collections import getitem_by_path
+from deep_collections import profile
+from deep_collections.columnar import columnarize
+from deep_collections.explain import ANY_INDEX
+from deep_collections.explain import DocumentStats
+from deep_collections.explain import explain
+from deep_collections.explain import OTHER_KEYS
+
+DOC = {
+    "records": [
+        {"id": i, "name": f"n{i}", "owner": {"id": i % 7, "name": "x"}, "tags": ["a", "b"]} for i in range(500)
+    ],
+    "meta": {"count": 500},
+}
+STATS = DocumentStats.of(DOC)
+
+
+def strategies(plan):
+    return [s["strategy"] for s in plan["segments"]]
+
+
+@pytest.mark.parametrize("source", [DOC, STATS], ids=["document", "stats"])
+@pytest.mark.parametrize(
+    "path",
+    [
+        ["records", "*", "owner", "id"],
+        ["records", "*", "o*"],
+        ["records", 1, "name"],
+        ["records", "*", "tags", 1],
+        ["meta", "*"],
+        ["nope", "*"],
+    ],
+)
+def test_estimates_match_profile(source, path):
+    plan = explain(source, path)
+    with profile() as stats:
+        rv = getitem_by_path(DOC, path)
+    assert plan["estimated_nodes"] == stats.nodes_visited
+    assert plan["estimated_match_calls"] == sum(stats.matcher_calls.values())
+    assert plan["estimated_results"] == (len(rv) if isinstance(rv, list) else 1)
+
+
+@pytest.mark.parametrize("path", [["**", "id"], ["**", "owner", "id"], ["records", "*", "**", "name"]])
+def test_double_splat_from_stats(path):
+    plan = explain(STATS, path)
+    with profile() as stats:
+        rv = getitem_by_path(DOC, path)
+    assert plan["estimated_results"] == len(rv)
+    assert plan["estimated_nodes"] == pytest.approx(stats.nodes_visited, rel=0.3)
+    assert "recursive_descent" in strategies(plan)
+
+
+def test_double_splat_from_document():
+    plan = explain(DOC, ["**", "id"])
+    assert strategies(plan) == ["recursive_descent", "scan"]
+    assert 0 < plan["estimated_results"]
+    assert plan["estimated_nodes"] > len(DOC["records"])
+
+
+def test_normalized_path():
+    plan = explain(DOC, ["**", "**", "records", "**"])
+    assert plan["path"] == ["**", "records"]
+    assert explain(DOC, ["**", "**"], recursive_match_all=False)["path"] == ["**", "**"]
+
+
+def test_lookup():
+    plan = explain(DOC, ["records", 1, "name"], strict=True)
+    assert plan["strategy"] == "lookup"
+    assert strategies(plan) == ["lookup"] * 3
+    assert plan["estimated_match_calls"] == 0
+    assert explain(DOC, "meta")["strategy"] == "lookup"
+    assert explain(DOC, "me*")["strategy"] == "resolve"
+
+
+def test_scan_of_literal_keys():
+    # Unless strict, every segment of a path is matched against every key.
+    assert explain(DOC, ["records", 1, "name"])["segments"][1]["match_calls"] == 500
+
+
+def test_regex():
+    plan = explain(DOC, ["records", ".*", "n.*"], match_with="regex")
+    assert strategies(plan) == ["scan"] * 3
+    assert plan["estimated_results"] == 500
+
+
+def test_columnar():
+    plan = explain(columnarize(DOC), ["records", "*", "owner", "id"])
+    assert strategies(plan) == ["scan", "select_all", "column", "scan"]
+    assert plan["segments"][2]["nodes"] == 1
+    assert plan["segments"][2]["match_calls"] == 4
+    assert plan["estimated_results"] == 500
+
+
+def test_not_deep():
+    assert explain(1, ["*"])["estimated_results"] == 0
+    assert explain(DocumentStats.of(1), ["*"])["estimated_results"] == 0
+
+
+def test_document_stats():
+    root = STATS.root
+    assert (root["containers"], root["keys"]) == (1, 2)
+    records = root["children"]["records"]
+    assert (records["containers"], records["sequences"], records["keys"]) == (1, 1, 500)
+    record = records["children"][ANY_INDEX]
+    assert (record["count"], record["containers"]) == (500, 500)
+    assert record["children"]["owner"]["children"]["id"]["count"] == 500
+    assert STATS.as_dict()["children"]["records"]["children"]["[*]"]["count"] == 500
+
+
+def test_document_stats_max_keys(monkeypatch):
+    monkeypatch.setattr("deep_collections.explain.MAX_KEYS", 2)
+    stats = DocumentStats.of({"a": 1, "b": 2, "c": 3, "d": 4})
+    assert set(stats.root["children"]) == {"a", "b", OTHER_KEYS}
+    assert stats.root["children"][OTHER_KEYS]["count"] == 2
+    assert explain(stats, ["z*"])["estimated_results"] == 2
+
+
+def test_deep_collection():
+    dc = DeepCollection(DOC, match_with="regex")
+    assert dc.explain(["records", ".*", "id"])["estimated_results"] == 500
+    assert dc.explain(["records", "*", "id"], match_with="glob")["segments"][1]["strategy"] == "select_all"
@@ -0,0 +1,175 @@
+import asyncio
+
+import pytest
+
+from deep_collections import count_by_path
+from deep_collections import DeepCollection
+from deep_collections import exists_by_path
+from deep_collections import first_by_path
+from deep_collections import getitem_by_path
+from deep_collections import Limits
+from deep_collections import parallel
+from deep_collections import paths_to_key
+from deep_collections import resolve_path
+from deep_collections import values_for_key
+from deep_collections import Where
+from deep_collections.aio import apaths_to_key
+from deep_collections.columnar import columnarize
+from deep_collections.columnar import ColumnarRecords
+from deep_collections.explain import DocumentStats
+from deep_collections.explain import explain
+from deep_collections.profiling import profile
+
+JOBS = [
+    {"id": 1, "status": "failed", "retries": 5, "tags": ["nightly"], "run": {"host": "a"}},
+    {"id": 2, "status": "ok", "retries": 0, "tags": [], "run": {"host": "b"}},
+    {"id": 3, "status": "failed", "retries": 1, "tags": ["nightly", "slow"], "run": {"host": "a"}},
+    {"id": 4, "status": "failed", "retries": 4, "tags": ["slow"], "run": None},
+]
+DOC = {"jobs": JOBS, "archive": {"old": {"id": 0, "status": "failed", "retries": 9}}}
+
+
+def ids(where, obj=DOC):
+    return getitem_by_path(obj, ["jobs", where, "id"])
+
+
+@pytest.mark.parametrize(
+    "where, expected",
+    [
+        (Where("status", "==", "failed"), [1, 3, 4]),
+        (Where("status", "!=", "failed"), 2),
+        (Where("retries", ">", 3), [1, 4]),
+        (Where("retries", ">=", 4), [1, 4]),
+        (Where("retries", "<", 1), 2),
+        (Where("retries", "<=", 1), [2, 3]),
+        (Where("status", "in", ["ok", "queued"]), 2),
+        (Where("status", "not in", ["ok", "queued"]), [1, 3, 4]),
+        (Where("tags", "contains", "slow"), [3, 4]),
+        (Where("tags"), [1, 3, 4]),
+        (Where(["run", "host"], "==", "a"), [1, 3]),
+        (Where(("run", "host")), [1, 2, 3]),
+        (Where(lambda job: len(job["tags"]) > 1), 3),
+    ],
+)
+def test_where(where, expected):
+    assert ids(where) == expected
+
+
+def test_combined():
+    failed = Where("status", "==", "failed")
+    assert ids(failed & Where("retries", ">", 3)) == [1, 4]
+    assert ids(failed | Where("retries", "==", 0)) == [1, 2, 3, 4]
+    assert ids(~failed) == 2
+    assert ids(failed & ~Where("tags", "contains", "slow")) == 1
+
+
+def test_missing_or_incomparable_fields_fail():
+    assert ids(Where("nope", "==", None)) == []
+    assert ids(Where(["run", "host"], "!=", "a")) == 2
+    assert getitem_by_path([{"n": 1}, {"n": None}, {"n": "x"}, 5], [Where("n", ">", 0)]) == {"n": 1}
+
+
+def test_invalid():
+    with pytest.raises(ValueError):
+        Where("status", "is", "failed")
+    with pytest.raises(ValueError):
+        Where("status", "==")
+
+
+def test_anywhere_in_path():
+    assert getitem_by_path(DOC, [Where("old")]) == DOC["archive"]
+    assert getitem_by_path(DOC, ["*", Where("status", "==", "failed"), "id"]) == [1, 3, 4, 0]
+    assert getitem_by_path(DOC, ["jobs", Where("retries", ">", 3)]) == [JOBS[0], JOBS[3]]
+    assert getitem_by_path(DOC, Where("old")) == DOC["archive"]
+    assert list(resolve_path(DOC, ["jobs", Where("retries", ">", 3), "run"])) == [
+        ["jobs", 0, "run"],
+        ["jobs", 3, "run"],
+    ]
+    assert getitem_by_path(DOC, ["jobs", Where("retries", ">", 99)]) == []
+
+
+def test_double_splat():
+    failed = Where("status", "==", "failed")
+    assert getitem_by_path(DOC, ["**", failed, "id"]) == [1, 3, 4, 0]
+    assert list(paths_to_key(DOC, failed)) == [["jobs", 0], ["jobs", 2], ["jobs", 3], ["archive", "old"]]
+    assert list(values_for_key(DOC, Where("host", "==", "b"))) == [{"host": "b"}]
+    assert getitem_by_path(DOC, ["**", failed, "id"], limits=Limits(max_depth=3)) == [1, 3, 4, 0]
+    assert getitem_by_path(DOC, ["**", failed, "id"], limits=Limits(max_depth=2)) == []
+
+
+def test_failing_children_are_not_descended():
+    failed = Where("status", "==", "failed")
+    with profile() as all_stats:
+        getitem_by_path(DOC, ["jobs", "*", "run", "host"])
+    with profile() as stats:
+        assert getitem_by_path(DOC, ["jobs", failed, "run", "host"]) == ["a", "a"]
+    assert stats.nodes_visited < all_stats.nodes_visited
+    assert stats.matcher_calls["Where"] == 4
+
+
+def test_short_circuit_queries():
+    failed = Where("status", "==", "failed")
+    assert count_by_path(DOC, ["jobs", failed]) == 3
+    assert first_by_path(DOC, ["jobs", failed, "id"]) == 1
+    assert exists_by_path(DOC, ["**", Where("retries", ">", 8)])
+    assert not exists_by_path(DOC, ["jobs", Where("retries", ">", 8)])
+
+
+def test_columnar():
+    doc = columnarize({"jobs": [{k: v for k, v in job.items() if k not in ("tags", "run")} for job in JOBS]})
+    assert isinstance(doc["jobs"], ColumnarRecords)
+    assert ids(Where("status", "==", "failed"), doc) == [1, 3, 4]
+    assert ids(Where("retries", ">", 3) & Where("status", "==", "failed"), doc) == [1, 4]
+    assert ids(Where("nope"), doc) == []
+    assert getitem_by_path(doc, ["jobs", 0, Where(lambda v: v == "failed")]) == "failed"
+
+
+def test_columnar_filters_by_column(monkeypatch):
+    records = ColumnarRecords([{"n": i} for i in range(10)])
+
+    def no_rows(self, idx):
+        raise AssertionError("records were built")
+
+    monkeypatch.setattr(ColumnarRecords, "_row", no_rows)
+    assert count_by_path(records, [Where("n", ">=", 7)]) == 3
+
+
+def test_equal_wheres():
+    assert Where("a", "==", 1) == Where("a", "==", 1)
+    assert hash(Where("a", "==", 1)) == hash(Where("a", "==", 1))
+    assert Where("a", "==", 1) != Where("a", "==", 2)
+    assert Where("a") & Where("b") == Where("a") & Where("b")
+    assert repr(Where("a", "==", 1) & ~Where("b")) == "(Where('a', '==', 1) & ~Where('b'))"
+
+
+def test_deep_collection():
+    dc = DeepCollection(DOC, cache=True)
+    failed = Where("status", "==", "failed")
+    assert dc["jobs", failed, "id"] == [1, 3, 4]
+    assert dc["jobs", Where("status", "==", "failed"), "id"] == [1, 3, 4]
+    assert dc.cache_info().hits == 1
+    assert dc.get(["jobs", Where("retries", ">", 99)]) == []
+    assert dc.count_by_path(["**", failed]) == 4
+
+
+def test_parallel_and_aio():
+    failed = Where("status", "==", "failed")
+    expected = list(paths_to_key(DOC, failed))
+    assert list(parallel.paths_to_key(DOC, failed, workers=2)) == expected
+
+    async def search():
+        return [p async for p in apaths_to_key(DOC, failed)]
+
+    assert asyncio.run(search()) == expected
+
+
+def test_explain():
+    plan = explain(DOC, ["jobs", Where("status", "==", "failed"), "id"])
+    segment = plan["segments"][1]
+    assert segment["strategy"] == "filter"
+    assert segment["match_calls"] == 4
+    assert segment["results"] == 3
+    assert plan["estimated_results"] == 3
+    # Children aren't kept in stats, so every one is assumed to pass.
+    plan = explain(DocumentStats.of(DOC), ["jobs", Where("status", "==", "failed"), "id"])
+    assert plan["estimated_results"] == 4
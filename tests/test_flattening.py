@@ -0,0 +1,111 @@
+from collections import OrderedDict
+
+import pytest
+
+from deep_collections import DeepCollection
+from deep_collections import flatten
+from deep_collections import unflatten
+from deep_collections.columnar import columnarize
+from deep_collections.traversal import register
+from deep_collections.traversal import Strategy
+from deep_collections.traversal import unregister
+
+DOCS = [
+    {"a": {"b": [1, 2, {"c": None}]}, "d": "s", "e": 0.5},
+    [{"x": 1}, [2, [3]], "y"],
+    {"empty": {}, "none": [], "nested": {"e": {}}, "s": ""},
+    {0: "a", "k": {"1": "b", "0": "c"}},
+    {"deep": {"a": {"b": {"c": {"d": {"e": 1}}}}}},
+    {},
+]
+
+
+@pytest.mark.parametrize("doc", DOCS)
+def test_round_trip(doc):
+    assert unflatten(flatten(doc)) == doc
+
+
+def walk(obj, prefix=()):
+    items = obj.items() if isinstance(obj, dict) else enumerate(obj)
+    for key, value in items:
+        yield prefix + (key,), value
+        if isinstance(value, (dict, list)):
+            yield from walk(value, prefix + (key,))
+
+
+@pytest.mark.parametrize("doc", DOCS)
+def test_matches_walk(doc):
+    everything = dict(walk(doc))
+    assert flatten(doc, leaves_only=False) == everything
+    assert flatten(doc) == {
+        path: value for path, value in everything.items() if not isinstance(value, (dict, list)) or not value
+    }
+
+
+def test_order():
+    doc = {"b": {"y": 1, "x": 2}, "a": [3, 4]}
+    assert list(flatten(doc)) == [("b", "y"), ("b", "x"), ("a", 0), ("a", 1)]
+    assert list(flatten(doc, leaves_only=False)) == [("b",), ("b", "y"), ("b", "x"), ("a",), ("a", 0), ("a", 1)]
+    assert list(unflatten(flatten(doc))) == ["b", "a"]
+
+
+def test_path_type():
+    doc = {"a": [1, {"b": 2}]}
+    assert flatten(doc, path_type=lambda path: ".".join(map(str, path))) == {"a.0": 1, "a.1.b": 2}
+    assert flatten(doc, path_type=frozenset) == {frozenset({"a", 0}): 1, frozenset({"a", 1, "b"}): 2}
+
+
+def test_leaf_root():
+    assert flatten("abc") == {(): "abc"}
+    assert unflatten(flatten(5)) == 5
+    with pytest.raises(ValueError):
+        unflatten({(): 1, ("a",): 2})
+
+
+def test_unflatten_paths():
+    assert unflatten({"a": 1, ("b", "c"): 2, ("d",): 3}) == {"a": 1, "b": {"c": 2}, "d": 3}
+    assert unflatten(OrderedDict([((1,), "b"), ((0,), "a")])) == ["a", "b"]
+    assert unflatten({(0,): "a", (2,): "c"}) == {0: "a", 2: "c"}
+    assert unflatten({(True,): "a"}) == {True: "a"}
+    # Dicts keyed by indexes can't be told from lists.
+    assert unflatten(flatten({"k": {1: "b", 0: "c"}})) == {"k": ["c", "b"]}
+    assert unflatten(flatten({"k": {1: "b", 0: "c"}}), lists=False) == {"k": {1: "b", 0: "c"}}
+    assert unflatten({("a", 0): 1, ("a", 1): 2}, lists=False) == {"a": {0: 1, 1: 2}}
+
+
+def test_unflatten_replaces_containers():
+    doc = {"a": [1, {"b": 2}]}
+    flat = flatten(doc, leaves_only=False)
+    rebuilt = unflatten(flat)
+    assert rebuilt == doc
+    assert rebuilt["a"] is not doc["a"]
+    assert unflatten({("a",): 1, ("a", "b"): 2}) == {"a": {"b": 2}}
+    assert unflatten({("a", "b"): 2, ("a",): 1}) == {"a": 1}
+
+
+def test_tuples_become_lists():
+    assert unflatten(flatten({"t": (1, 2)})) == {"t": [1, 2]}
+
+
+def test_registered_types():
+    class Point:
+        def __init__(self, x, y):
+            self.x, self.y = x, y
+
+    register(Point, Strategy(lambda p: vars(p).items(), lookup=getattr))
+    try:
+        assert flatten({"p": Point(1, 2)}) == {("p", "x"): 1, ("p", "y"): 2}
+    finally:
+        unregister(Point)
+    assert flatten({"s": b"ab", "t": "cd"}) == {("s",): b"ab", ("t",): "cd"}
+
+
+def test_columnar():
+    doc = {"rows": [{"a": 1, "b": 2}, {"a": 3, "b": 4}]}
+    assert flatten(columnarize(doc)) == flatten(doc)
+
+
+def test_deep_collection():
+    dc = DeepCollection({"a": [1, {"b": 2}]})
+    assert dc.flatten() == {("a", 0): 1, ("a", 1, "b"): 2}
+    assert dc.flatten(leaves_only=False, path_type=len) == {1: [1, {"b": 2}], 2: {"b": 2}, 3: 2}
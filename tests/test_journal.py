@@ -0,0 +1,220 @@
+import pickle
+import random
+import threading
+import time
+from copy import deepcopy
+
+import pytest
+
+from deep_collections import _resolve_items
+from deep_collections import DeepCollection
+from deep_collections import del_by_path
+from deep_collections import journal as journal_module
+from deep_collections import set_by_path
+from deep_collections.journal import compact
+from deep_collections.journal import Entry
+from deep_collections.profiling import profile
+
+DOC = {
+    "web": {"replicas": 2, "ports": [80, 443], "env": {"mode": "prod"}},
+    "db": {"replicas": 1, "ports": [5432]},
+    "jobs": [{"name": "a", "replicas": 3}, {"name": "b"}],
+}
+
+
+@pytest.fixture
+def dc():
+    return DeepCollection(deepcopy(DOC))
+
+
+@pytest.mark.parametrize(
+    "mutate",
+    [
+        lambda dc: dc.__setitem__(["db", "replicas"], 5),
+        lambda dc: dc.__setitem__("web", {"replicas": 9}),
+        lambda dc: dc.__setitem__(["new", "deep", "x"], 1),
+        lambda dc: dc.__delitem__("db"),
+        lambda dc: dc.__delitem__(["jobs", 0]),
+        lambda dc: dc.__delitem__(["web", "ports", 0]),
+        lambda dc: set_by_path(dc, ["jobs", 1, "replicas"], 1),
+        lambda dc: del_by_path(dc, ["web", "env"]),
+        lambda dc: dc.update({"db": {"replicas": 2}, "extra": 0}),
+        lambda dc: dc.pop("web"),
+        lambda dc: dc.setdefault("z", {}),
+        lambda dc: dc.clear(),
+        lambda dc: dc["web"].__setitem__("replicas", 6),
+        lambda dc: dc["jobs"][0].__delitem__("name"),
+    ],
+)
+def test_replay(dc, mutate):
+    replica = DeepCollection(deepcopy(DOC))
+    journal = dc.journal()
+    mutate(dc)
+    assert journal.entries
+    replica.replay(journal.drain())
+    assert replica._obj == dc._obj
+    assert dict(replica) == dict(dc)
+    assert not journal.entries
+
+
+def test_random_replication():
+    rng = random.Random(0)
+    dc = DeepCollection(deepcopy(DOC))
+    replica = DeepCollection(deepcopy(DOC))
+    journal = dc.journal()
+    for step in range(500):
+        paths = [p for p, _ in _resolve_items(dc._obj, ["**", "*"])] + [["top"]]
+        path = rng.choice(paths)
+        value = rng.choice([1, {"n": rng.randint(0, 9)}, [1, {"m": 2}]])
+        try:
+            if rng.random() < 0.3:
+                del dc[path]
+            else:
+                dc[path] = value
+        except (KeyError, IndexError, TypeError):
+            pass
+        if step % 7 == 0:
+            replica.replay(journal.drain())
+            assert replica._obj == dc._obj
+    replica.replay(journal.drain())
+    assert replica._obj == dc._obj
+
+
+def test_compact():
+    entries = [
+        Entry("set", ["a", "b"], 1),
+        Entry("delete", ["c"], None),
+        Entry("set", ["a", "b"], 2),
+        Entry("set", ["d", 0], 3),
+        Entry("set", ["a"], {"b": 4}),
+        Entry("set", ["c"], 5),
+        Entry("set", ["d", 1], 6),
+    ]
+    assert compact(entries) == [
+        Entry("set", ["d", 0], 3),
+        Entry("set", ["a"], {"b": 4}),
+        Entry("set", ["c"], 5),
+        Entry("set", ["d", 1], 6),
+    ]
+    assert compact([Entry("set", ["a"], 1), Entry("set", [], {"b": 2})]) == [Entry("set", [], {"b": 2})]
+    assert compact([]) == []
+
+
+def test_compacted_replay_matches_entry_by_entry(dc):
+    journal = dc.journal()
+    dc["web", "replicas"] = 3
+    dc["web"] = {"replicas": 4}
+    dc["web", "env"] = {"mode": "dev"}
+    del dc["db", "ports"]
+    dc["db"] = 1
+    dc.update(jobs=[])
+    entries = journal.drain()
+    assert len(compact(entries)) < len(entries)
+
+    one_by_one = DeepCollection(deepcopy(DOC))
+    for entry in entries:
+        one_by_one.replay([entry])
+    batched = DeepCollection(deepcopy(DOC))
+    batched.replay(entries)
+    assert batched._obj == one_by_one._obj == dc._obj
+
+
+def test_made_and_deleted(dc):
+    journal = dc.journal()
+    dc["tmp", "x"] = 1
+    dc["web", "tmp"] = 2
+    del dc["tmp"]
+    del dc["web", "tmp"]
+    entries = journal.drain()
+    assert compact(entries) == [Entry("delete", ["tmp"], None), Entry("delete", ["web", "tmp"], None)]
+    replica = DeepCollection(deepcopy(DOC))
+    replica.replay(entries)
+    assert replica._obj == dc._obj == DOC
+
+
+def test_values_are_copied(dc):
+    journal = dc.journal()
+    value = {"n": 1}
+    dc["x"] = value
+    value["n"] = 2
+    assert journal.entries == [Entry("set", ["x"], {"n": 1})]
+
+
+def test_spawned_and_sequence_changes(dc):
+    journal = dc.journal()
+    dc["web"]["ports"].append(8080)
+    assert journal.drain() == [Entry("set", [], dc._obj)]
+    del dc["jobs", 0]
+    assert journal.drain() == [Entry("set", ["jobs"], [{"name": "b"}])]
+
+    dc = DeepCollection([1, 2, 3])
+    journal = dc.journal()
+    dc.append(4)
+    dc[0] = 0
+    del dc[1]
+    replica = DeepCollection([1, 2, 3])
+    replica.replay(journal.drain())
+    assert replica._obj == dc._obj == [0, 3, 4]
+
+
+def test_pickle(dc):
+    journal = dc.journal()
+    dc["a"] = {"b": [1]}
+    del dc["web"]
+    entries = pickle.loads(pickle.dumps(journal.drain()))
+    replica = DeepCollection(deepcopy(DOC))
+    replica.replay(entries)
+    assert replica._obj == dc._obj
+
+
+def test_close(dc):
+    journal = dc.journal()
+    assert dc.journal() is journal
+    journal.close()
+    dc["a"] = 1
+    assert len(journal) == 0
+    assert dc.journal() is not journal
+
+
+def test_threadsafe_journal(monkeypatch):
+    class SlowJournal(journal_module.Journal):
+        def __init__(self, dc):
+            time.sleep(0.01)
+            super().__init__(dc)
+
+    monkeypatch.setattr(journal_module, "Journal", SlowJournal)
+    dc = DeepCollection(deepcopy(DOC), threadsafe=True)
+    journals = []
+    threads = [threading.Thread(target=lambda: journals.append(dc.journal())) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(journal is dc._journal for journal in journals)
+
+
+def test_replay_updates_replica(dc):
+    replica = DeepCollection(deepcopy(DOC), cache=True, threadsafe=True)
+    live = replica.watch(["*", "replicas"])
+    chained = replica.journal()
+    assert replica["*", "replicas"] == [2, 1]
+
+    journal = dc.journal()
+    dc["db", "replicas"] = 7
+    replica.replay(journal.drain())
+    assert replica["*", "replicas"] == [2, 7]
+    assert live.values() == [2, 7]
+    assert chained.drain() == [Entry("set", ["db", "replicas"], 7)]
+
+
+def test_replay_cost_follows_changes():
+    big = {"items": [{"n": i} for i in range(10000)], "flag": 0}
+    dc = DeepCollection(deepcopy(big))
+    replica = DeepCollection(deepcopy(big))
+    journal = dc.journal()
+    dc["flag"] = 1
+    dc["items", 5, "n"] = -1
+    with profile() as stats:
+        replica.replay(journal.drain())
+    assert stats.nodes_visited == 0
+    assert replica._obj == dc._obj
@@ -0,0 +1,172 @@
+import asyncio
+import pickle
+
+import pytest
+
+from deep_collections import count_by_path
+from deep_collections import DeepCollection
+from deep_collections import exists_by_path
+from deep_collections import getitem_by_path
+from deep_collections import Limits
+from deep_collections import parallel
+from deep_collections import paths_to_key
+from deep_collections import paths_to_value
+from deep_collections import resolve_path
+from deep_collections import values_for_key
+from deep_collections.aio import apaths_to_key
+from deep_collections.aio import apaths_to_value
+from deep_collections.profiling import profile
+
+DOC = {
+    "id": 0,
+    "a": {"id": 1, "b": {"id": 2, "c": {"id": 3}}},
+    "blob": [{"id": 4}, {"id": 5}],
+    "raw": b"id",
+    "x": {"y": "v", "z": ["v", {"w": "v"}]},
+}
+
+
+def test_max_depth():
+    assert list(paths_to_key(DOC, "id", limits=Limits(max_depth=1))) == [["id"]]
+    assert list(paths_to_key(DOC, "id", limits=Limits(max_depth=2))) == [["id"], ["a", "id"]]
+    assert list(paths_to_key(DOC, "id", limits=Limits(max_depth=3))) == [
+        ["id"],
+        ["a", "id"],
+        ["a", "b", "id"],
+        ["blob", 0, "id"],
+        ["blob", 1, "id"],
+    ]
+
+
+def test_max_depth_stops_descending():
+    doc = {"a": {"b": {"c": {"d": {"e": 1}}}}}
+    with profile() as stats:
+        assert list(paths_to_key(doc, "e", limits=Limits(max_depth=2))) == []
+    assert stats.nodes_visited == 2
+
+
+def test_min_depth():
+    assert list(paths_to_key(DOC, "id", limits=Limits(min_depth=3))) == [
+        ["a", "b", "id"],
+        ["a", "b", "c", "id"],
+        ["blob", 0, "id"],
+        ["blob", 1, "id"],
+    ]
+
+
+def test_skip_types():
+    assert list(paths_to_key(DOC, "id", limits=Limits(skip_types=list))) == [
+        ["id"],
+        ["a", "id"],
+        ["a", "b", "id"],
+        ["a", "b", "c", "id"],
+    ]
+    # A skipped child's key can still be found.
+    assert list(paths_to_key(DOC, "blob", limits=Limits(skip_types=(list, dict)))) == [["blob"]]
+
+
+def test_prune():
+    seen = []
+
+    def prune(path, child):
+        seen.append(path)
+        return path == ["a", "b"]
+
+    assert list(paths_to_key(DOC, "id", limits=Limits(prune=prune))) == [
+        ["id"],
+        ["a", "id"],
+        ["blob", 0, "id"],
+        ["blob", 1, "id"],
+    ]
+    assert ["a", "b"] in seen
+    assert ["a", "b", "c"] not in seen
+
+
+def test_paths_to_value():
+    assert list(paths_to_value(DOC, "v")) == [["x", "y"], ["x", "z", 0], ["x", "z", 1, "w"]]
+    assert list(paths_to_value(DOC, "v", limits=Limits(max_depth=3))) == [["x", "y"], ["x", "z", 0]]
+    assert list(paths_to_value(DOC, "v", limits=Limits(min_depth=3))) == [["x", "z", 0], ["x", "z", 1, "w"]]
+    assert list(paths_to_value(DOC, "v", limits=Limits(skip_types=list))) == [["x", "y"]]
+    assert list(paths_to_value(DOC, {"w": "v"}, limits=Limits(max_depth=2))) == []
+    assert list(paths_to_value(DOC, {"w": "v"}, limits=Limits(max_depth=3))) == [["x", "z", 1]]
+    # A child that isn't searched can still be the value.
+    prune = Limits(prune=lambda path, child: path == ["x", "z", 1])
+    assert list(paths_to_value(DOC, {"w": "v"}, limits=prune)) == [["x", "z", 1]]
+    assert list(paths_to_value(DOC, ["v", {"w": "v"}], limits=Limits(skip_types=list))) == [["x", "z"]]
+
+
+def test_compound_key():
+    assert list(paths_to_key(DOC, ["c", "id"])) == [["a", "b", "c", "id"]]
+    assert list(paths_to_key(DOC, ["c", "id"], limits=Limits(max_depth=3))) == []
+    assert list(paths_to_key(DOC, ["b", "id"], limits=Limits(min_depth=4))) == []
+
+
+def test_values_for_key():
+    assert list(values_for_key(DOC, "id", limits=Limits(max_depth=2))) == [0, 1]
+
+
+def test_double_splat_depth_counts_from_root():
+    limits = Limits(max_depth=3)
+    assert getitem_by_path(DOC, ["**", "id"], limits=limits) == [0, 1, 2, 4, 5]
+    assert getitem_by_path(DOC, ["a", "**", "id"], limits=limits) == [1, 2]
+    assert list(resolve_path(DOC, ["a", "**", "id"], limits=Limits(min_depth=3))) == [
+        ["a", "b", "id"],
+        ["a", "b", "c", "id"],
+    ]
+    assert getitem_by_path(DOC, ["**", "id"], limits=Limits(skip_types=list, max_depth=2)) == [0, 1]
+
+
+def test_short_circuit_queries():
+    limits = Limits(prune=lambda path, child: path == ["a"])
+    assert count_by_path(DOC, ["**", "id"], limits=limits) == 3
+    assert not exists_by_path(DOC, ["**", "c"], limits=limits)
+
+
+def test_no_limits_unchanged():
+    assert list(paths_to_key(DOC, "id", limits=Limits())) == list(paths_to_key(DOC, "id"))
+    assert list(paths_to_value(DOC, "v", limits=Limits())) == list(paths_to_value(DOC, "v"))
+
+
+@pytest.mark.parametrize(
+    "limits", [Limits(max_depth=2), Limits(min_depth=3), Limits(skip_types=list), Limits(max_depth=3, min_depth=2)]
+)
+@pytest.mark.parametrize("value", ["v", {"w": "v"}, ["v", {"w": "v"}]])
+def test_parallel_and_aio(limits, value):
+    expected = list(paths_to_key(DOC, "id", limits=limits))
+    assert list(parallel.paths_to_key(DOC, "id", workers=2, limits=limits)) == expected
+
+    async def search():
+        return [p async for p in apaths_to_key(DOC, "id", limits=limits, yield_every=1)]
+
+    assert asyncio.run(search()) == expected
+
+    expected = list(paths_to_value(DOC, value, limits=limits))
+    assert list(parallel.paths_to_value(DOC, value, workers=2, limits=limits)) == expected
+
+    async def search_values():
+        return [p async for p in apaths_to_value(DOC, value, limits=limits)]
+
+    assert asyncio.run(search_values()) == expected
+
+
+def test_deep_collection():
+    dc = DeepCollection(DOC, limits=Limits(max_depth=2), return_deep=False)
+    assert list(dc.paths_to_key("id")) == [["id"], ["a", "id"]]
+    assert list(dc.paths_to_value("v")) == [["x", "y"]]
+    assert list(dc.values_for_key("id")) == [0, 1]
+    assert sorted(dc.deduped_values_for_key("id")) == [0, 1]
+    assert dc["**", "id"] == [0, 1]
+    assert dc.get(["**", "id"]) == [0, 1]
+    assert dc.count_by_path(["**", "id"]) == 2
+    assert dc.first_by_path(["a", "**", "id"]) == 1
+    # One-off limits replace the collection's
+    assert dc.count_by_path(["**", "id"], limits=Limits()) == 6
+    assert list(dc.paths_to_key("id", limits=Limits(min_depth=4))) == [["a", "b", "c", "id"]]
+
+
+def test_deep_collection_settings_are_inherited():
+    limits = Limits(max_depth=3)
+    dc = DeepCollection(DOC, limits=limits)
+    assert dc["a"].limits is limits
+    assert pickle.loads(pickle.dumps(dc)).limits == limits
+    assert DeepCollection(DOC).limits is None
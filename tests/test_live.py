@@ -0,0 +1,241 @@
+import random
+import threading
+import time
+from copy import deepcopy
+
+import pytest
+
+from deep_collections import _resolve_items
+from deep_collections import DeepCollection
+from deep_collections import del_by_path
+from deep_collections import Limits
+from deep_collections import live as live_module
+from deep_collections import set_by_path
+from deep_collections import Where
+from deep_collections.live import Change
+from deep_collections.profiling import profile
+
+DOC = {
+    "web": {"replicas": 2, "ports": [80, 443], "env": {"mode": "prod"}},
+    "db": {"replicas": 1, "ports": [5432]},
+    "jobs": [{"name": "a", "replicas": 3}, {"name": "b"}],
+}
+
+PATHS = [
+    ["**", "replicas"],
+    ["*", "replicas"],
+    ["web", "ports", "*"],
+    ["jobs", "*", "name"],
+    ["*", "env"],
+    ["db"],
+    ["**", "mode"],
+    ["jobs", "?", "**", "replicas"],
+    ["**", "env", "mode"],
+    ["**", 0],
+    ["**", "*"],
+]
+
+
+def expected(dc, path):
+    return {tuple(p): v for p, v in _resolve_items(dc._obj, list(path))}
+
+
+def current(live):
+    return {tuple(p): v for p, v in live.items()}
+
+
+@pytest.fixture
+def dc():
+    return DeepCollection(deepcopy(DOC))
+
+
+@pytest.mark.parametrize(
+    "mutate",
+    [
+        lambda dc: dc.__setitem__(["db", "replicas"], 5),
+        lambda dc: dc.__setitem__(["cache"], {"replicas": 4, "env": {"mode": "dev"}}),
+        lambda dc: dc.__setitem__("web", {"replicas": 9}),
+        lambda dc: dc.__setitem__(["web", "ports", 0], 8080),
+        lambda dc: dc.__setitem__(["jobs", 1, "replicas"], 7),
+        lambda dc: dc.__setitem__(["web", "env", "mode"], "test"),
+        lambda dc: dc.__delitem__("db"),
+        lambda dc: dc.__delitem__(["web", "replicas"]),
+        lambda dc: dc.__delitem__(["jobs", 0]),
+        lambda dc: dc.__delitem__(["web", "ports", 0]),
+        lambda dc: set_by_path(dc, ["new", "deep", "replicas"], 1),
+        lambda dc: del_by_path(dc, ["jobs", 0, "replicas"]),
+        lambda dc: dc.update({"db": {"replicas": 2}, "extra": {"replicas": 0}}),
+        lambda dc: dc.pop("web"),
+        lambda dc: dc.setdefault("z", {"replicas": 1}),
+        lambda dc: dc.clear(),
+        lambda dc: dc["web"].__setitem__("replicas", 6),
+        lambda dc: dc["jobs"][0].__setitem__("replicas", 6),
+    ],
+)
+def test_kept_current(dc, mutate):
+    lives = [dc.watch(path) for path in PATHS]
+    mutate(dc)
+    for path, live in zip(PATHS, lives):
+        assert current(live) == expected(dc, path), path
+
+
+def test_random_mutations():
+    rng = random.Random(0)
+    dc = DeepCollection(deepcopy(DOC))
+    lives = [dc.watch(path) for path in PATHS]
+    for _ in range(300):
+        paths = [p for p, _ in _resolve_items(dc._obj, ["**", "*"])] + [["top"]]
+        path = rng.choice(paths)
+        value = rng.choice([1, {"replicas": rng.randint(0, 9)}, {"name": "n", "env": {"mode": "m"}}, [1, 2]])
+        try:
+            if rng.random() < 0.3 and len(path) > 0:
+                del dc[path]
+            else:
+                dc[path] = value
+        except (KeyError, IndexError, TypeError):
+            continue
+        for p, live in zip(PATHS, lives):
+            assert current(live) == expected(dc, p), p
+
+
+@pytest.mark.parametrize(
+    "path, key, value",
+    [
+        # "**" isn't searched below where what follows it matches.
+        (["**", "a", "b"], ["x", "a"], {"b": 2, "a": {"b": 3}}),
+        # "**" only matches the indexes of items that aren't collections.
+        (["**", 0], ["x", "l"], [{"k": 1}, 2]),
+        (["**", 0], ["x", "l"], [1, 2]),
+        (["**", "a", "**", "b"], ["x", "a"], {"a": {"b": 1}, "b": 2}),
+        (["x", "**", "a", "b"], ["x", "y", "a"], {"b": 2, "a": {"b": 3}}),
+        (["x", "**"], ["x", "y"], {"z": 1}),
+    ],
+)
+def test_double_splat_matches_fresh_query(path, key, value):
+    dc = DeepCollection({"x": {"y": {}}})
+    live = dc.watch(path)
+    dc[key] = value
+    assert live.items() == dc.watch(path).items()
+    assert list(live) == [v for _, v in _resolve_items(dc._obj, list(path))]
+    del dc[key]
+    assert live.items() == dc.watch(path).items()
+
+
+def test_order():
+    dc = DeepCollection({"a": {"n": 1}, "b": {"n": 2}})
+    live = dc.watch(["*", "n"])
+    dc["c"] = {"n": 3}
+    dc["a", "n"] = 4
+    assert live.paths() == [["a", "n"], ["b", "n"], ["c", "n"]]
+    assert live.values() == [4, 2, 3]
+    assert list(live) == [4, 2, 3]
+    assert len(live) == 3
+
+
+def test_only_changed_subtree_is_searched():
+    dc = DeepCollection({"big": [{"x": {"y": i}} for i in range(1000)], "small": {"replicas": 1}})
+    live = dc.watch(["**", "replicas"])
+    with profile() as stats:
+        dc["small", "replicas"] = 2
+    assert live.values() == [2]
+    assert stats.nodes_visited < 10
+
+    with profile() as stats:
+        dc["other"] = 1
+    assert stats.nodes_visited == 0
+
+
+def test_subscribers():
+    dc = DeepCollection(deepcopy(DOC))
+    live = dc.watch(["*", "replicas"])
+    seen = []
+    callback = live.subscribe(lambda query, changes: seen.append((query, changes)))
+
+    dc["db", "replicas"] = 5
+    assert seen == [(live, [Change("changed", ["db", "replicas"], 5)])]
+
+    seen.clear()
+    dc["cache"] = {"replicas": 1}
+    del dc["web"]
+    assert [changes for _, changes in seen] == [
+        [Change("added", ["cache", "replicas"], 1)],
+        [Change("removed", ["web", "replicas"], 2)],
+    ]
+
+    seen.clear()
+    dc["jobs", 0, "name"] = "x"  # not watched
+    assert seen == []
+
+    live.unsubscribe(callback)
+    dc["db", "replicas"] = 6
+    assert seen == []
+
+
+def test_changed_within():
+    dc = DeepCollection(deepcopy(DOC))
+    live = dc.watch(["web"])
+    seen = []
+    live.subscribe(lambda query, changes: seen.extend(changes))
+    dc["web", "env", "mode"] = "dev"
+    assert seen == [Change("changed", ["web"], dc._obj["web"])]
+
+
+def test_close():
+    dc = DeepCollection(deepcopy(DOC))
+    live = dc.watch(["*", "replicas"])
+    other = dc.watch(["db"])
+    live.close()
+    dc["db", "replicas"] = 5
+    assert live.values() == [2, 1]
+    assert other.values() == [{"replicas": 5, "ports": [5432]}]
+
+
+def test_threadsafe_watch(monkeypatch):
+    class SlowWatches(live_module._Watches):
+        def __init__(self, dc):
+            time.sleep(0.01)
+            super().__init__(dc)
+
+    monkeypatch.setattr(live_module, "_Watches", SlowWatches)
+    dc = DeepCollection(deepcopy(DOC), threadsafe=True)
+    watched = []
+    threads = [threading.Thread(target=lambda: watched.append(dc.watch(["*", "replicas"]))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(dc._watches.queries) == 4
+    dc["db", "replicas"] = 5
+    assert [live.values() for live in watched] == [[2, 5]] * 4
+
+
+def test_list_root():
+    dc = DeepCollection([{"n": 1}, {"n": 2}, {"n": 3}])
+    live = dc.watch(["*", "n"])
+    del dc[0]
+    assert live.items() == [([0, "n"], 2), ([1, "n"], 3)]
+    dc.append({"n": 4})
+    assert current(live) == expected(dc, ["*", "n"])
+    dc[0] = {"n": 0}
+    assert current(live) == expected(dc, ["*", "n"])
+
+
+def test_where_and_limits_refresh():
+    dc = DeepCollection(deepcopy(DOC))
+    live = dc.watch(["jobs", Where("replicas", ">", 2), "name"])
+    assert live.values() == ["a"]
+    dc["jobs", 1, "replicas"] = 5
+    assert live.values() == ["a", "b"]
+
+    dc = DeepCollection(deepcopy(DOC), limits=Limits(max_depth=2))
+    live = dc.watch(["**", "replicas"])
+    dc["jobs", 1, "replicas"] = 5
+    dc["x"] = {"replicas": 0}
+    assert live.values() == [2, 1, 0]
+
+
+def test_match_settings():
+    dc = DeepCollection({"ab": 1, "b": 2}, match_with="regex")
+    live = dc.watch(["a."])
+    dc["ac"] = 3
+    assert live.values() == [1, 3]
@@ -0,0 +1,148 @@
+import threading
+from collections import UserDict
+
+import pytest
+
+from deep_collections import DeepCollection
+from deep_collections.locking import RWLock
+
+
+def test_readers_share():
+    lock = RWLock()
+    inside = threading.Barrier(3, timeout=5)
+
+    def reader():
+        with lock.read():
+            inside.wait()  # only passes if all readers hold the lock at once
+
+    threads = [threading.Thread(target=reader) for _ in range(2)]
+    for t in threads:
+        t.start()
+    inside.wait()
+    for t in threads:
+        t.join()
+
+
+def test_writer_excludes_readers():
+    lock = RWLock()
+    events = []
+
+    def reader():
+        with lock.read():
+            events.append("read")
+
+    with lock.write():
+        t = threading.Thread(target=reader)
+        t.start()
+        t.join(0.05)
+        events.append("write done")
+    t.join()
+
+    assert events == ["write done", "read"]
+
+
+def test_no_upgrade():
+    lock = RWLock()
+    with lock.read():
+        with pytest.raises(RuntimeError):
+            lock.acquire_write()
+
+
+def test_release_unheld():
+    lock = RWLock()
+    with pytest.raises(RuntimeError):
+        lock.release_read()
+    with pytest.raises(RuntimeError):
+        lock.release_write()
+
+
+def test_threadsafe_setting():
+    assert DeepCollection({}).threadsafe is False
+    dc = DeepCollection({"a": {"b": [1]}}, threadsafe=True)
+    assert dc.threadsafe is True
+    assert dc["a"]._lock is dc._lock
+    assert dc.get(["a", "b"])._lock is dc._lock
+
+
+def test_spawn_under_read_lock():
+    # UserDict fills itself through self.update, which needs the write lock once the
+    # DeepCollection has one.
+    dc = DeepCollection({"a": UserDict({"b": [1]})}, threadsafe=True)
+    with dc.batch(read_only=True):
+        assert dc["a"] == {"b": [1]}
+        assert dc["a"]._lock is dc._lock
+
+
+def test_threadsafe_methods():
+    dc = DeepCollection({"a": {"b": 0}}, threadsafe=True)
+    dc["c", "d"] = 1
+    dc.update({"e": 2})
+    del dc["a", "b"]
+
+    assert dc == {"a": {}, "c": {"d": 1}, "e": 2}
+    assert list(dc.paths_to_key("d")) == [["c", "d"]]
+    assert list(dc.paths_to_value(2)) == [["e"]]
+    assert list(dc.values_for_key("e")) == [2]
+    assert dc.deduped_values_for_key("d") == [1]
+
+
+def test_inherited_readers_share():
+    dc = DeepCollection({"a": 1}, threadsafe=True)
+    inside = threading.Barrier(3, timeout=5)
+
+    def keys():  # wrapped as dict.keys would be
+        inside.wait()  # only passes if both readers hold the lock at once
+        return dict.keys(dc)
+
+    read = dc._ensure_post_call_sync(keys)
+    threads = [threading.Thread(target=read) for _ in range(2)]
+    for t in threads:
+        t.start()
+    inside.wait()
+    for t in threads:
+        t.join()
+
+
+def test_inherited_writes_need_write_lock():
+    dc = DeepCollection({"a": 1}, threadsafe=True)
+    with dc.batch(read_only=True):
+        assert list(dc.keys()) == ["a"]
+        assert dc.copy() == {"a": 1}
+        with pytest.raises(RuntimeError):
+            dc.update({"b": 2})
+        with pytest.raises(RuntimeError):
+            dc.pop("a")
+    assert dc == dc._obj == {"a": 1}
+    dc.update({"b": 2})
+    assert dc._obj == {"a": 1, "b": 2}
+
+
+def test_batches_are_atomic():
+    """Readers must never see a batch half applied."""
+    dc = DeepCollection({"x": 0, "y": 0}, threadsafe=True)
+    torn = []
+    stop = threading.Event()
+
+    def reader():
+        while not stop.is_set():
+            with dc.batch(read_only=True):
+                x, y = dc["x"], dc["y"]
+            if x != y:
+                torn.append((x, y))
+
+    def writer():
+        for i in range(300):
+            with dc.batch():
+                dc["x"] = i
+                dc["y"] = i
+
+    readers = [threading.Thread(target=reader) for _ in range(3)]
+    for t in readers:
+        t.start()
+    writer()
+    stop.set()
+    for t in readers:
+        t.join()
+
+    assert torn == []
+    assert dc["x"] == dc["y"] == 299
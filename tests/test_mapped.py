@@ -0,0 +1,229 @@
+import json
+import os
+import pathlib
+import pickle
+
+import pytest
+
+from deep_collections import DeepCollection
+from deep_collections import getitem_by_path
+from deep_collections import paths_to_key
+from deep_collections.mapped import MappedArray
+from deep_collections.mapped import MappedIndex
+from deep_collections.mapped import MappedObject
+from deep_collections.mapped import open_mapped
+
+
+DOC = {
+    "a": {"b": 1, "c": [2, {"b": 3, "d": 'x\\"y'}], "ünï": "côdé"},
+    "b": [1.5e3, True, False, None, {}, []],
+    "xa": {"b": {"b": "deep"}},
+    "records": [{"id": i, "name": f"n{i}", "tags": ["t", i]} for i in range(5)],
+}
+LINES = [{"id": 1}, [2, {"id": 3}], "four", None]
+
+
+@pytest.fixture
+def json_path(tmp_path):
+    path = tmp_path / "doc.json"
+    path.write_text(json.dumps(DOC, indent=1), encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def ndjson_path(tmp_path):
+    path = tmp_path / "doc.ndjson"
+    path.write_text("".join(json.dumps(line) + "\n" for line in LINES) + "\n")
+    return path
+
+
+def test_views(json_path):
+    doc = open_mapped(json_path)
+    assert isinstance(doc, MappedObject)
+    assert isinstance(doc["records"], MappedArray)
+    assert doc == DOC
+    assert DOC == doc
+    assert list(doc) == list(DOC)
+    assert len(doc["b"]) == 6
+    assert doc["b"][1:3] == [True, False]
+    assert doc["a"]["c"][-1]["d"] == DOC["a"]["c"][-1]["d"]
+    assert repr(doc["b"]) == repr(DOC["b"])
+    with pytest.raises(KeyError):
+        doc["nope"]
+    with pytest.raises(IndexError):
+        doc["b"][6]
+
+
+@pytest.mark.parametrize("path", [["a", "c", 1, "d"], ["*", "b"], ["records", "[1-2]", "tags"], ["**", "b"]])
+def test_matches_getitem_by_path(json_path, path):
+    assert getitem_by_path(open_mapped(json_path), path) == getitem_by_path(DOC, path)
+
+
+def test_index_saved_and_reused(json_path, monkeypatch):
+    open_mapped(json_path)
+    index_path = f"{json_path}.dcindex"
+    assert os.path.exists(index_path)
+
+    from deep_collections.mapped import MappedIndex
+
+    def fail(*args, **kwargs):
+        raise AssertionError("index rebuilt")
+
+    monkeypatch.setattr(MappedIndex, "build", fail)
+    assert open_mapped(json_path) == DOC
+
+
+def test_index_rebuilt_when_file_changes(json_path):
+    open_mapped(json_path)
+    json_path.write_text(json.dumps({"changed": [1]}))
+    assert open_mapped(json_path) == {"changed": [1]}
+
+
+class Touch:
+    def __init__(self, path):
+        self.path = path
+
+    def __reduce__(self):
+        return (pathlib.Path.touch, (self.path,))
+
+
+def rewritten(index_path, mutate):
+    with open(index_path, "rb") as f:
+        data = bytearray(f.read())
+    mutate(data)
+    with open(index_path, "wb") as f:
+        f.write(data)
+
+
+@pytest.mark.parametrize(
+    "mutate",
+    [
+        lambda data: data.__setitem__(slice(None), os.urandom(len(data))),
+        lambda data: data.__delitem__(slice(-8, None)),
+        lambda data: data.__delitem__(slice(10, None)),
+        lambda data: data.extend(b"\0" * 8),
+        # The first start, past the end of the file.
+        lambda data: data.__setitem__(slice(32, 40), (2**40).to_bytes(8, "little")),
+        # The container count.
+        lambda data: data.__setitem__(slice(24, 32), (-1).to_bytes(8, "little", signed=True)),
+        lambda data: data.__setitem__(slice(24, 32), (2**62).to_bytes(8, "little")),
+    ],
+)
+def test_invalid_index_rebuilt(json_path, mutate):
+    open_mapped(json_path)
+    index_path = f"{json_path}.dcindex"
+    rewritten(index_path, mutate)
+
+    assert open_mapped(json_path) == DOC
+    with open(index_path, "rb") as f:
+        assert MappedIndex.load(f, **index_meta(json_path)) is not None
+
+
+def test_pickled_index_not_run(json_path, tmp_path):
+    open_mapped(json_path)
+    ran = tmp_path / "ran"
+    with open(f"{json_path}.dcindex", "wb") as f:
+        pickle.dump(Touch(ran), f)
+
+    assert open_mapped(json_path) == DOC
+    assert not ran.exists()
+
+
+def index_meta(path):
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+
+
+def test_index_round_trip(json_path, tmp_path):
+    buf = json_path.read_bytes()
+    index = MappedIndex.build(buf)
+    with open(tmp_path / "index", "wb") as f:
+        index.dump(f, **index_meta(json_path))
+    with open(tmp_path / "index", "rb") as f:
+        loaded = MappedIndex.load(f, **index_meta(json_path))
+    assert (loaded.starts, loaded.ends, loaded.ndjson) == (index.starts, index.ends, False)
+    with open(tmp_path / "index", "rb") as f:
+        assert MappedIndex.load(f, size=len(buf) + 1, mtime=0) is None
+
+
+def test_no_index_saved(json_path, tmp_path):
+    open_mapped(json_path, save_index=False)
+    assert not os.path.exists(f"{json_path}.dcindex")
+    open_mapped(json_path, index_path=tmp_path / "elsewhere")
+    assert os.path.exists(tmp_path / "elsewhere")
+
+
+def test_failed_index_save_cleaned_up(json_path, monkeypatch):
+    def dump(self, f, size, mtime):
+        f.write(b"partial")
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(MappedIndex, "dump", dump)
+    assert open_mapped(json_path) == DOC
+    assert sorted(os.listdir(json_path.parent)) == ["doc.json"]
+
+
+def test_index_errors_not_hidden(json_path, monkeypatch):
+    open_mapped(json_path)
+
+    def load(f, size, mtime):
+        raise RuntimeError
+
+    monkeypatch.setattr(MappedIndex, "load", load)
+    with pytest.raises(RuntimeError):
+        open_mapped(json_path)
+
+
+def test_duplicate_keys(tmp_path):
+    path = tmp_path / "dup.json"
+    path.write_text('{"a": 1, "b": 2, "a": 3}')
+    assert open_mapped(path) == json.loads(path.read_text())
+    assert list(open_mapped(path)) == ["a", "b"]
+
+
+@pytest.mark.parametrize("text", ['{"a": [1, 2}', '{"a": 1} {"b": 2}'])
+def test_invalid(tmp_path, text):
+    path = tmp_path / "bad.json"
+    path.write_text(text)
+    with pytest.raises(ValueError):
+        open_mapped(path)
+
+
+def test_ndjson(ndjson_path):
+    doc = open_mapped(ndjson_path)
+    assert isinstance(doc, MappedArray)
+    assert doc == LINES
+    assert list(paths_to_key(doc, "id")) == [[0, "id"], [1, 1, "id"]]
+
+
+def test_ndjson_empty(tmp_path):
+    path = tmp_path / "empty.jsonl"
+    path.touch()
+    assert open_mapped(path) == []
+
+
+def test_deep_collection(json_path):
+    dc = DeepCollection.from_mmap(json_path, match_with="regex")
+    assert dc == DOC
+    assert dc.match_with == "regex"
+    assert dc["a", "[bc]"] == [1, DOC["a"]["c"]]
+    dc = DeepCollection.from_mmap(json_path)
+    assert dc["a", "c", 1, "b"] == 3
+    assert dc["records", "*", "id"] == [0, 1, 2, 3, 4]
+    assert dc.get(["nope", 1], "default") == "default"
+    assert list(dc.paths_to_key("b")) == list(paths_to_key(DOC, "b"))
+    assert list(dc.values_for_key("id")) == list(range(5))
+    assert isinstance(dc["xa"], DeepCollection)
+    assert dc["xa"] == {"b": {"b": "deep"}}
+
+
+def test_deep_collection_ndjson(ndjson_path):
+    dc = DeepCollection.from_mmap(ndjson_path)
+    assert dc == LINES
+    assert dc[1, 1, "id"] == 3
+
+
+@pytest.mark.parametrize("fixture", ["json_path", "ndjson_path"])
+def test_pickle(request, fixture):
+    dc = DeepCollection.from_mmap(request.getfixturevalue(fixture))
+    assert pickle.loads(pickle.dumps(dc)) == dc
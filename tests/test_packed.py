@@ -0,0 +1,142 @@
+import pickle
+
+import pytest
+
+from deep_collections import DeepCollection
+from deep_collections import getitem_by_path
+from deep_collections import paths_to_key
+from deep_collections import paths_to_value
+from deep_collections.packed import open_packed
+from deep_collections.packed import pack
+from deep_collections.packed import PackedDeepCollection
+from deep_collections.packed import PackedMapping
+from deep_collections.packed import PackedSequence
+from deep_collections.packed import unpack
+
+
+DOC = {
+    "a": {"b": 1, "c": [2, {"b": 3, "d": 'x\\"y'}], "ünï": "côdé"},
+    "b": [1.5e3, True, False, None, {}, [], -(2**70), b"raw"],
+    "xa": {"b": {"b": "deep"}},
+    "t": (1, (2, "three")),
+    "records": [{"id": i, "name": f"n{i}", "tags": ["t", i]} for i in range(5)],
+    1: "int key",
+    None: "none key",
+    2.5: "float key",
+}
+
+
+@pytest.mark.parametrize("obj", [DOC, [], {}, [1, [2, [3]]], "scalar", None, 10**40])
+def test_round_trip(obj):
+    assert unpack(pack(obj)) == obj
+
+
+def test_round_trip_ints():
+    ints = [0, -1, 2**60 - 1, 2**60, -(2**60), -(2**60) - 1, 2**63 - 1, 2**63, -(2**63), -(2**63) - 1]
+    assert unpack(pack(ints)) == ints
+
+
+def test_round_trip_types():
+    assert [type(v) for v in unpack(pack([True, 1, 1.0, None]))] == [bool, int, float, type(None)]
+    unpacked = unpack(pack(DOC))
+    assert type(unpacked["t"]) is tuple
+    assert type(unpacked["t"][1]) is tuple
+    assert type(unpacked["b"][1]) is bool
+
+
+def test_keys_interned():
+    records = [{"a_long_key_name": i, "another_long_key_name": i} for i in range(100)]
+    assert pack(records).count(b"a_long_key_name") == 1
+
+
+def test_equal_keys_of_other_types():
+    obj = [{1: "int"}, {1.0: "float"}, {True: "bool"}, {0: "zero"}]
+    packed = open_packed(pack(obj))
+    for key in (1, 1.0, True):
+        assert [m[key] for m in packed[:3]] == [o[key] for o in obj[:3]]
+    assert packed[3][False] == packed[3][0.0] == "zero"
+    assert 1.0 in packed[0] and 2 not in packed[0]
+    with pytest.raises(KeyError):
+        packed[0]["1"]
+    assert [type(k) for m in packed for k in m] == [int, float, bool, int]
+
+
+@pytest.mark.parametrize("obj", [{(1, 2): 3}, {"a": object()}, {1, 2}])
+def test_unpackable(obj):
+    with pytest.raises(TypeError):
+        pack(obj)
+
+
+def test_not_packed():
+    with pytest.raises(ValueError):
+        open_packed(b"\0" * 32)
+
+
+def test_views():
+    doc = open_packed(pack(DOC))
+    assert isinstance(doc, PackedMapping)
+    assert isinstance(doc["records"], PackedSequence)
+    assert doc == DOC
+    assert DOC == doc
+    assert list(doc) == list(DOC)
+    assert len(doc["b"]) == len(DOC["b"])
+    assert doc["b"][1:3] == [True, False]
+    assert doc["b"][-1] == b"raw"
+    assert doc[1] == "int key"
+    assert (True in doc) == (True in DOC)
+    with pytest.raises(KeyError):
+        doc["nope"]
+    with pytest.raises(KeyError):
+        doc[[]]
+    with pytest.raises(IndexError):
+        doc["b"][8]
+
+
+def test_views_share_buffer():
+    buf = bytearray(pack({"a": {"b": "c"}}))
+    doc = open_packed(buf)
+    sub = doc["a"]
+    buf[buf.index(b"c")] = ord("z")
+    assert sub["b"] == "z"
+
+
+@pytest.mark.parametrize("path", [["a", "c", 1, "d"], ["*", "b"], ["records", "[1-2]", "tags"], ["**", "b"]])
+def test_matches_getitem_by_path(path):
+    assert getitem_by_path(open_packed(pack(DOC)), path) == getitem_by_path(DOC, path)
+
+
+def test_searches():
+    doc = open_packed(pack(DOC))
+    assert list(paths_to_key(doc, "b")) == list(paths_to_key(DOC, "b"))
+    assert list(paths_to_value(doc, "t")) == list(paths_to_value(DOC, "t"))
+
+
+@pytest.mark.parametrize("obj", [DOC, pack(DOC), open_packed(pack(DOC))])
+def test_deep_collection(obj):
+    dc = PackedDeepCollection(obj)
+    assert isinstance(dc, PackedDeepCollection)
+    assert isinstance(dc, PackedMapping)
+    assert dc == DOC
+    assert dc["a", "c", 1, "b"] == 3
+    assert dc.get(["nope", 1], "default") == "default"
+    assert dc.a.b == 1
+    assert isinstance(dc["xa"], PackedDeepCollection)
+    assert dc["records", "*", "id"] == [0, 1, 2, 3, 4]
+    assert type(dc["records", "*"]) is not PackedDeepCollection
+    assert isinstance(dc["records", "*"], DeepCollection)
+    assert list(dc.paths_to_key("b")) == list(paths_to_key(DOC, "b"))
+    assert list(dc.values_for_key("id")) == list(range(5))
+
+
+def test_deep_collection_settings():
+    dc = PackedDeepCollection(DOC, match_with="regex")
+    assert dc["x.", "b"] == {"b": "deep"}
+    assert dc["records"].match_with == "regex"
+
+
+@pytest.mark.parametrize("path", [[], ["a"]])
+def test_pickle(path):
+    dc = PackedDeepCollection(DOC)[path] if path else PackedDeepCollection(DOC)
+    unpickled = pickle.loads(pickle.dumps(dc))
+    assert isinstance(unpickled, PackedDeepCollection)
+    assert unpickled == dc
@@ -0,0 +1,50 @@
+import pytest
+
+from deep_collections import parallel
+from deep_collections import paths_to_key
+from deep_collections import paths_to_value
+from deep_collections import planning
+from deep_collections import values_for_key
+
+
+@pytest.fixture(scope="module")
+def obj():
+    return {
+        "a": {"b": 0, "c": [{"b": 1}, {"d": {"b": 2}}]},
+        "b": [1, 2, {"b": 3, "e": [0, 1]}],
+        "xa": {"b": {"b": 4}},
+        "ya": ["b", "c"],
+    }
+
+
+@pytest.mark.parametrize("key", ["b", "?a", 0, ["?a", "b"], ["x", "y"], ["c", 1, "d"]])
+@pytest.mark.parametrize("workers", [1, 2])
+def test_paths_to_key(obj, key, workers):
+    assert list(parallel.paths_to_key(obj, key, workers=workers)) == list(paths_to_key(obj, key))
+
+
+@pytest.mark.parametrize("value", [0, 1, "b", {"b": 4}, ["b", "c"], "[0-2]"])
+def test_paths_to_value(obj, value):
+    assert list(parallel.paths_to_value(obj, value, workers=2)) == list(paths_to_value(obj, value))
+
+
+def test_values_for_key(obj):
+    assert list(parallel.values_for_key(obj, "b", workers=2)) == list(values_for_key(obj, "b"))
+
+
+def test_match_with(obj):
+    result = list(parallel.paths_to_key(obj, "^[xy]a$", workers=2, match_with="regex"))
+    assert result == [["xa"], ["ya"]]
+
+
+def test_not_deep():
+    with pytest.raises(TypeError):
+        list(parallel.paths_to_key(1, "a", workers=2))
+
+
+def test_plan_shards_splits_largest(obj):
+    units = planning.plan_shards("paths_to_key", obj, "b", (), {}, target=100)
+    shards = [u[1] for u in units if u[0] == "shard"]
+    assert ["a"] not in shards  # split into its children
+    assert ["a", "c"] not in shards
+    assert ["a", "c", 0] in shards
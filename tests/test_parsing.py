@@ -0,0 +1,117 @@
+import pickle
+
+import pytest
+
+from deep_collections import DeepCollection
+from deep_collections import parse_path
+from deep_collections import parsing
+
+
+@pytest.mark.parametrize(
+    "path, expected",
+    [
+        ("a", ("a",)),
+        ("a.b.c", ("a", "b", "c")),
+        ("a[0]", ("a", 0)),
+        ("a[0][-1]", ("a", 0, -1)),
+        ("a[0].b", ("a", 0, "b")),
+        ("[0].a", (0, "a")),
+        ("a.[0]", ("a", 0)),
+        ("a.0", ("a", "0")),
+        ("a[*].b", ("a", "*", "b")),
+        ("**.b", ("**", "b")),
+        ('"a.b".c', ("a.b", "c")),
+        ("'a.b'.c", ("a.b", "c")),
+        ('a["b.c"]', ("a", "b.c")),
+        ("a['b]']", ("a", "b]")),
+        (r"a\.b.c", ("a.b", "c")),
+        (r'"a\"b"', ('a"b',)),
+        ("pre'fix'.b", ("prefix", "b")),
+        ("a..b", ("a", "", "b")),
+        (".a", ("", "a")),
+        ("a.", ("a", "")),
+        ("", ("",)),
+        ('""', ("",)),
+    ],
+)
+def test_parse_path(path, expected):
+    assert parse_path(path) == expected
+
+
+def test_sep():
+    assert parse_path("a/b.c[0]", sep="/") == ("a", "b.c", 0)
+    assert parse_path("a::b::c", sep="::") == ("a", "b", "c")
+    assert parse_path(r"a\/b/c", sep="/") == ("a/b", "c")
+
+
+@pytest.mark.parametrize("path", ["a[0", '"a', "a['b]", 'a["b"c]', "a[0]b", "a\\"])
+def test_invalid(path):
+    with pytest.raises(ValueError):
+        parse_path(path)
+
+
+@pytest.mark.parametrize("sep", ["", "[", "]", '"', "'", "\\"])
+def test_invalid_sep(sep):
+    with pytest.raises(ValueError):
+        parse_path("a", sep=sep)
+
+
+def test_cache():
+    parse_path.cache_clear()
+    assert parse_path("x.y") is parse_path("x.y")
+    info = parse_path.cache_info()
+    assert (info.hits, info.misses, info.maxsize) == (1, 1, parsing.MAXSIZE)
+
+
+def test_deep_collection():
+    dc = DeepCollection({"a": [{"b": 1}], "x.y": 2}, path_sep=".")
+    assert dc["a[0].b"] == 1
+    assert dc['"x.y"'] == 2
+    assert dc.get("a[0].b") == 1
+    assert dc.get("a.0.b", "default") == "default"
+    assert dc["a[*].b"] == 1
+
+    dc["a[0].c"] = 3
+    dc["n"] = 4
+    del dc["a[0].b"]
+    assert dc == {"a": [{"c": 3}], "x.y": 2, "n": 4}
+    assert dc._obj == {"a": [{"c": 3}], "x.y": 2, "n": 4}
+
+    with pytest.raises(KeyError):
+        dc["a[0].missing"]
+
+
+def test_deep_collection_sep():
+    dc = DeepCollection({"a.b": {"c": 1}}, path_sep="/")
+    assert dc["a.b/c"] == 1
+    dc["a.b/d"] = 2
+    assert dc["a.b"] == {"c": 1, "d": 2}
+
+
+def test_default_is_single_key():
+    dc = DeepCollection({"a.b": 1, "a": {"b": 2}})
+    assert dc["a.b"] == 1
+    assert dc.path_sep is None
+
+
+def test_lists_are_not_parsed():
+    dc = DeepCollection({"a.b": 1, "a": {"b": 2}}, path_sep=".")
+    assert dc[["a.b"]] == 1
+    assert dc["a", "b"] == 2
+
+
+def test_settings_are_kept():
+    dc = DeepCollection({"a": {"b": {"c": 1}}}, path_sep=".")
+    assert dc["a"]["b.c"] == 1
+    assert dc.get("a")["b.c"] == 1
+
+    unpickled = pickle.loads(pickle.dumps(dc))
+    assert unpickled.path_sep == "."
+    assert unpickled["a.b.c"] == 1
+
+
+def test_cached_queries():
+    dc = DeepCollection({"a": [{"b": 1}, {"b": 2}]}, path_sep=".", cache=True)
+    assert dc["a[*].b"] == [1, 2]
+    assert dc["a.*.b"] == [1, 2]
+    assert dc.cache_info().hits == 1
@@ -0,0 +1,120 @@
+import asyncio
+import threading
+
+import deep_collections
+from deep_collections import DeepCollection
+from deep_collections import getitem_by_path
+from deep_collections import paths_to_key
+from deep_collections import paths_to_value
+from deep_collections.profiling import _active_stats
+from deep_collections.profiling import profile
+from deep_collections.profiling import Stats
+
+DOC = {"a": [{"b": 1}, {"b": 2}, {"c": {"b": 3}}], "d": {"b": 4}}
+
+
+def test_profile_is_exported():
+    assert deep_collections.profile is profile
+
+
+def test_disabled():
+    assert _active_stats.get() is None
+    with profile():
+        pass
+    assert _active_stats.get() is None
+
+
+def test_glob():
+    with profile() as stats:
+        getitem_by_path(DOC, ["a", "*", "b"])
+    assert stats.nodes_visited == 5  # root, a, and each item of a
+    assert stats.keys_tested == 2 + 3 + 1 + 1 + 1
+    assert stats.matcher_calls == {"GlobMatch": 5}
+    assert stats.paths_produced == 2
+    assert stats.paths_materialized == 0
+    assert set(stats.stage_seconds) == {"resolve", "matched_keys"}
+
+
+def test_match_style_counts():
+    with profile() as stats:
+        getitem_by_path(DOC, ["a", ".*", "b"], match_with="regex")
+    assert stats.matcher_calls["RegexMatch"] == 2 + 3 + 3
+
+
+def test_double_splat():
+    with profile() as stats:
+        assert getitem_by_path(DOC, ["**", "b"]) == [1, 2, 3, 4]
+    assert stats.paths_produced == 4
+    assert stats.paths_materialized == 4
+    assert {"resolve", "double_splat", "paths_to_key", "strict_lookup"} <= set(stats.stage_seconds)
+
+
+def test_searches():
+    with profile() as stats:
+        assert len(list(paths_to_key(DOC, "b"))) == 4
+    assert stats.paths_produced == 4
+    assert stats.nodes_visited == 7  # every container
+    assert "paths_to_key" in stats.stage_seconds
+
+    with profile() as stats:
+        assert list(paths_to_value(DOC, 3)) == [["a", 2, "c", "b"]]
+    assert stats.paths_produced == 1
+    assert stats.matcher_calls["GlobMatch"] > 0
+
+
+def test_deep_collection():
+    with profile() as stats:
+        DeepCollection(DOC)["a", "*", "b"]
+    assert stats.paths_produced == 2
+
+
+def test_accumulate():
+    stats = Stats()
+    for _ in range(3):
+        with profile(stats):
+            getitem_by_path(DOC, ["a", "*", "b"])
+    assert stats.paths_produced == 6
+
+
+def test_nested():
+    with profile() as outer:
+        getitem_by_path(DOC, ["a", "*", "b"])
+        with profile() as inner:
+            getitem_by_path(DOC, ["d", "*"])
+        getitem_by_path(DOC, ["a", "*", "b"])
+    assert (outer.paths_produced, inner.paths_produced) == (4, 1)
+
+
+def test_other_threads_not_recorded():
+    with profile() as stats:
+        thread = threading.Thread(target=getitem_by_path, args=(DOC, ["a", "*", "b"]))
+        thread.start()
+        thread.join()
+    assert stats.nodes_visited == 0
+
+
+def test_asyncio_task():
+    async def main():
+        with profile() as stats:
+            await asyncio.sleep(0)
+            getitem_by_path(DOC, ["a", "*", "b"])
+        return stats
+
+    assert asyncio.run(main()).paths_produced == 2
+
+
+def test_as_dict():
+    with profile() as stats:
+        getitem_by_path(DOC, ["a", "*", "b"])
+    rv = stats.as_dict()
+    assert rv["matcher_calls"] == {"GlobMatch": 5}
+    assert type(rv["matcher_calls"]) is dict and type(rv["stage_seconds"]) is dict
+    assert set(rv) == {
+        "nodes_visited",
+        "keys_tested",
+        "matcher_calls",
+        "paths_produced",
+        "paths_materialized",
+        "stage_seconds",
+    }
+    assert all(seconds >= 0 for seconds in rv["stage_seconds"].values())
@@ -0,0 +1,108 @@
+import pytest
+
+from deep_collections import DeepCollection
+from deep_collections import getitem_by_path
+from deep_collections import Limits
+from deep_collections import project
+from deep_collections import Where
+from deep_collections.columnar import columnarize
+from deep_collections.profiling import profile
+
+DOC = {
+    "items": [
+        {"id": 1, "name": "a", "meta": {"owner": "x", "tags": ["t1", "t2"]}},
+        {"id": 2, "name": "b", "meta": {"owner": "y", "tags": []}},
+        {"id": 3, "meta": None},
+    ],
+    "other": {"items": [{"id": 4, "name": "d"}]},
+}
+
+
+def test_dict_rows():
+    assert project(DOC, ["items", "*"], {"id": ["id"], "name": "name", "owner": ["meta", "owner"]}) == [
+        {"id": 1, "name": "a", "owner": "x"},
+        {"id": 2, "name": "b", "owner": "y"},
+        {"id": 3, "name": None, "owner": None},
+    ]
+
+
+def test_tuple_rows():
+    assert project(DOC, ["items", "*"], [["id"], ["meta", "tags", 0]]) == [(1, "t1"), (2, None), (3, None)]
+    assert project(DOC, ["items", "*"], ("id",)) == [(1,), (2,), (3,)]
+
+
+def test_default():
+    assert project(DOC, ["items", "*"], ["name"], default="?") == [("a",), ("b",), ("?",)]
+
+
+def test_matches_separate_gets():
+    fields = {"id": ["id"], "name": ["name"]}
+    rows = project(DOC, ["items", "*"], fields)
+    for name, path in fields.items():
+        values = getitem_by_path(DOC, ["items", "*"] + path)
+        assert [row[name] for row in rows if row[name] is not None] == values
+
+
+def test_patterned_fields():
+    assert project(DOC, ["items", "*"], {"tags": ["meta", "tags", "*"], "m": ["m*"]}) == [
+        {"tags": ["t1", "t2"], "m": {"owner": "x", "tags": ["t1", "t2"]}},
+        {"tags": None, "m": {"owner": "y", "tags": []}},
+        {"tags": None, "m": None},
+    ]
+
+
+def test_patterned_fields_default():
+    # A patterned field that matches nothing is default, not an empty list.
+    assert project({"items": [1, {"a": 2}]}, ["items", "*"], {"all": ["*"]}, default="?") == [
+        {"all": "?"},
+        {"all": 2},
+    ]
+    assert project(DOC, ["items", "*"], [["meta", "tags", "*"]], default=0) == [(["t1", "t2"],), (0,), (0,)]
+    # A match of an empty list is still the empty list.
+    assert project({"items": [{"a": []}]}, ["items", "*"], [["a*"]]) == [([],)]
+
+
+def test_patterned_base():
+    assert project(DOC, ["**", "items", "*"], ["id"]) == [
+        (v,) for v in getitem_by_path(DOC, ["**", "items", "*", "id"])
+    ]
+    assert project(DOC, ["*", "**", "items", "*"], ["id"]) == [(4,)]
+    assert project(DOC, ["items", Where("name")], ["id"]) == [(1,), (2,)]
+    assert project(DOC, ["**", "items", "*"], ["id"], limits=Limits(max_depth=2)) == [(1,), (2,), (3,)]
+    assert project(DOC, ["**", "items", "*"], ["id"], limits=Limits(max_depth=1)) == []
+
+
+def test_no_matches():
+    assert project(DOC, ["nope", "*"], ["id"]) == []
+
+
+def test_strict():
+    assert project(DOC, ["other", "items", 0], ["id", "name"], strict=True) == [(4, "d")]
+    assert project(DOC, ["items", "*"], ["id"], strict=True) == []
+
+
+def test_base_is_resolved_once():
+    with profile() as stats:
+        project(DOC, ["items", "*"], {"id": ["id"], "name": ["name"], "owner": ["meta", "owner"]})
+    # The root, and the list of items. Fields are looked up without matching.
+    assert stats.nodes_visited == 2
+
+
+def test_columnar():
+    obj = columnarize({"items": [{"id": i, "n": {"v": i * 2}} for i in range(4)]})
+    assert project(obj, ["items", "*"], ["id", ["n", "v"]]) == [(0, 0), (1, 2), (2, 4), (3, 6)]
+
+
+@pytest.mark.parametrize("return_deep", [True, False])
+def test_deep_collection(return_deep):
+    dc = DeepCollection(DOC, return_deep=return_deep)
+    rows = dc.project(["items", "*"], {"id": "id", "meta": "meta"})
+    assert rows[0] == {"id": 1, "meta": {"owner": "x", "tags": ["t1", "t2"]}}
+    assert type(rows[0]["meta"]) is dict
+    assert dc.project(["items", "*"], ["name"], default="") == [("a",), ("b",), ("",)]
+
+
+def test_deep_collection_settings():
+    dc = DeepCollection(DOC, strict=True)
+    assert dc.project(["items", "*"], ["id"]) == []
+    assert dc.project(["items", "*"], ["id"], strict=False) == [(1,), (2,), (3,)]
@@ -0,0 +1,128 @@
+import multiprocessing
+import os
+import pickle
+
+import pytest
+
+from deep_collections import paths_to_key
+from deep_collections import shared
+from deep_collections.packed import pack
+from deep_collections.packed import PackedDeepCollection
+from deep_collections.shared import attach
+from deep_collections.shared import publish
+from deep_collections.shared import SharedDocument
+
+
+DOC = {
+    "a": {"b": 1, "c": [2, {"b": 3}]},
+    "xa": {"b": {"b": "deep"}},
+    "records": [{"id": i, "name": f"n{i}"} for i in range(5)],
+}
+
+
+@pytest.fixture
+def published():
+    with publish(DOC) as doc:
+        yield doc
+
+
+def test_attach(published):
+    dc = attach(published.name)
+    assert isinstance(dc, PackedDeepCollection)
+    assert dc == DOC
+    assert dc["a", "c", 1, "b"] == 3
+    assert dc.get("nope", "default") == "default"
+    assert dc["*", "b"] == [1, {"b": "deep"}]
+    assert dc["**", "id"] == list(range(5))
+    assert list(dc.paths_to_key("b")) == list(paths_to_key(DOC, "b"))
+    assert list(dc.values_for_key("id")) == list(range(5))
+
+
+def test_attach_settings(published):
+    assert attach(published.name, match_with="regex")["x.", "b"] == {"b": "deep"}
+
+
+def test_attached_read_only(published):
+    doc = SharedDocument(published.name)
+    with pytest.raises(TypeError):
+        doc.view[0] = 0
+    with pytest.raises((TypeError, AttributeError)):
+        doc.collection()["a"] = 1
+
+
+def test_attach_without_shm_open(published, monkeypatch):
+    # As where the private _posixshmem module is missing.
+    monkeypatch.setattr(shared, "_UNTRACKED", False)
+    monkeypatch.setattr(shared, "shm_open", None)
+    assert SharedDocument(published.name).collection()["a", "c", 1, "b"] == 3
+
+
+def test_publish_packed():
+    with publish(pack(DOC)) as doc:
+        assert attach(doc.name) == DOC
+
+
+def test_publish_named():
+    name = f"dc_test_{os.getpid()}"
+    with publish(DOC, name=name) as doc:
+        assert doc.name == name
+        assert attach(name) == DOC
+    with pytest.raises(FileNotFoundError):
+        attach(name)
+
+
+def test_close(published):
+    doc = SharedDocument(published.name)
+    dc = doc.collection()
+    with pytest.raises(BufferError):
+        doc.close()
+    del dc
+    doc.close()
+
+
+def test_pickle(published):
+    dc = attach(published.name)
+    assert pickle.loads(pickle.dumps(dc)) == DOC
+
+
+def _private_memory_kb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("RssAnon:"):
+                return int(line.split()[1])
+
+
+def _attach_and_search(name, queue):
+    before = _private_memory_kb()
+    dc = attach(name)
+    hits = sum(1 for _ in dc.paths_to_key("id"))
+    queue.put((hits, _private_memory_kb() - before))
+
+
+def _worker_growth(name, workers):
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    procs = [ctx.Process(target=_attach_and_search, args=(name, queue)) for _ in range(workers)]
+    for proc in procs:
+        proc.start()
+    results = [queue.get(timeout=60) for _ in procs]
+    for proc in procs:
+        proc.join()
+    return results
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/status"), reason="Needs Linux's /proc")
+def test_worker_memory_flat():
+    records = 20000
+    doc = {"records": [{"id": i, "name": f"name {i}", "tags": ["a", "b", i]} for i in range(records)]}
+    with publish(doc) as shared:
+        size_kb = len(shared.view) // 1024
+        one = _worker_growth(shared.name, 1)
+        three = _worker_growth(shared.name, 3)
+
+    assert all(hits == records for hits, _ in one + three)
+    baseline = one[0][1]
+    for _, growth in three:
+        # No worker holds its own copy of the document, however many there are.
+        assert growth < size_kb / 2
+        assert growth < baseline * 1.5 + 1024
@@ -0,0 +1,167 @@
+from collections.abc import Mapping
+
+import pytest
+
+from deep_collections import ColumnarRecords
+from deep_collections import count_by_path
+from deep_collections import DeepCollection
+from deep_collections import exists_by_path
+from deep_collections import first_by_path
+from deep_collections import getitem_by_path
+from deep_collections.profiling import profile
+
+DOC = {
+    "a": [{"b": 1}, {"b": 2}, {"c": {"b": 3}}],
+    "d": {"b": 4, "e": [{"error": "x"}, {"error": "y"}]},
+}
+
+
+class CountingDict(Mapping):
+    """A dict that counts how often its items are read."""
+
+    reads = 0
+
+    def __init__(self, *args, **kwargs):
+        self._data = dict(*args, **kwargs)
+
+    def __getitem__(self, key):
+        CountingDict.reads += 1
+        return self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def items(self):
+        for key in self._data:
+            yield key, self[key]
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        ["a", "*", "b"],
+        ["a", 0, "b"],
+        ["**", "b"],
+        ["d", "**", "error"],
+        ["**", "e", "*", "error"],
+        ["a", "*", "nope"],
+        ["nope"],
+        "a",
+        "?",
+    ],
+)
+def test_consistent_with_getitem_by_path(path):
+    rv = getitem_by_path(DOC, path, strict=False) if count_by_path(DOC, path) else None
+    count = count_by_path(DOC, path)
+    if count > 1:
+        assert len(rv) == count
+        assert first_by_path(DOC, path) == rv[0]
+    elif count == 1:
+        assert first_by_path(DOC, path) == rv
+    else:
+        assert first_by_path(DOC, path, default="missing") == "missing"
+    assert exists_by_path(DOC, path) is bool(count)
+
+
+def test_first():
+    assert first_by_path(DOC, ["a", "*", "b"]) == 1
+    assert first_by_path(DOC, ["**", "error"]) == "x"
+    assert first_by_path(DOC, ["a", "*", "z"]) is None
+    assert first_by_path(DOC, ["a", "*", "z"], default=0) == 0
+
+
+def test_falsy_first_match_is_not_default():
+    assert first_by_path({"a": [None, 0]}, ["a", "*"], default="missing") is None
+
+
+def test_exists():
+    assert exists_by_path(DOC, ["**", "error"])
+    assert exists_by_path(DOC, ["a", 2, "c"])
+    assert not exists_by_path(DOC, ["a", 3])
+    assert not exists_by_path(DOC, ["**", "nope"])
+
+
+def test_count():
+    assert count_by_path(DOC, ["**", "b"]) == 4
+    assert count_by_path(DOC, ["a", "*"]) == 3
+    assert count_by_path(DOC, ["a", "*", "b"]) == 2
+    assert count_by_path(DOC, ["nope", "*"]) == 0
+
+
+def test_strict():
+    assert first_by_path(DOC, ["a", 0, "b"], strict=True) == 1
+    assert first_by_path(DOC, ["a", "*", "b"], strict=True, default="missing") == "missing"
+    assert first_by_path(DOC, "a", strict=True) is DOC["a"]
+    assert exists_by_path(DOC, ["d", "b"], strict=True)
+    assert not exists_by_path(DOC, ["d", "b", "c"], strict=True)
+    assert count_by_path(DOC, ["d", "b"], strict=True) == 1
+    assert count_by_path(DOC, ["a", 9], strict=True) == 0
+
+
+def test_path_is_not_changed():
+    path = ["**", "b", "**"]
+    assert count_by_path(DOC, path) == 4
+    assert path == ["**", "b", "**"]
+
+
+def test_columnar():
+    records = ColumnarRecords([{"x": 1, "y": {"z": 2}}, {"x": 3, "y": {"z": 4}}])
+    assert count_by_path(records, ["*", "y", "z"]) == 2
+    assert first_by_path(records, ["*", "x"]) == 1
+    assert exists_by_path(records, [1, "?"])
+
+
+def test_exists_stops_at_first_match():
+    doc = {"first": {"error": 1}, "rest": [{"x": {"y": i}} for i in range(1000)]}
+    with profile() as stats:
+        assert exists_by_path(doc, ["**", "error"])
+    assert stats.nodes_visited < 5
+
+    with profile() as stats:
+        assert count_by_path(doc, ["**", "error"]) == 1
+    assert stats.nodes_visited > 2000
+
+
+def test_first_stops_at_first_match():
+    doc = {"a": [{"b": i} for i in range(1000)]}
+    with profile() as stats:
+        assert first_by_path(doc, ["a", "*", "b"]) == 0
+    assert stats.nodes_visited < 5
+
+
+def test_count_does_not_read_values():
+    doc = CountingDict(a=CountingDict(b=1, c=2), d=CountingDict(b=3))
+    CountingDict.reads = 0
+    assert count_by_path(doc, ["*", "b"]) == 2
+    # Only the containers being descended into are read, not the matched values.
+    assert CountingDict.reads == 2
+
+    CountingDict.reads = 0
+    assert count_by_path(doc, ["**", "b"]) == 2
+    reads = CountingDict.reads
+    CountingDict.reads = 0
+    getitem_by_path(doc, ["**", "b"])
+    assert reads < CountingDict.reads
+
+
+def test_deep_collection():
+    dc = DeepCollection(DOC)
+    first = dc.first_by_path(["**", "e"])
+    assert isinstance(first, DeepCollection)
+    assert first == DOC["d"]["e"]
+    assert dc.first_by_path(["**", "nope"], default=0) == 0
+    assert dc.exists_by_path(["**", "error"])
+    assert not dc.exists_by_path(["a", "*", "b"], strict=True)
+    assert dc.count_by_path(["**", "b"]) == 4
+    assert dc.count_by_path(["a", ".*", "b"], match_with="regex") == 2
+
+
+def test_deep_collection_settings():
+    dc = DeepCollection({"a": [{"b": 1}]}, return_deep=False, strict=True)
+    assert dc.count_by_path(["a", "*", "b"]) == 0
+    assert dc.count_by_path(["a", "*", "b"], strict=False) == 1
+    assert dc.first_by_path(["a", 0]) == {"b": 1}
+    assert not isinstance(dc.first_by_path(["a", 0]), DeepCollection)
@@ -0,0 +1,66 @@
+import io
+import json
+
+import pytest
+
+from deep_collections import getitem_by_path
+from deep_collections import resolve_path
+from deep_collections.streaming import stream_query
+
+
+DOC = {
+    "a": {"b": 1, "c": [2, {"b": 3, "d": 'x\\"y'}], "ünï": "côdé"},
+    "b": [1.5e3, True, False, None, {}, []],
+    "xa": {"b": {"b": "deep"}},
+    "records": [{"id": i, "name": f"n{i}", "tags": ["t", i]} for i in range(5)],
+}
+TEXT = json.dumps(DOC, indent=1)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 16])
+@pytest.mark.parametrize(
+    "path",
+    [
+        [],
+        ["a"],
+        ["a", "c", 1, "d"],
+        ["*", "b"],
+        ["?a", "*"],
+        ["records", "*", "id"],
+        ["records", "[1-2]", "tags"],
+        ["b", "*"],
+        ["a", "ünï"],
+        ["nope"],
+    ],
+)
+def test_matches_getitem_by_path(path, chunk_size):
+    expected = [(p, getitem_by_path(DOC, p)) for p in resolve_path(DOC, list(path))] if path else [([], DOC)]
+    assert list(stream_query(io.StringIO(TEXT), path, chunk_size=chunk_size)) == expected
+
+
+def test_double_splat():
+    result = list(stream_query(io.StringIO(TEXT), ["**", "b"]))
+    assert result == [
+        (["a", "b"], 1),
+        (["a", "c", 1, "b"], 3),
+        (["b"], DOC["b"]),
+        (["xa", "b", "b"], "deep"),
+        (["xa", "b"], {"b": "deep"}),
+    ]
+
+
+def test_many_paths_and_binary():
+    f = io.BytesIO(TEXT.encode())
+    result = list(stream_query(f, [["records", 0, "name"], ["a", "b"]], chunk_size=5))
+    assert result == [(["a", "b"], 1), (["records", 0, "name"], "n0")]
+
+
+def test_match_with():
+    result = list(stream_query(io.StringIO(TEXT), ["^x", "^b$"], match_with="regex"))
+    assert result == [(["xa", "b"], {"b": "deep"})]
+
+
+@pytest.mark.parametrize("text", ['{"a": 1', '{"a" 1}', '{"a": 1,}', "[1 2]", '{"a": 1} x', ""])
+def test_invalid(text):
+    with pytest.raises(json.JSONDecodeError):
+        list(stream_query(io.StringIO(text), ["**", "z"]))
@@ -0,0 +1,204 @@
+import random
+import threading
+import time
+from copy import deepcopy
+
+import pytest
+
+from deep_collections import _resolve_items
+from deep_collections import DeepCollection
+from deep_collections import del_by_path
+from deep_collections import set_by_path
+from deep_collections.journal import Entry
+
+DOC = {
+    "web": {"replicas": 2, "ports": [80, 443], "env": {"mode": "prod"}},
+    "db": {"replicas": 1, "ports": [5432]},
+    "jobs": [{"name": "a", "replicas": 3}, {"name": "b"}],
+}
+
+MUTATIONS = [
+    lambda dc: dc.__setitem__(["db", "replicas"], 5),
+    lambda dc: dc.__setitem__("web", {"replicas": 9}),
+    lambda dc: dc.__setitem__(["new", "deep", "x"], 1),
+    lambda dc: dc.__delitem__("db"),
+    lambda dc: dc.__delitem__(["jobs", 0]),
+    lambda dc: dc.__delitem__(["web", "ports", 0]),
+    lambda dc: dc.__delitem__(["web", "env", "mode"]),
+    lambda dc: set_by_path(dc, ["jobs", 1, "replicas"], 1),
+    lambda dc: del_by_path(dc, ["web", "env"]),
+    lambda dc: dc.update({"db": {"replicas": 2}, "extra": 0}),
+    lambda dc: dc.pop("web"),
+    lambda dc: dc.clear(),
+    lambda dc: dc["web"].__setitem__("replicas", 6),
+    lambda dc: dc["web"].__delitem__("ports"),
+]
+
+
+def state(dc):
+    return deepcopy(dc._obj), list(dc._obj), list(dc.keys())
+
+
+@pytest.mark.parametrize("mutate", MUTATIONS)
+def test_commit(mutate):
+    outside = DeepCollection(deepcopy(DOC))
+    mutate(outside)
+    dc = DeepCollection(deepcopy(DOC))
+    with dc.transaction():
+        mutate(dc)
+    assert state(dc) == state(outside)
+    assert dict(dc) == dict(outside)
+
+
+@pytest.mark.parametrize("mutate", MUTATIONS)
+def test_rollback(mutate):
+    dc = DeepCollection(deepcopy(DOC))
+    before = state(dc)
+    with pytest.raises(RuntimeError):
+        with dc.transaction():
+            mutate(dc)
+            raise RuntimeError
+    assert state(dc) == before
+    assert dict(dc) == DOC
+
+
+def test_random_rollback():
+    rng = random.Random(0)
+    dc = DeepCollection(deepcopy(DOC))
+    for _ in range(50):
+        before = state(dc)
+        try:
+            with dc.transaction():
+                for _ in range(rng.randint(1, 10)):
+                    paths = [p for p, _ in _resolve_items(dc._obj, ["**", "*"])] + [["top"]]
+                    path = rng.choice(paths)
+                    try:
+                        if rng.random() < 0.3:
+                            del dc[path]
+                        else:
+                            dc[path] = rng.choice([1, {"n": 1}, [1, {"m": 2}]])
+                    except (KeyError, IndexError, TypeError):
+                        pass
+                if rng.random() < 0.5:
+                    raise RuntimeError
+        except RuntimeError:
+            assert state(dc) == before
+
+
+def test_reads_see_changes():
+    dc = DeepCollection(deepcopy(DOC), cache=True)
+    assert dc["*", "replicas"] == [2, 1]
+    with dc.transaction():
+        dc["db", "replicas"] = 5
+        assert dc["*", "replicas"] == [2, 5]
+        assert dc["db", "replicas"] == 5
+        dc["new"] = 1
+        assert len(dc) == 4
+    assert dc["*", "replicas"] == [2, 5]
+
+
+def test_rollback_keeps_cache():
+    dc = DeepCollection(deepcopy(DOC), cache=True)
+    assert dc["*", "replicas"] == [2, 1]
+    with pytest.raises(RuntimeError):
+        with dc.transaction():
+            dc["db", "replicas"] = 5
+            raise RuntimeError
+    assert dc["*", "replicas"] == [2, 1]
+    assert dc.cache_info().hits == 1
+
+
+def test_updates_are_deferred():
+    dc = DeepCollection(deepcopy(DOC))
+    live = dc.watch(["**", "replicas"])
+    journal = dc.journal()
+    calls = []
+    live.subscribe(lambda query, changes: calls.append(changes))
+    with dc.transaction():
+        for n in range(5):
+            dc["db", "replicas"] = n
+        dc["web"] = {"replicas": 0}
+        dc["web", "replicas"] = 7
+        assert live.values() == [2, 1, 3]
+        assert journal.entries == []
+    assert sorted(live.values()) == [3, 4, 7]
+    assert journal.drain() == [Entry("set", ["db", "replicas"], 4), Entry("set", ["web"], {"replicas": 7})]
+    assert len(calls) == 2
+
+
+def test_rollback_records_nothing():
+    dc = DeepCollection(deepcopy(DOC))
+    live = dc.watch(["**", "replicas"])
+    journal = dc.journal()
+    with pytest.raises(RuntimeError):
+        with dc.transaction():
+            dc["db", "replicas"] = 5
+            raise RuntimeError
+    assert journal.entries == []
+    assert live.values() == [2, 1, 3]
+
+
+def test_nested_transactions_join():
+    dc = DeepCollection(deepcopy(DOC))
+    with pytest.raises(RuntimeError):
+        with dc.transaction() as outer:
+            dc["a"] = 1
+            with dc.transaction() as inner:
+                assert inner is outer
+                dc["b"] = 2
+            raise RuntimeError
+    assert dc._obj == DOC
+
+
+def test_failed_delete_caught():
+    dc = DeepCollection({"n": 1, "t": (1, 2)})
+    with pytest.raises(RuntimeError):
+        with dc.transaction():
+            dc["n"] = 5
+            with pytest.raises(TypeError):
+                del dc["t", 0]
+            raise RuntimeError
+    assert dc._obj == {"n": 1, "t": (1, 2)}
+
+
+def test_rollback_past_failed_undo():
+    dc = DeepCollection(deepcopy(DOC))
+    with pytest.warns(RuntimeWarning, match="Couldn't undo"):
+        with pytest.raises(RuntimeError):
+            with dc.transaction() as transaction:
+                dc["db", "replicas"] = 5
+                transaction._undo.append(lambda: 1 / 0)
+                dc["web", "replicas"] = 6
+                raise RuntimeError
+    assert dc._obj == DOC
+
+
+def test_sequence():
+    dc = DeepCollection([{"n": 1}, {"n": 2}, {"n": 3}])
+    with pytest.raises(RuntimeError):
+        with dc.transaction():
+            del dc[0]
+            dc.append({"n": 4})
+            dc[0, "n"] = 0
+            raise RuntimeError
+    assert dc._obj == [{"n": 1}, {"n": 2}, {"n": 3}]
+    assert list(dc) == dc._obj
+
+    with dc.transaction():
+        del dc[0]
+        dc[0, "n"] = 0
+    assert dc._obj == list(dc) == [{"n": 0}, {"n": 3}]
+
+
+def test_threadsafe_holds_write_lock():
+    dc = DeepCollection(deepcopy(DOC), threadsafe=True)
+    seen = []
+    reader = threading.Thread(target=lambda: seen.append(dc["db", "replicas"]))
+    with dc.transaction():
+        dc["db", "replicas"] = 5
+        reader.start()
+        time.sleep(0.05)
+        assert seen == []
+        dc["db", "replicas"] = 6
+    reader.join()
+    assert seen == [6]
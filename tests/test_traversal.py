@@ -0,0 +1,181 @@
+from collections import deque
+from collections import OrderedDict
+from collections import UserDict
+from collections import UserList
+
+import pytest
+
+from deep_collections import ColumnarRecords
+from deep_collections import count_by_path
+from deep_collections import DeepCollection
+from deep_collections import flatten
+from deep_collections import getitem_by_path
+from deep_collections import matched_keys
+from deep_collections import parallel
+from deep_collections import paths_to_key
+from deep_collections import paths_to_value
+from deep_collections import values_for_key
+from deep_collections.traversal import MAPPING
+from deep_collections.traversal import register
+from deep_collections.traversal import SEQUENCE
+from deep_collections.traversal import Strategy
+from deep_collections.traversal import strategy_for
+from deep_collections.traversal import unregister
+from deep_collections.utils import pathlike
+
+
+class Message:
+    """Like a protobuf message: fields are attributes, and it isn't iterable."""
+
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+class Opaque(dict):
+    """A dict that searches should treat as a single value."""
+
+
+@pytest.fixture
+def messages():
+    register(Message, Strategy(lambda m: vars(m).items(), lookup=getattr))
+    yield
+    unregister(Message)
+
+
+@pytest.fixture
+def opaque():
+    register(Opaque, None)
+    yield
+    unregister(Opaque)
+
+
+@pytest.mark.parametrize(
+    "cls, strategy",
+    [
+        (dict, MAPPING),
+        (OrderedDict, MAPPING),
+        (UserDict, MAPPING),
+        (list, SEQUENCE),
+        (tuple, SEQUENCE),
+        (deque, SEQUENCE),
+        (UserList, SEQUENCE),
+        (str, None),
+        (bytes, None),
+        (bytearray, None),
+        (int, None),
+    ],
+)
+def test_builtin_strategies(cls, strategy):
+    assert strategy_for(cls) is strategy
+
+
+def test_subclasses_use_their_bases_strategy():
+    class MyDict(OrderedDict):
+        pass
+
+    assert strategy_for(MyDict) is MAPPING
+    assert strategy_for(type(DeepCollection({}))) is MAPPING
+    assert strategy_for(type(DeepCollection([]))) is SEQUENCE
+    assert strategy_for(type(DeepCollection("a"))) is None
+
+
+def test_unregistered_types():
+    class Keyed:
+        def keys(self):
+            return ["a"]
+
+        def items(self):
+            return [("a", 1)]
+
+        def __iter__(self):
+            return iter(self.keys())
+
+    class Indexed:
+        def __getitem__(self, idx):
+            return idx
+
+    class NotIterable:
+        __iter__ = None
+
+        def __getitem__(self, idx):
+            return idx
+
+    assert strategy_for(Keyed) is MAPPING
+    assert strategy_for(Indexed) is SEQUENCE
+    assert strategy_for(NotIterable) is None
+    assert strategy_for(ColumnarRecords) is SEQUENCE
+    assert strategy_for(type(DeepCollection(ColumnarRecords([{"a": 1}])))) is SEQUENCE
+
+
+def test_numpy_scalars_are_leaves():
+    np = pytest.importorskip("numpy")
+    doc = {"a": {"x": np.float64(1.5)}, "b": [np.int64(2), np.array(3.0), np.bool_(True)]}
+    assert strategy_for(np.float64) is None
+    assert list(paths_to_key(doc, "x")) == [["a", "x"]]
+    assert list(paths_to_value(doc, 2)) == [["b", 0]]
+    assert list(values_for_key(doc, "x")) == [1.5]
+    assert getitem_by_path(doc, ["**", "x"]) == 1.5
+    assert count_by_path(doc, ["b", "*"]) == 3
+    assert flatten(doc) == {("a", "x"): 1.5, ("b", 0): 2, ("b", 1): 3.0, ("b", 2): True}
+    assert strategy_for(np.ndarray) is SEQUENCE
+    assert getitem_by_path({"m": np.array([[1, 2]])}, ["m", 0, "*"]) == [1, 2]
+
+
+def test_containers():
+    obj = OrderedDict(a=deque([UserDict(b=1), (UserList([2]), {"b": 3})]))
+    assert list(paths_to_key(obj, "b")) == [["a", 0, "b"], ["a", 1, 1, "b"]]
+    assert list(paths_to_value(obj, 2)) == [["a", 1, 0, 0]]
+    assert getitem_by_path(obj, ["a", "*", "*", "b"]) == 3
+
+
+def test_registered_type(messages):
+    obj = {"users": [Message(name="a", address=Message(city="x")), Message(name="b")]}
+    assert pathlike(Message())
+    assert list(paths_to_key(obj, "city")) == [["users", 0, "address", "city"]]
+    assert list(paths_to_value(obj, "b")) == [["users", 1, "name"]]
+    assert list(values_for_key(obj, "name")) == ["a", "b"]
+    assert getitem_by_path(obj, ["users", "*", "name"]) == ["a", "b"]
+    assert getitem_by_path(obj, ["**", "city"]) == "x"
+    assert getitem_by_path(obj, ["users", 0, "address", "city"], strict=True) == "x"
+    assert matched_keys(obj["users"][0], "n*") == ["name"]
+    assert count_by_path(obj, ["users", "*", "*"]) == 3
+
+
+def test_registered_type_in_parallel(messages):
+    obj = {"a": [Message(x=1), Message(y=Message(x=2))], "b": Message(x=3)}
+    assert list(parallel.paths_to_key(obj, "x", workers=2)) == list(paths_to_key(obj, "x"))
+
+
+def test_strict_lookup_errors_are_unchanged(messages):
+    with pytest.raises(TypeError):
+        getitem_by_path({"a": 1}, ["a", "b"], strict=True)
+    with pytest.raises(AttributeError):
+        getitem_by_path({"a": Message()}, ["a", "b"], strict=True)
+
+
+def test_registered_leaf(opaque):
+    obj = {"a": Opaque(b=1), "c": {"b": 2}}
+    assert not pathlike(Opaque())
+    assert list(paths_to_key(obj, "b")) == [["c", "b"]]
+    assert list(paths_to_value(obj, 1)) == []
+    # An explicit path can still look inside it.
+    assert getitem_by_path(obj, ["a", "b"]) == 1
+
+
+def test_register_clears_cache():
+    class Thing:
+        pass
+
+    assert strategy_for(Thing) is None
+    register(Thing, SEQUENCE)
+    try:
+        assert strategy_for(Thing) is SEQUENCE
+    finally:
+        unregister(Thing)
+    assert strategy_for(Thing) is None
+
+
+def test_strategy_keys_default_to_items():
+    strategy = Strategy(lambda obj: [("x", 1), ("y", 2)])
+    assert strategy.keys(None) == ["x", "y"]
+    assert strategy.mapping
@@ -1,9 +1,11 @@
 import inspect
+import pickle
 import re
 
 import pytest
 
 from .parameters import getitem_tests
+from deep_collections import DeepCollection
 from deep_collections import getitem_by_path
 from deep_collections import paths_to_key
 from deep_collections import paths_to_value
@@ -18,6 +20,25 @@ def test_getitem_by_path(obj, path, result):
         assert getitem_by_path(obj, path) == result
 
 
+def test_getitem_by_path_strict_simple_key():
+    assert getitem_by_path({"ab": 1}, "ab", strict=True) == 1
+    assert getitem_by_path({"ab": [1]}, ["ab", 0], strict=True) == 1
+    assert getitem_by_path(["a", "b"], 1, strict=True) == "b"
+
+
+def test_strict_dc_after_pickling():
+    dc = pickle.loads(pickle.dumps(DeepCollection({"ab": {"c": 1}, 0: 2}, strict=True)))
+    assert dc.strict is True
+    assert dc["ab"] == {"c": 1}
+    assert dc[0] == 2
+    assert dc["ab", "c"] == 1
+
+
+def test_getitem_by_path_regex_below_first_key():
+    assert getitem_by_path({"a": {"bc": 1, "bd": 2}}, ["a", "b.+"], match_with="regex") == [1, 2]
+    assert getitem_by_path({"x": {"a": {"bc": 1}}}, ["x", "a", "b.+"], match_with="regex") == 1
+
+
 # Needed for next hash match test
 class FunkyInt(int):
     def __hash__(self):